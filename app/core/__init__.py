@@ -1,4 +1,6 @@
 from .database import Database
 from .config import Settings, settings
+from .llm_client import LLMClient, llm_client
+from .http_client import HTTPClient
 
-__all__ = ['Database', 'Settings', 'settings']
\ No newline at end of file
+__all__ = ['Database', 'Settings', 'settings', 'LLMClient', 'llm_client', 'HTTPClient']
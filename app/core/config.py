@@ -21,10 +21,55 @@ class Settings:
     MONGO_URI: str = os.getenv("MONGO_URI", "mongodb://localhost:27017")
     DATABASE_NAME: str = os.getenv("DATABASE_NAME", "seraface")
     PRODUCTS_COLLECTION: str = os.getenv("PRODUCTS_COLLECTION", "products_cache")
+    PRODUCT_CACHE_FUZZY_MIN_COVERAGE: float = float(os.getenv("PRODUCT_CACHE_FUZZY_MIN_COVERAGE", "0.8"))
+    PRODUCT_FUZZY_MATCH_THRESHOLD: float = float(os.getenv("PRODUCT_FUZZY_MATCH_THRESHOLD", "0.7"))
+    CATALOG_INDEX_SYNC_SECONDS: float = float(os.getenv("CATALOG_INDEX_SYNC_SECONDS", "300"))
+    PRODUCT_L1_CACHE_SIZE: int = int(os.getenv("PRODUCT_L1_CACHE_SIZE", "2048"))
+    PRODUCT_L1_CACHE_TTL_SECONDS: float = float(os.getenv("PRODUCT_L1_CACHE_TTL_SECONDS", "300"))
+    PRODUCT_SOFT_TTL_SECONDS: int = int(os.getenv("PRODUCT_SOFT_TTL_SECONDS", "259200"))
+    PRODUCT_HARD_TTL_SECONDS: int = int(os.getenv("PRODUCT_HARD_TTL_SECONDS", "1209600"))
+    PRODUCT_DETAILS_PREFETCH: bool = os.getenv("PRODUCT_DETAILS_PREFETCH", "False").lower() == "true"
+    PRODUCT_DETAILS_WORKERS: int = int(os.getenv("PRODUCT_DETAILS_WORKERS", "2"))
+    PRODUCT_DETAILS_QUEUE_SIZE: int = int(os.getenv("PRODUCT_DETAILS_QUEUE_SIZE", "1000"))
+    PRODUCT_HARVEST_ENABLED: bool = os.getenv("PRODUCT_HARVEST_ENABLED", "True").lower() == "true"
+    PRODUCT_HARVEST_MAX_RESULTS: int = int(os.getenv("PRODUCT_HARVEST_MAX_RESULTS", "40"))
+    NEGATIVE_CACHE_TTL_SECONDS: int = int(os.getenv("NEGATIVE_CACHE_TTL_SECONDS", "21600"))
+    NEGATIVE_CACHE_ERROR_TTL_SECONDS: int = int(os.getenv("NEGATIVE_CACHE_ERROR_TTL_SECONDS", "600"))
+    PRODUCT_FETCH_LEASE_ENABLED: bool = os.getenv("PRODUCT_FETCH_LEASE_ENABLED", "False").lower() == "true"
+    PRODUCT_FETCH_LEASE_TTL_SECONDS: int = int(os.getenv("PRODUCT_FETCH_LEASE_TTL_SECONDS", "30"))
+    PRODUCT_FETCH_LEASE_WAIT_SECONDS: float = float(os.getenv("PRODUCT_FETCH_LEASE_WAIT_SECONDS", "10"))
+    PRODUCT_FETCH_LEASE_POLL_SECONDS: float = float(os.getenv("PRODUCT_FETCH_LEASE_POLL_SECONDS", "0.5"))
     
     # AI Configuration
     GEMINI_API_KEY: str = os.getenv("GEMINI_API_KEY", "")
     SERPAPI_KEY: str = os.getenv("SERPAPI_KEY", "")
+    GEMINI_MODEL: str = os.getenv("GEMINI_MODEL", "gemini-2.0-flash")
+    LLM_MAX_CONCURRENCY: int = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))
+    LLM_TIMEOUT_SECONDS: float = float(os.getenv("LLM_TIMEOUT_SECONDS", "60"))
+    BUDGET_ALLOCATION_MODE: str = os.getenv("BUDGET_ALLOCATION_MODE", "rules")
+    PHASE3_MAX_CONCURRENCY: int = int(os.getenv("PHASE3_MAX_CONCURRENCY", "12"))
+    PHASE3_PROMPT_MODE: str = os.getenv("PHASE3_PROMPT_MODE", "fanout")
+    RECOMMENDATION_CACHE_ENABLED: bool = os.getenv("RECOMMENDATION_CACHE_ENABLED", "True").lower() == "true"
+    RECOMMENDATION_CACHE_TTL_SECONDS: int = int(os.getenv("RECOMMENDATION_CACHE_TTL_SECONDS", "604800"))
+    RECOMMENDATION_ENGINE: str = os.getenv("RECOMMENDATION_ENGINE", "llm")
+    CATALOG_MIN_PRODUCTS: int = int(os.getenv("CATALOG_MIN_PRODUCTS", "3"))
+    CATALOG_RECOMMENDER_REFRESH_SECONDS: float = float(os.getenv("CATALOG_RECOMMENDER_REFRESH_SECONDS", "900"))
+    RECOMMENDATION_REUSE_MODE: str = os.getenv("RECOMMENDATION_REUSE_MODE", "exact")
+    PROFILE_SIMILARITY_THRESHOLD: float = float(os.getenv("PROFILE_SIMILARITY_THRESHOLD", "0.95"))
+    PROFILE_INDEX_SYNC_SECONDS: float = float(os.getenv("PROFILE_INDEX_SYNC_SECONDS", "300"))
+    
+    # HTTP Client Configuration
+    HTTP_TIMEOUT_SECONDS: float = float(os.getenv("HTTP_TIMEOUT_SECONDS", "15"))
+    HTTP_CONNECT_TIMEOUT_SECONDS: float = float(os.getenv("HTTP_CONNECT_TIMEOUT_SECONDS", "5"))
+    HTTP_MAX_CONNECTIONS: int = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_KEEPALIVE_CONNECTIONS: int = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "20"))
+    HTTP_KEEPALIVE_EXPIRY_SECONDS: float = float(os.getenv("HTTP_KEEPALIVE_EXPIRY_SECONDS", "60"))
+    
+    # Product Enrichment Configuration
+    ENRICHMENT_GLOBAL_CONCURRENCY: int = int(os.getenv("ENRICHMENT_GLOBAL_CONCURRENCY", "32"))
+    ENRICHMENT_REQUEST_CONCURRENCY: int = int(os.getenv("ENRICHMENT_REQUEST_CONCURRENCY", "8"))
+    ENRICHMENT_PRODUCT_TIMEOUT_SECONDS: float = float(os.getenv("ENRICHMENT_PRODUCT_TIMEOUT_SECONDS", "20"))
+    ENRICHMENT_PRICE_BAND_TOLERANCE: float = float(os.getenv("ENRICHMENT_PRICE_BAND_TOLERANCE", "0.1"))
     
     # API Configuration
     API_VERSION: str = os.getenv("API_VERSION", "v1")
@@ -0,0 +1,43 @@
+"""
+Shared async HTTP client
+
+One pooled httpx.AsyncClient per worker, opened and closed with the app
+lifespan. Outbound calls (SerpAPI) reuse keep-alive connections and TLS
+sessions instead of opening a new socket per request, and use HTTP/2 when
+the h2 package is installed.
+"""
+
+import importlib.util
+import httpx
+from .config import settings
+
+
+class HTTPClient:
+    client: httpx.AsyncClient = None
+    
+    @classmethod
+    def connect(cls):
+        """Create the pooled client using settings from config"""
+        cls.client = httpx.AsyncClient(
+            http2=importlib.util.find_spec("h2") is not None,
+            timeout=httpx.Timeout(settings.HTTP_TIMEOUT_SECONDS, connect=settings.HTTP_CONNECT_TIMEOUT_SECONDS),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY_SECONDS
+            )
+        )
+    
+    @classmethod
+    async def disconnect(cls):
+        """Close the pooled client and its connections"""
+        if cls.client:
+            await cls.client.aclose()
+            cls.client = None
+    
+    @classmethod
+    def get_client(cls) -> httpx.AsyncClient:
+        """Get the pooled client, creating it on first use outside the app lifespan"""
+        if cls.client is None:
+            cls.connect()
+        return cls.client
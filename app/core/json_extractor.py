@@ -0,0 +1,283 @@
+"""
+Tolerant JSON extraction for LLM responses
+
+Even with schema-constrained output, model responses occasionally arrive
+wrapped in markdown fences or prose, with trailing commas or smart quotes,
+or cut off mid-array. JSONExtractor scans the text once (incrementally when
+fed chunks from a stream), repairs those defects as it goes and, when the
+text ends early, returns what was complete instead of failing.
+"""
+
+import json
+import re
+from typing import Any, List, Optional
+
+OPENERS = {"{": dict, "[": list}
+CLOSERS = {"}": dict, "]": list}
+SMART_QUOTES = ("“", "”")
+LITERALS = {"true": True, "false": False, "null": None, "True": True, "False": False, "None": None}
+WHITESPACE = " \t\r\n"
+
+_SEEK = re.compile(r"[\[{]")
+_STRING_END = re.compile(r'["\\]')
+_SMART_STRING_END = re.compile(r'["\\”]')
+_LITERAL = re.compile(r'[^\s,:\[\]{}"“”]+')
+_DECODER = json.JSONDecoder()
+
+
+class JSONExtractor:
+    """
+    Incremental, repairing JSON scanner.
+
+    feed() accepts text chunks and returns the root-level items completed by
+    that chunk (list elements, or (key, value) pairs for an object). close()
+    ends the document and returns the root value. Text before the first
+    opening bracket and after the root closes is ignored.
+
+    Repairs (listed in .repairs): trailing and doubled commas, missing commas
+    between values, smart-quoted strings, unquoted keys, Python literals and,
+    on truncation, dropping the unfinished tail. Truncated containers are
+    closed where they end, keeping every value that completed before the
+    cut, except the innermost unfinished object below the root, which is
+    dropped since it is missing fields.
+    """
+
+    def __init__(self, root: Optional[str] = None):
+        self._seek = re.compile(re.escape(root)) if root else _SEEK
+        self.root: Any = None
+        self.complete = False
+        self.repairs: List[str] = []
+        self._stack: List[list] = []  # [container, parent, slot]
+        self._key: Optional[str] = None
+        self._state = "seek"  # seek | value | after | colon | string | literal | done
+        self._comma = False
+        self._is_key = False
+        self._string: List[str] = []
+        self._string_end = _STRING_END
+        self._escape = False
+        self._literal = ""
+        self._completed: List[Any] = []
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Scan the next chunk of text; returns root-level items it completed"""
+        self._completed = []
+        i, n = 0, len(chunk)
+        while i < n:
+            state = self._state
+            if state == "string":
+                i = self._scan_string(chunk, i)
+                continue
+            if state == "literal":
+                i = self._scan_literal(chunk, i)
+                continue
+            if state == "done":
+                break
+            if state == "seek":
+                match = self._seek.search(chunk, i)
+                if not match:
+                    break
+                self._open(OPENERS[match.group()])
+                i = match.end()
+                continue
+
+            char = chunk[i]
+            i += 1
+            if char in WHITESPACE:
+                continue
+            if char == ",":
+                if state == "after":
+                    self._state = "value"
+                    self._comma = True
+                elif state == "value":
+                    self._repair("doubled comma")
+                continue
+            if char == ":":
+                if state != "colon":
+                    raise ValueError(f"Unexpected ':' at offset {i - 1}")
+                self._state = "value"
+                continue
+            if char in CLOSERS:
+                self._close(CLOSERS[char])
+                continue
+
+            # Anything else starts a value (or a key)
+            if state == "after":
+                self._repair("missing comma")
+                self._state = state = "value"
+            if state == "colon":
+                raise ValueError(f"Expected ':' at offset {i - 1}")
+            self._comma = False
+            self._is_key = isinstance(self._stack[-1][0], dict) and self._key is None
+            if char in OPENERS:
+                if self._is_key:
+                    raise ValueError(f"Expected an object key at offset {i - 1}")
+                self._open(OPENERS[char])
+            elif char == '"' or char in SMART_QUOTES:
+                if char != '"':
+                    self._repair("smart quotes")
+                self._string_end = _STRING_END if char == '"' else _SMART_STRING_END
+                self._string = []
+                self._state = "string"
+            else:
+                self._literal = ""
+                self._state = "literal"
+                i -= 1
+        return self._completed
+
+    def close(self) -> Any:
+        """End the document, closing anything a truncated response left open"""
+        if self.root is None:
+            raise ValueError("No JSON value found")
+        if not self.complete:
+            # An unfinished string or literal may itself be cut short, so it is dropped
+            self._repair("truncated")
+            for container, parent, slot in reversed(self._stack[1:]):
+                if isinstance(container, dict):
+                    if isinstance(parent, list):
+                        parent.pop()
+                    else:
+                        del parent[slot]
+                    break
+            self._stack = []
+            self._state = "done"
+        return self.root
+
+    def _repair(self, kind: str):
+        if kind not in self.repairs:
+            self.repairs.append(kind)
+
+    def _emit(self, value: Any):
+        """Store a value in the innermost container; returns its slot"""
+        container = self._stack[-1][0]
+        if isinstance(container, list):
+            slot = len(container)
+            container.append(value)
+        else:
+            slot = self._key
+            container[slot] = value
+            self._key = None
+        if len(self._stack) == 1 and not isinstance(value, (dict, list)):
+            self._completed.append(value if isinstance(container, list) else (slot, value))
+        return slot
+
+    def _open(self, kind: type):
+        container = kind()
+        if self._stack:
+            parent = self._stack[-1][0]
+            self._stack.append([container, parent, self._emit(container)])
+        else:
+            self.root = container
+            self._stack.append([container, None, None])
+        self._state = "value"
+
+    def _close(self, kind: type):
+        if not isinstance(self._stack[-1][0], kind):
+            # A missing closer: close inner containers up to the matching one
+            if not any(isinstance(entry[0], kind) for entry in self._stack):
+                raise ValueError("Unbalanced closing bracket")
+            self._repair("missing bracket")
+            while not isinstance(self._stack[-1][0], kind):
+                self._close(type(self._stack[-1][0]))
+        if self._comma:
+            self._repair("trailing comma")
+            self._comma = False
+        if self._key is not None:
+            self._repair("missing value")
+            self._key = None
+
+        container, parent, slot = self._stack.pop()
+        if not self._stack:
+            self.complete = True
+            self._state = "done"
+            return
+        if len(self._stack) == 1:
+            self._completed.append(container if isinstance(parent, list) else (slot, container))
+        self._state = "after"
+
+    def _scan_string(self, chunk: str, i: int) -> int:
+        if self._escape:
+            self._string.append(chunk[i])
+            self._escape = False
+            i += 1
+        match = self._string_end.search(chunk, i)
+        if not match:
+            self._string.append(chunk[i:])
+            return len(chunk)
+
+        j = match.start()
+        self._string.append(chunk[i:j])
+        if chunk[j] == "\\":
+            self._string.append("\\")
+            if j + 1 < len(chunk):
+                self._string.append(chunk[j + 1])
+                return j + 2
+            self._escape = True
+            return j + 1
+
+        raw = "".join(self._string)
+        value = raw
+        if "\\" in raw:
+            try:
+                value = json.loads(f'"{raw}"', strict=False)
+            except ValueError:
+                self._repair("invalid escape")
+        self._finish_token(value)
+        return j + 1
+
+    def _scan_literal(self, chunk: str, i: int) -> int:
+        match = _LITERAL.match(chunk, i)
+        end = match.end() if match else i
+        self._literal += chunk[i:end]
+        if end == len(chunk):
+            return end  # the literal may continue in the next chunk
+
+        token = self._literal
+        if self._is_key:
+            self._repair("unquoted key")
+            value = token
+        elif token in LITERALS:
+            if token[0].isupper():
+                self._repair("python literal")
+            value = LITERALS[token]
+        else:
+            try:
+                value = int(token)
+            except ValueError:
+                try:
+                    value = float(token)
+                except ValueError:
+                    raise ValueError(f"Unexpected token {token!r}")
+        self._finish_token(value)
+        return end
+
+    def _finish_token(self, value: Any):
+        if self._is_key:
+            self._key = value
+            self._state = "colon"
+        else:
+            self._emit(value)
+            self._state = "after"
+
+
+def extract_json(text: str, root: Optional[str] = None, repairs: Optional[List[str]] = None) -> Any:
+    """
+    Extract the first JSON array or object from model text, repairing it if
+    needed. root ("[" or "{") restricts the search to that kind of value.
+    The repairs applied, if any, are appended to the repairs list when given.
+    Raises ValueError when no JSON value is found.
+    """
+    match = (re.compile(re.escape(root)) if root else _SEEK).search(text)
+    if not match:
+        raise ValueError("No JSON value found")
+    try:
+        # Well-formed output (possibly fenced or wrapped in prose) takes the C decoder
+        return _DECODER.raw_decode(text, match.start())[0]
+    except ValueError:
+        pass
+
+    extractor = JSONExtractor(root)
+    extractor.feed(text[match.start():])
+    value = extractor.close()
+    if repairs is not None:
+        repairs.extend(extractor.repairs)
+    return value
@@ -0,0 +1,169 @@
+"""
+Shared Gemini client for the Seraface AI Server
+
+Every pipeline phase goes through this client so that model calls use the
+SDK's native async API instead of blocking the event loop. In-flight calls
+per worker are bounded by a semaphore (LLM_MAX_CONCURRENCY).
+
+Structured output goes through generate_json: the response is constrained
+to a schema derived from a Pydantic model (or type) and validated against
+it, so phases no longer recover JSON from free-form text. Malformed output
+that still slips through is repaired by json_extractor.
+"""
+
+import asyncio
+from functools import lru_cache
+from typing import Any, Dict, List, Optional
+import google.generativeai as genai
+from pydantic import TypeAdapter, ValidationError
+from .config import settings
+from .json_extractor import extract_json
+
+genai.configure(api_key=settings.GEMINI_API_KEY)
+
+WEEKDAYS = ["monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday"]
+
+# Open-ended Dict[str, X] fields have no Gemini schema equivalent; these are spelled out
+DICT_KEYS = {"days": WEEKDAYS}
+
+
+class LLMResponseError(Exception):
+    """Raised when a model response does not match the requested schema"""
+
+
+def gemini_schema(json_schema: Dict[str, Any], dict_keys: Optional[Dict[str, List[str]]] = None) -> Dict[str, Any]:
+    """
+    Convert a Pydantic JSON schema to the OpenAPI subset Gemini accepts:
+    $refs are inlined, Optional (anyOf with null) becomes nullable, titles
+    and model docstrings are dropped, and Dict[str, X] fields get explicit
+    keys from dict_keys.
+    """
+    definitions = json_schema.get("$defs", {})
+    dict_keys = DICT_KEYS if dict_keys is None else dict_keys
+
+    def resolve(node: Dict[str, Any]) -> Dict[str, Any]:
+        while "$ref" in node:
+            node = {**definitions[node["$ref"].split("/")[-1]], **{k: v for k, v in node.items() if k != "$ref"}}
+        return node
+
+    def convert(node: Dict[str, Any], name: Optional[str] = None) -> Dict[str, Any]:
+        node = resolve(node)
+        nullable = False
+        if "anyOf" in node:
+            options = [option for option in node["anyOf"] if option.get("type") != "null"]
+            if len(options) != 1:
+                raise ValueError(f"Unsupported union in field '{name}'")
+            nullable = len(options) < len(node["anyOf"])
+            node = resolve(options[0])
+
+        kind = node.get("type")
+        if kind not in ("string", "number", "integer", "boolean", "array", "object"):
+            raise ValueError(f"Unsupported type {kind!r} in field '{name}'")
+
+        schema: Dict[str, Any] = {"type": kind.upper()}
+        if node.get("description") and kind != "object":
+            schema["description"] = node["description"]
+        if kind == "string" and node.get("enum"):
+            schema["enum"] = node["enum"]
+        if kind == "array":
+            schema["items"] = convert(node.get("items", {}), name)
+        elif kind == "object":
+            if node.get("properties"):
+                schema["properties"] = {key: convert(value, key) for key, value in node["properties"].items()}
+                if node.get("required"):
+                    schema["required"] = node["required"]
+            elif name in dict_keys:
+                value = convert(node.get("additionalProperties", {}), name)
+                schema["properties"] = {key: value for key in dict_keys[name]}
+                schema["required"] = list(dict_keys[name])
+            else:
+                raise ValueError(f"Open-ended object '{name}' has no Gemini schema; add its keys to DICT_KEYS")
+        if nullable:
+            schema["nullable"] = True
+        return schema
+
+    return convert(json_schema)
+
+
+@lru_cache(maxsize=None)
+def _adapter(schema: Any) -> TypeAdapter:
+    return TypeAdapter(schema)
+
+
+@lru_cache(maxsize=None)
+def response_schema(schema: Any) -> Dict[str, Any]:
+    """Gemini response schema for a Pydantic model or type such as List[Product]"""
+    return gemini_schema(_adapter(schema).json_schema())
+
+
+def parse_json(text: str, schema: Any) -> Any:
+    """
+    Validate model output against schema; raises LLMResponseError.
+    Text that is not valid JSON (fenced, trailing commas, truncated...) is
+    repaired by the tolerant extractor before validation.
+    """
+    if not text:
+        raise LLMResponseError("Empty response from the model")
+    adapter = _adapter(schema)
+    name = schema.__name__ if isinstance(schema, type) else schema
+    try:
+        return adapter.validate_json(text)
+    except ValidationError as e:
+        if not any(error["type"] == "json_invalid" for error in e.errors()):
+            raise LLMResponseError(f"Response does not match {name}: {e}") from e
+
+    repairs: List[str] = []
+    try:
+        value = extract_json(text, "[" if response_schema(schema)["type"] == "ARRAY" else "{", repairs)
+        print(f"🩹 Repaired model JSON ({', '.join(repairs) or 'extracted'})")
+        return adapter.validate_python(value)
+    except (ValueError, ValidationError) as e:
+        raise LLMResponseError(f"Response does not match {name}: {e}") from e
+
+
+class LLMClient:
+    """Async access to Gemini generative models"""
+
+    def __init__(self, model_name: str = None, max_concurrency: int = None, timeout: float = None):
+        self.model_name = model_name or settings.GEMINI_MODEL
+        self.timeout = timeout or settings.LLM_TIMEOUT_SECONDS
+        self._semaphore = asyncio.Semaphore(max_concurrency or settings.LLM_MAX_CONCURRENCY)
+        self._models: Dict[str, genai.GenerativeModel] = {}
+
+    def get_model(self, model_name: Optional[str] = None) -> genai.GenerativeModel:
+        """Get (and reuse) a model instance by name"""
+        name = model_name or self.model_name
+        if name not in self._models:
+            self._models[name] = genai.GenerativeModel(name)
+        return self._models[name]
+
+    async def generate_content(self, contents: Any, model_name: Optional[str] = None, **kwargs) -> Any:
+        """Generate content without blocking the event loop"""
+        model = self.get_model(model_name)
+        request_options = kwargs.pop("request_options", None) or {"timeout": self.timeout}
+
+        async with self._semaphore:
+            return await model.generate_content_async(contents, request_options=request_options, **kwargs)
+
+    async def generate_text(self, contents: Any, model_name: Optional[str] = None, **kwargs) -> str:
+        """Generate content and return the stripped response text"""
+        response = await self.generate_content(contents, model_name=model_name, **kwargs)
+        return getattr(response, 'text', '').strip()
+
+    async def generate_json(self, contents: Any, schema: Any, model_name: Optional[str] = None, **kwargs) -> Any:
+        """
+        Generate JSON constrained to schema (a Pydantic model or type) and
+        return the validated value. Raises LLMResponseError when the response
+        is empty or does not validate.
+        """
+        generation_config = {
+            **(kwargs.pop("generation_config", None) or {}),
+            "response_mime_type": "application/json",
+            "response_schema": response_schema(schema)
+        }
+        text = await self.generate_text(contents, model_name=model_name, generation_config=generation_config, **kwargs)
+        return parse_json(text, schema)
+
+
+# Global instance
+llm_client = LLMClient()
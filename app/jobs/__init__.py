@@ -0,0 +1,7 @@
+"""
+Jobs Package
+
+Batch maintenance jobs run outside the request path, e.g.:
+    python -m app.jobs.rekey_products_cache
+    python -m app.jobs.classify_products
+"""
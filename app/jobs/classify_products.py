@@ -0,0 +1,90 @@
+"""
+Batch Job: Classify products_cache
+
+Tags every cached product with a rule-based `classification` (category,
+suitable skin types, price tier; see product_classifier) so recommenders can
+filter on indexed fields instead of asking Gemini. Also backfills
+`ingredient_tokens` (see allergen_index) for products with ingredient data. IDF weights and price
+terciles are computed over the whole catalog, so the job classifies all
+products in one pass and writes the results in batches. Running servers
+pick the tags up as their in-process product caches expire
+(PRODUCT_L1_CACHE_TTL_SECONDS).
+
+Usage:
+    python -m app.jobs.classify_products [--batch-size 500] [--dry-run]
+"""
+
+import asyncio
+import argparse
+from collections import Counter
+from typing import Dict, Any, List
+from pymongo import UpdateOne
+
+from ..core.database import Database
+from ..services.product_classifier import FIELD_WEIGHTS, classify_products
+from ..services.allergen_index import ingredient_tokens
+from ..services.product_search_service import product_search_service
+
+
+async def _flush(collection, operations: List[Any], dry_run: bool) -> None:
+    """Write one batch of classification updates"""
+    if operations and not dry_run:
+        await collection.bulk_write(operations, ordered=False)
+    operations.clear()
+
+
+async def classify_products_cache(batch_size: int = 500, dry_run: bool = False) -> Dict[str, Any]:
+    """Classify every products_cache document"""
+    db = Database.get_database()
+    collection = db[product_search_service.products_cache_collection]
+    
+    projection = {field: 1 for field in FIELD_WEIGHTS}
+    projection.update({"extracted_price": 1, "specifications": 1})
+    
+    # Only string _ids are cache keys; ObjectId documents come from the /products CRUD routes
+    products = await collection.find({"_id": {"$type": "string"}}, projection).to_list(length=None)
+    classifications = classify_products(products)
+    
+    stats = {"scanned": len(products), "classified": 0, "uncategorized": 0}
+    categories = Counter()
+    operations = []
+    
+    for product, classification in zip(products, classifications):
+        if classification["category"] is None:
+            stats["uncategorized"] += 1
+        categories[classification["category"]] += 1
+        
+        update = {"classification": classification}
+        tokens = ingredient_tokens(product)
+        if tokens:
+            update["ingredient_tokens"] = tokens
+        operations.append(UpdateOne({"_id": product["_id"]}, {"$set": update}))
+        stats["classified"] += 1
+        
+        if len(operations) >= batch_size:
+            await _flush(collection, operations, dry_run)
+            print(f"🏷️ Classified {stats['classified']} of {stats['scanned']} products")
+    
+    await _flush(collection, operations, dry_run)
+    
+    stats["per_category"] = dict(categories)
+    return stats
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Classify products_cache documents by category, skin type and price tier")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    args = parser.parse_args()
+    
+    Database.connect()
+    try:
+        await product_search_service.ensure_indexes()
+        stats = await classify_products_cache(batch_size=args.batch_size, dry_run=args.dry_run)
+        print(f"✅ Classification complete{' (dry run)' if args.dry_run else ''}: {stats}")
+    finally:
+        Database.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
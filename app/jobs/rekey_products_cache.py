@@ -0,0 +1,86 @@
+"""
+Backfill Job: Rekey products_cache
+
+Moves products_cache documents whose _id is not the canonical product key
+(see product_normalizer) onto their canonical key, in batches. When several
+documents collapse onto the same key, the first one written wins and the
+duplicates are deleted. Running servers keep serving their in-process copies
+of moved products until those expire (PRODUCT_L1_CACHE_TTL_SECONDS).
+
+Usage:
+    python -m app.jobs.rekey_products_cache [--batch-size 500] [--dry-run]
+"""
+
+import asyncio
+import argparse
+from typing import Dict, Any, List
+from pymongo import UpdateOne, DeleteOne
+
+from ..core.database import Database
+from ..services.product_normalizer import canonical_product_key
+from ..services.product_search_service import product_search_service
+
+
+async def _flush(collection, operations: List[Any], dry_run: bool) -> None:
+    """Write one batch of rekey operations"""
+    if operations and not dry_run:
+        await collection.bulk_write(operations, ordered=True)
+    operations.clear()
+
+
+async def rekey_products_cache(batch_size: int = 500, dry_run: bool = False) -> Dict[str, Any]:
+    """Rekey every non-canonical products_cache document"""
+    db = Database.get_database()
+    collection = db[product_search_service.products_cache_collection]
+    
+    stats = {"scanned": 0, "rekeyed": 0, "already_canonical": 0, "skipped": 0}
+    operations = []
+    
+    # Only string _ids are cache keys; ObjectId documents come from the /products CRUD routes
+    async for document in collection.find({"_id": {"$type": "string"}}).batch_size(batch_size):
+        stats["scanned"] += 1
+        old_key = document["_id"]
+        name = document.get("query") or old_key
+        new_key = canonical_product_key(name)
+        
+        if not new_key:
+            stats["skipped"] += 1
+            continue
+        
+        if new_key == old_key:
+            stats["already_canonical"] += 1
+            continue
+        
+        rekeyed = {k: v for k, v in document.items() if k != "_id"}
+        rekeyed["key"] = new_key
+        
+        # Insert under the new key unless it already exists, then drop the old document
+        operations.append(UpdateOne({"_id": new_key}, {"$setOnInsert": rekeyed}, upsert=True))
+        operations.append(DeleteOne({"_id": old_key}))
+        stats["rekeyed"] += 1
+        
+        if len(operations) >= batch_size * 2:
+            await _flush(collection, operations, dry_run)
+            print(f"🔑 Rekeyed {stats['rekeyed']} of {stats['scanned']} scanned documents")
+    
+    await _flush(collection, operations, dry_run)
+    
+    return stats
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description="Rekey products_cache documents to canonical product keys")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true", help="Report what would change without writing")
+    args = parser.parse_args()
+    
+    Database.connect()
+    try:
+        stats = await rekey_products_cache(batch_size=args.batch_size, dry_run=args.dry_run)
+        print(f"✅ Rekey complete{' (dry run)' if args.dry_run else ''}: {stats}")
+    finally:
+        Database.disconnect()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -1,13 +1,29 @@
 from contextlib import asynccontextmanager
 from fastapi import FastAPI
-from .core import Database, settings
+from .core import Database, HTTPClient, settings
 from .routers.products import router as products_router
 from .routers.skincare import router as skincare_router
+from .services.product_search_service import product_search_service
+from .services.catalog_index import catalog_indexes
+from .services.recommendation_cache import recommendation_cache
+from .services.catalog_recommender import catalog_recommender
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     Database.connect()
+    HTTPClient.connect()
+    await product_search_service.ensure_indexes()
+    await recommendation_cache.ensure_indexes()
+    product_search_service.details_queue.start()
+    catalog_indexes.start()
+    recommendation_cache.start()
+    catalog_recommender.start()
     yield
+    await catalog_recommender.stop()
+    await recommendation_cache.stop()
+    await catalog_indexes.stop()
+    await product_search_service.details_queue.stop()
+    await HTTPClient.disconnect()
     Database.disconnect()
 
 
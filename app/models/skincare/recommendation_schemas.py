@@ -1,4 +1,5 @@
 from typing import List, Dict, Optional, Union, Any
+from datetime import datetime
 from pydantic import BaseModel
 
 
@@ -47,6 +48,20 @@ class EnrichedProduct(BaseModel):
     variants: Optional[List[Dict[str, Any]]] = None
     seller_info: Optional[List[Dict[str, Any]]] = None
     
+    # Deferred detail fetch state (pending / fetched / unavailable)
+    product_api_url: Optional[str] = None
+    details_status: Optional[str] = None
+    details_fetched_at: Optional[datetime] = None
+    
+    # Where a harvested catalog entry came from (search query, position, time)
+    provenance: Optional[Dict[str, Any]] = None
+    
+    # Price band used to pick this result and whether the price falls inside it
+    selection: Optional[Dict[str, Any]] = None
+    
+    # Cache freshness report (per-field age and fresh/stale/expired status)
+    freshness: Optional[Dict[str, Any]] = None
+    
     # For compatibility with AI recommendations
     @property
     def name(self) -> str:
@@ -74,6 +89,7 @@ class ProductSearchResult(BaseModel):
     search_successful: bool
     enriched_at: Optional[str] = None
     error: Optional[str] = None
+    allergen_check: Optional[str] = None  # "passed" | "ingredients_unknown" when allergies were given
 
 
 class BudgetAllocation(BaseModel):
@@ -115,6 +131,13 @@ class EnrichedFutureRecommendation(BaseModel):
     products: List[ProductSearchResult]
 
 
+class FusedRecommendationResponse(BaseModel):
+    """Single-call Phase 3 model output (categories spelled out for the response schema)"""
+    allocation: BudgetAllocation
+    products: ProductRecommendations
+    future_recommendations: List[FutureRecommendation]
+
+
 class ProductRecommendationResponse(BaseModel):
     """Standard API response format"""
     allocation: Dict[str, int]
@@ -1,11 +1,21 @@
 from typing import List
-from fastapi import APIRouter, HTTPException, status
+from fastapi import APIRouter, HTTPException, Query, status
 from ..models.product_schemas import ProductCreate, ProductResponse
 from ..services import ProductService
+from ..services.product_cache import product_l1_cache
+from ..services.catalog_index import catalog_indexes
+from ..services.product_normalizer import canonical_product_key
 
 router = APIRouter(prefix="/products", tags=["Products"])
 
 
+def _unindex_product(key: str) -> None:
+    """Drop a CRUD product from this worker's catalog indexes"""
+    index_key = catalog_indexes.product_key({"key": key})
+    if index_key is not None:
+        catalog_indexes.remove_product(index_key)
+
+
 @router.get("/", response_model=List[ProductResponse])
 async def get_all_products():
     """Retrieve all products"""
@@ -18,6 +28,19 @@ async def get_all_products():
             detail=f"Failed to retrieve products: {str(e)}"
         )
 
+@router.get("/suggest")
+async def suggest_products(
+    q: str = Query(..., min_length=2, description="Typed product name prefix"),
+    limit: int = Query(10, ge=1, le=50)
+):
+    """Typeahead suggestions from the in-memory catalog index (no database or SerpAPI calls)"""
+    return {
+        "query": q,
+        "ready": catalog_indexes.ready,
+        "suggestions": catalog_indexes.suggest.suggest(q, limit)
+    }
+
+
 @router.get("/{key}", response_model=ProductResponse)
 async def get_product_by_key(key: str):
     """Retrieve a product by its key"""
@@ -51,6 +74,8 @@ async def create_product(product: ProductCreate):
             )
         
         new_product = await ProductService.create_product(product)
+        product_l1_cache.invalidate(canonical_product_key(product.key))
+        catalog_indexes.add_product(product.model_dump())
         return new_product
     except HTTPException:
         raise
@@ -66,11 +91,16 @@ async def update_product(key: str, product: ProductCreate):
     """Update an existing product"""
     try:
         updated_product = await ProductService.update_product(key, product)
+        for changed_key in {key, product.key}:
+            product_l1_cache.invalidate(canonical_product_key(changed_key))
         if not updated_product:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Product with key '{key}' not found"
             )
+        if product.key != key:
+            _unindex_product(key)
+        catalog_indexes.add_product(product.model_dump())
         return updated_product
     except HTTPException:
         raise
@@ -86,11 +116,13 @@ async def delete_product(key: str):
     """Delete a product by its key"""
     try:
         deleted = await ProductService.delete_product(key)
+        product_l1_cache.invalidate(canonical_product_key(key))
         if not deleted:
             raise HTTPException(
                 status_code=status.HTTP_404_NOT_FOUND,
                 detail=f"Product with key '{key}' not found"
             )
+        _unindex_product(key)
     except HTTPException:
         raise
     except Exception as e:
@@ -7,7 +7,7 @@ Each phase stores results in JSON for the next phase.
 """
 
 from fastapi import APIRouter, HTTPException, UploadFile, File, status
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Literal
 from datetime import datetime
 import json
 
@@ -19,6 +19,10 @@ from ..services.image_analysis_service import phase2_service
 from ..services.product_recommendation_service import phase3_service
 from ..services.routine_creation_service import phase4_service
 from ..services.product_search_service import product_search_service
+from ..services.product_cache import product_l1_cache
+from ..services.catalog_index import catalog_indexes
+from ..services.recommendation_cache import recommendation_cache
+from ..services.catalog_recommender import catalog_recommender
 from ..core.database import Database
 from ..connection_logic import data_store
 
@@ -146,13 +150,26 @@ async def phase2_image_analysis(session_id: str, file: UploadFile = File(...)) -
              response_model=ProductRecommendationResponse,
              summary="Phase 3: Generate Product Recommendations",
              description="Generate personalized product recommendations based on form data and image analysis.")
-async def phase3_product_recommendations(session_id: str) -> ProductRecommendationResponse:
+async def phase3_product_recommendations(
+    session_id: str,
+    allocation_mode: Optional[Literal["rules", "llm"]] = None,
+    reuse_mode: Optional[Literal["exact", "similar"]] = None,
+    engine: Optional[Literal["llm", "catalog"]] = None,
+    prompt_mode: Optional[Literal["fanout", "fused"]] = None
+) -> ProductRecommendationResponse:
     """
     **Phase 3: Product Recommendation Engine**
     
     Output endpoint that generates personalized product recommendations by:
     - Combining form data (Phase 1) and image analysis (Phase 2)
-    - Allocating budget across product categories
+    - Allocating budget across product categories (`allocation_mode`: "rules" or "llm";
+      defaults to BUDGET_ALLOCATION_MODE)
+    - Reusing cached recommendations for the same profile, or with `reuse_mode=similar`
+      the nearest earlier profile (defaults to RECOMMENDATION_REUSE_MODE)
+    - Picking products with Gemini or, with `engine=catalog`, from the local
+      catalog with Gemini only for gaps (defaults to RECOMMENDATION_ENGINE)
+    - Sending one Gemini call per category, or with `prompt_mode=fused` a single
+      call for allocation, products and future picks (defaults to PHASE3_PROMPT_MODE)
     - Finding specific products within budget
     - Providing future recommendations
     
@@ -182,7 +199,10 @@ async def phase3_product_recommendations(session_id: str) -> ProductRecommendati
         }
         
         # Use enhanced phase3 logic with product search integration
-        phase3_result = await phase3_service.budget_distribution(phase3_input, session_id)
+        phase3_result = await phase3_service.budget_distribution(
+            phase3_input, session_id, allocation_mode=allocation_mode, reuse_mode=reuse_mode, engine=engine,
+            prompt_mode=prompt_mode
+        )
         
         # Extract the API response and enriched data
         api_response = phase3_result["api_response"]
@@ -250,7 +270,7 @@ async def phase4_routine_creation(session_id: str) -> SkincareRoutineResponse:
         }
         
         # Use original phase4 logic (preserved)
-        routine_result = phase4_service.create_routine(phase4_input)
+        routine_result = await phase4_service.create_routine(phase4_input)
         
         # Save final routine
         success = await data_store.save_phase_data(session_id, "phase4", routine_result)
@@ -405,6 +425,10 @@ async def get_product_cache_stats() -> Dict[str, Any]:
     
     Returns statistics about:
     - Total products in cache
+    - In-process (L1) cache hit/miss counters
+    - SerpAPI fetch coalescing counters
+    - Background detail-fetch queue
+    - Negative cache entries and hits
     - Total user recommendations
     - Recent activity
     """
@@ -415,6 +439,9 @@ async def get_product_cache_stats() -> Dict[str, Any]:
         products_cache = db["products_cache"]
         cache_count = await products_cache.count_documents({})
         
+        # Count products SerpAPI could not find (negative cache)
+        negative_cache_count = await db["products_negative_cache"].count_documents({})
+        
         # Count user recommendations
         user_products = db["user_recommended_products"]
         user_recommendations_count = await user_products.count_documents({})
@@ -436,6 +463,16 @@ async def get_product_cache_stats() -> Dict[str, Any]:
                 "total_products": cache_count,
                 "recent_additions": recent_cache_additions
             },
+            "l1_cache": product_l1_cache.stats(),
+            "catalog_index": catalog_indexes.stats(),
+            "serpapi_fetches": product_search_service.fetch_flight.stats(),
+            "details_queue": product_search_service.details_queue.stats(),
+            "negative_cache": {
+                "total_entries": negative_cache_count,
+                **product_search_service.negative_cache_stats
+            },
+            "recommendation_cache": await recommendation_cache.stats(),
+            "catalog_recommender": catalog_recommender.stats(),
             "user_recommendations": {
                 "total_recommendations": user_recommendations_count,
                 "recent_recommendations": recent_user_recommendations
@@ -457,7 +494,10 @@ async def get_product_cache_stats() -> Dict[str, Any]:
             description="Search for a specific product and get enriched details from cache or SerpAPI.")
 async def search_product_details(
     query: str,
-    session_id: Optional[str] = None
+    session_id: Optional[str] = None,
+    include_details: bool = True,
+    min_price: Optional[float] = None,
+    max_price: Optional[float] = None
 ) -> Dict[str, Any]:
     """
     **Product Management: Search Product Details**
@@ -469,6 +509,9 @@ async def search_product_details(
     - Store information and availability
     
     If session_id is provided, the search will be saved to user recommendations.
+    Detail data (description, ingredients, media) is fetched on first request
+    unless include_details is false. min_price/max_price (PHP) make a SerpAPI
+    fetch pick the best result within that price band.
     """
     try:
         product_data = await product_search_service.get_or_fetch_product(
@@ -477,7 +520,8 @@ async def search_product_details(
             recommendation_context={
                 "search_type": "manual_search",
                 "ai_recommended": False
-            } if session_id else None
+            } if session_id else None,
+            price_band=(min_price, max_price) if min_price is not None or max_price is not None else None
         )
         
         if not product_data:
@@ -486,6 +530,9 @@ async def search_product_details(
                 detail=f"Product '{query}' not found"
             )
         
+        if include_details:
+            product_data = await product_search_service.fetch_product_details(product_data)
+        
         return {
             "search_query": query,
             "product_found": True,
@@ -501,3 +548,52 @@ async def search_product_details(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to search product: {str(e)}"
         )
+
+
+@router.get("/products/details",
+            response_model=Dict[str, Any],
+            status_code=status.HTTP_200_OK,
+            summary="Get Product Detail Data",
+            description="Get detail data (description, ingredients, media, variants, sellers) for a cached product, fetching it on first request.")
+async def get_product_detail_data(
+    query: str,
+    background: bool = False
+) -> Dict[str, Any]:
+    """
+    **Product Management: Product Detail Data**
+    
+    Products are cached with shopping-level data only; the SerpAPI detail call
+    is deferred until a client asks for it:
+    - background=false: fetch details now (if missing or expired) and return them
+    - background=true: queue the detail fetch and return the current cached data
+    """
+    try:
+        product_data = await product_search_service.search_product_in_cache(query)
+        
+        if not product_data:
+            raise HTTPException(
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Product '{query}' not found in cache. Search for it first."
+            )
+        
+        queued = False
+        if background:
+            queued = product_search_service.enqueue_product_details(product_data["query"])
+        else:
+            product_data = await product_search_service.fetch_product_details(product_data)
+        
+        return {
+            "query": query,
+            "details_status": product_data.get("details_status"),
+            "details_queued": queued,
+            "product_details": product_data,
+            "retrieved_at": datetime.utcnow().isoformat()
+        }
+        
+    except HTTPException:
+        raise
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to get product details: {str(e)}"
+        )
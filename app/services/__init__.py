@@ -3,11 +3,13 @@ from .form_processing_service import phase1_service
 from .image_analysis_service import phase2_service
 from .product_recommendation_service import phase3_service
 from .routine_creation_service import phase4_service
+from .product_enrichment_service import product_enrichment_service
 
 __all__ = [
     'ProductService',
     'form_processing_service',
     'image_analysis_service', 
     'product_recommendation_service',
-    'routine_creation_service'
+    'routine_creation_service',
+    'product_enrichment_service'
 ]
\ No newline at end of file
@@ -0,0 +1,243 @@
+"""
+Allergen Index
+
+Ingredient lists from the products cache (`ingredients`, and ingredient
+entries in `specifications`) are parsed into normalized ingredient tokens.
+The tokens are stored on each cache document (`ingredient_tokens`, multikey
+indexed) and held in memory as an inverted index token -> product rows.
+
+User allergies are normalized onto allergen groups (ALLERGEN_ALIASES) when
+they name a group, or kept as plain ingredient terms. Aliases and terms
+match whole words of an ingredient ("ethanol" does not match
+phenoxyethanol); a leading or trailing "*" marks an alias that matches
+word endings or beginnings (methylparaben, soybean). Each group keeps a
+bitset over product rows, updated as products are indexed; a request's
+plain terms are resolved into bitsets through a word index. Checking a
+product against a user's allergies is then one bit test per allergy.
+Products without a known ingredient list never conflict.
+"""
+
+import re
+from typing import Any, Dict, Iterable, List, Set, Tuple
+
+from .product_normalizer import fold_unicode
+
+# Allergen group -> ingredient names (whole words; "*" matches the rest of a word)
+ALLERGEN_ALIASES = {
+    "fragrance": ("fragrance", "parfum", "perfume", "aroma"),
+    "paraben": ("*paraben",),
+    "alcohol": ("alcohol denat", "denatured alcohol", "ethanol", "sd alcohol"),
+    "sulfate": ("sulfate", "sulphate"),
+    "silicone": ("*methicone", "*siloxane", "silicone"),
+    "essential_oil": ("essential oil", "lavender", "tea tree", "citrus", "limonene", "linalool", "eucalyptus", "peppermint"),
+    "salicylic_acid": ("salicylic",),
+    "benzoyl_peroxide": ("benzoyl peroxide",),
+    "retinoid": ("retinol", "retinal", "retinyl", "adapalene", "tretinoin"),
+    "niacinamide": ("niacinamide",),
+    "lanolin": ("lanolin",),
+    "nut": ("almond", "shea", "macadamia", "argan", "hazelnut", "nut oil"),
+    "soy": ("soy*", "glycine soja"),
+}
+
+
+def _alias_pattern(aliases: Iterable[str]) -> "re.Pattern":
+    parts = []
+    for alias in aliases:
+        part = re.escape(alias.strip("*"))
+        part = (r"\w*" if alias.startswith("*") else "") + part + (r"\w*" if alias.endswith("*") else "")
+        parts.append(part)
+    return re.compile(r"\b(?:" + "|".join(parts) + r")\b")
+
+
+# Allergen group -> compiled whole-word pattern over folded text
+ALLERGEN_PATTERNS = {group: _alias_pattern(aliases) for group, aliases in ALLERGEN_ALIASES.items()}
+
+# How users write allergies -> allergen group
+USER_ALLERGY_ALIASES = {
+    "fragrances": "fragrance", "scent": "fragrance", "scents": "fragrance", "perfume": "fragrance",
+    "parabens": "paraben",
+    "sls": "sulfate", "sulfates": "sulfate", "sulphates": "sulfate",
+    "silicones": "silicone",
+    "essential oils": "essential_oil", "essential oil": "essential_oil",
+    "bha": "salicylic_acid", "salicylic acid": "salicylic_acid",
+    "benzoyl peroxide": "benzoyl_peroxide",
+    "retinol": "retinoid", "retinoids": "retinoid", "vitamin a": "retinoid", "tretinoin": "retinoid",
+    "nuts": "nut", "tree nut": "nut", "tree nuts": "nut", "peanut": "nut", "peanuts": "nut",
+    "soya": "soy",
+}
+
+# Separators outside parentheses
+_SPLIT_RE = re.compile(r"[,;\n•·|]+(?![^(]*\))")
+_PARENTHETICAL_RE = re.compile(r"\(([^)]*)\)")
+_PREFIX_RE = re.compile(r"^(?:full |key |active |other )?ingredients?\s*:?\s*")
+_NON_WORD_RE = re.compile(r"[^\w\s-]+")
+_WHITESPACE_RE = re.compile(r"\s+")
+MAX_TOKEN_LENGTH = 60
+
+
+def _ingredient_text(product: Dict[str, Any]) -> str:
+    parts = []
+    ingredients = product.get("ingredients")
+    if isinstance(ingredients, list):
+        parts.extend(str(item) for item in ingredients)
+    elif ingredients:
+        parts.append(str(ingredients))
+    
+    specifications = product.get("specifications")
+    if isinstance(specifications, dict):
+        parts.extend(str(value) for name, value in specifications.items() if "ingredient" in str(name).lower())
+    elif isinstance(specifications, list):
+        for entry in specifications:
+            if isinstance(entry, dict) and "ingredient" in str(entry.get("name", "")).lower():
+                parts.append(str(entry.get("value", "")))
+    
+    return "\n".join(parts)
+
+
+def ingredient_tokens(product: Dict[str, Any]) -> List[str]:
+    """Normalized, de-duplicated ingredient names of a product"""
+    text = fold_unicode(_ingredient_text(product))
+    if not text:
+        return []
+    
+    tokens = set()
+    for part in _SPLIT_RE.split(text):
+        # "Butyrospermum Parkii (Shea) Butter" yields "butyrospermum parkii butter" and "shea"
+        names = [_PARENTHETICAL_RE.sub(" ", part)] + _PARENTHETICAL_RE.findall(part)
+        for name in names:
+            token = _PREFIX_RE.sub("", _WHITESPACE_RE.sub(" ", _NON_WORD_RE.sub(" ", name)).strip())
+            if token and len(token) <= MAX_TOKEN_LENGTH:
+                tokens.add(token)
+    return sorted(tokens)
+
+
+def normalize_allergies(allergies: Iterable[str]) -> Tuple[List[str], List[str]]:
+    """User allergies as (allergen groups, plain ingredient terms)"""
+    groups, terms = [], []
+    for allergy in allergies:
+        text = _WHITESPACE_RE.sub(" ", _NON_WORD_RE.sub(" ", fold_unicode(allergy or ""))).strip()
+        if not text or text in ("none", "n a", "no", "no allergies"):
+            continue
+        
+        # Only a group's own name expands to the group ("coconut oil" is not the nut group)
+        group = USER_ALLERGY_ALIASES.get(text)
+        if group is None and text.replace(" ", "_") in ALLERGEN_ALIASES:
+            group = text.replace(" ", "_")
+        
+        if group is not None:
+            groups.append(group)
+        else:
+            terms.append(text)
+    return list(dict.fromkeys(groups)), list(dict.fromkeys(terms))
+
+
+def _matches_term(token: str, term: str) -> bool:
+    return token == term or f" {term} " in f" {token} "
+
+
+def _token_groups(token: str) -> List[str]:
+    return [group for group, pattern in ALLERGEN_PATTERNS.items() if pattern.search(token)]
+
+
+def token_conflicts(tokens: Iterable[str], allergies: Iterable[str]) -> List[str]:
+    """The allergies found in an ingredient token list (for products outside the index)"""
+    groups, terms = normalize_allergies(allergies)
+    tokens = list(tokens)
+    found = {group for token in tokens for group in _token_groups(token)}
+    return [group for group in groups if group in found] + [
+        term for term in terms if any(_matches_term(token, term) for token in tokens)
+    ]
+
+
+class AllergenIndex:
+    """In-memory inverted index of ingredient tokens with per-allergen bitsets"""
+    
+    def __init__(self):
+        self._rows: Dict[str, int] = {}
+        self._row_tokens: List[frozenset] = []
+        self._postings: Dict[str, Set[int]] = {}
+        # word -> ingredient tokens containing it, to resolve plain terms
+        self._words: Dict[str, Set[str]] = {}
+        self._token_groups: Dict[str, List[str]] = {}
+        self._group_bits: Dict[str, bytearray] = {group: bytearray() for group in ALLERGEN_ALIASES}
+    
+    def __len__(self) -> int:
+        return sum(1 for tokens in self._row_tokens if tokens)
+    
+    def add(self, key: str, tokens: Iterable[str]) -> None:
+        """Index (or re-index) a product's ingredient tokens"""
+        tokens = frozenset(tokens)
+        row = self._rows.get(key)
+        if row is None:
+            if not tokens:
+                return
+            row = len(self._row_tokens)
+            self._rows[key] = row
+            self._row_tokens.append(frozenset())
+        
+        previous = self._row_tokens[row]
+        if previous == tokens:
+            return
+        
+        for token in previous - tokens:
+            posting = self._postings.get(token)
+            if posting is not None:
+                posting.discard(row)
+                if not posting:
+                    del self._postings[token]
+                    del self._token_groups[token]
+                    for word in set(token.split()):
+                        self._words[word].discard(token)
+                        if not self._words[word]:
+                            del self._words[word]
+        for token in tokens - previous:
+            if token not in self._postings:
+                self._token_groups[token] = _token_groups(token)
+                for word in token.split():
+                    self._words.setdefault(word, set()).add(token)
+            self._postings.setdefault(token, set()).add(row)
+        self._row_tokens[row] = tokens
+        
+        # Keep the group bitsets in step for this row
+        groups = {group for token in tokens for group in self._token_groups[token]}
+        byte, bit = row >> 3, 1 << (row & 7)
+        for group, bitmap in self._group_bits.items():
+            if len(bitmap) <= byte:
+                bitmap.extend(bytes(byte + 1 - len(bitmap)))
+            if group in groups:
+                bitmap[byte] |= bit
+            else:
+                bitmap[byte] &= ~bit & 0xFF
+    
+    def _term_bitset(self, term: str) -> bytearray:
+        """Rows with an ingredient containing the term's words, in order"""
+        bitmap = bytearray((len(self._row_tokens) + 7) // 8)
+        words = term.split()
+        if not words:
+            return bitmap
+        
+        candidates = min((self._words.get(word, set()) for word in words), key=len)
+        for token in candidates:
+            if _matches_term(token, term):
+                for row in self._postings[token]:
+                    bitmap[row >> 3] |= 1 << (row & 7)
+        return bitmap
+    
+    def allergy_bitsets(self, allergies: Iterable[str]) -> List[Tuple[str, bytearray]]:
+        """(allergy, bitset) pairs for a user's allergies; resolve once per request"""
+        groups, terms = normalize_allergies(allergies)
+        return [(group, self._group_bits[group]) for group in groups] + [
+            (term, self._term_bitset(term)) for term in terms
+        ]
+    
+    def conflicts(self, key: str, bitsets: List[Tuple[str, bytearray]]) -> List[str]:
+        """The allergies (from allergy_bitsets) found in a product's ingredients"""
+        row = self._rows.get(key)
+        if row is None:
+            return []
+        byte, bit = row >> 3, 1 << (row & 7)
+        return [allergy for allergy, bitmap in bitsets if byte < len(bitmap) and bitmap[byte] & bit]
+    
+    def has_ingredients(self, key: str) -> bool:
+        row = self._rows.get(key)
+        return row is not None and bool(self._row_tokens[row])
@@ -0,0 +1,80 @@
+"""
+Background Work Queue
+
+Small asyncio queue with a fixed pool of worker tasks, started and stopped with
+the app lifespan. Jobs are keyed so the same job is not queued twice while it
+is still pending.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Optional, Set
+
+
+class BackgroundQueue:
+    """Bounded, de-duplicating asyncio work queue"""
+    
+    def __init__(self, handler: Callable[[Any], Awaitable[Any]], workers: int = 2, maxsize: int = 1000, name: str = "background"):
+        self.handler = handler
+        self.workers = workers
+        self.maxsize = maxsize
+        self.name = name
+        self._queue: Optional[asyncio.Queue] = None
+        self._pending: Set[str] = set()
+        self._tasks = []
+        self.processed = 0
+        self.failed = 0
+        self.dropped = 0
+    
+    def start(self) -> None:
+        """Start the worker tasks (requires a running event loop)"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue(maxsize=self.maxsize)
+        self._tasks = [asyncio.ensure_future(self._worker()) for _ in range(self.workers)]
+    
+    async def stop(self) -> None:
+        """Cancel the workers; queued jobs that have not started are dropped"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._pending.clear()
+    
+    def enqueue(self, key: str, job: Any) -> bool:
+        """Queue a job unless the same key is already pending; False if it was not queued"""
+        if self._queue is None:
+            self.start()
+        if key in self._pending:
+            return True
+        
+        try:
+            self._queue.put_nowait((key, job))
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return False
+        
+        self._pending.add(key)
+        return True
+    
+    async def _worker(self) -> None:
+        while True:
+            key, job = await self._queue.get()
+            try:
+                await self.handler(job)
+                self.processed += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"❌ {self.name} job '{key}' failed: {e}")
+            finally:
+                self._pending.discard(key)
+                self._queue.task_done()
+    
+    def stats(self) -> dict:
+        """Queue depth and job counters"""
+        return {
+            "queued": self._queue.qsize() if self._queue else 0,
+            "workers": len(self._tasks),
+            "processed": self.processed,
+            "failed": self.failed,
+            "dropped": self.dropped
+        }
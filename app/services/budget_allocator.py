@@ -0,0 +1,90 @@
+"""
+Rule-Based Budget Allocator
+
+Deterministic split of a skincare budget across the allowed categories. Each
+category starts from a base weight that is scaled by the user's skin types and
+by keywords found in their conditions and goals; the weights are then turned
+into whole percentages summing to 100 (largest-remainder rounding).
+"""
+
+import math
+from typing import Dict, Iterable, List
+
+# Relative importance of each category for an average profile
+BASE_WEIGHTS = {
+    "facial_wash": 20,
+    "moisturizer": 25,
+    "sunscreen": 25,
+    "treatment": 15,
+    "toner": 8,
+    "serum": 15,
+    "eye_cream": 6,
+    "exfoliant": 6,
+    "mask": 5,
+    "essence": 6,
+    "ampoule": 5,
+}
+
+# Skin type -> category multipliers
+SKIN_TYPE_WEIGHTS = {
+    "oily": {"facial_wash": 1.1, "moisturizer": 0.85, "toner": 1.2, "exfoliant": 1.3},
+    "dry": {"facial_wash": 0.9, "moisturizer": 1.3, "essence": 1.2, "exfoliant": 0.7},
+    "combination": {"toner": 1.1, "serum": 1.1},
+    "normal": {},
+    "sensitive": {"moisturizer": 1.1, "sunscreen": 1.1, "treatment": 0.8, "exfoliant": 0.5},
+    "acne-prone": {"facial_wash": 1.1, "treatment": 1.4, "exfoliant": 1.2},
+}
+
+# Keywords in conditions/goals -> category multipliers
+CONCERN_WEIGHTS = [
+    (("acne", "breakout", "pimple"), {"treatment": 1.4, "serum": 1.1}),
+    (("dark spot", "hyperpigment", "melasma", "uneven", "dull", "bright"), {"serum": 1.4, "sunscreen": 1.2, "treatment": 1.1, "essence": 1.1}),
+    (("wrinkle", "fine line", "aging", "firm"), {"serum": 1.3, "eye_cream": 1.5, "sunscreen": 1.1}),
+    (("dry", "dehydrat", "hydrat", "flak"), {"moisturizer": 1.2, "essence": 1.2, "ampoule": 1.1}),
+    (("pore", "blackhead", "whitehead", "oil"), {"exfoliant": 1.4, "toner": 1.2}),
+    (("redness", "rosacea", "irritat", "sensitiv"), {"moisturizer": 1.2, "treatment": 0.9, "exfoliant": 0.6}),
+    (("dark circle", "puff", "eye bag"), {"eye_cream": 1.6}),
+    (("texture", "rough"), {"exfoliant": 1.3}),
+]
+
+
+def category_weights(categories: List[str], skin_types: Iterable[str], concerns: Iterable[str]) -> Dict[str, float]:
+    """Profile-adjusted weight for each category"""
+    weights = {category: float(BASE_WEIGHTS.get(category, 5)) for category in categories}
+    
+    for skin_type in skin_types:
+        for category, multiplier in SKIN_TYPE_WEIGHTS.get(skin_type, {}).items():
+            if category in weights:
+                weights[category] *= multiplier
+    
+    concern_text = " ".join(concern.lower() for concern in concerns if concern)
+    for keywords, multipliers in CONCERN_WEIGHTS:
+        if any(keyword in concern_text for keyword in keywords):
+            for category, multiplier in multipliers.items():
+                if category in weights:
+                    weights[category] *= multiplier
+    
+    return weights
+
+
+def to_percentages(weights: Dict[str, float]) -> Dict[str, int]:
+    """Whole percentages proportional to the weights that sum to exactly 100"""
+    total = sum(weights.values())
+    if not weights or total <= 0:
+        return {}
+    
+    exact = {category: weight * 100 / total for category, weight in weights.items()}
+    percentages = {category: math.floor(share) for category, share in exact.items()}
+    
+    # Hand the remaining points to the largest fractional parts
+    remainder = 100 - sum(percentages.values())
+    by_fraction = sorted(exact, key=lambda category: exact[category] - percentages[category], reverse=True)
+    for category in by_fraction[:remainder]:
+        percentages[category] += 1
+    
+    return percentages
+
+
+def allocate_budget(categories: List[str], skin_types: Iterable[str], concerns: Iterable[str]) -> Dict[str, int]:
+    """Percentage of the budget per category, in the order the categories were given"""
+    return to_percentages(category_weights(categories, skin_types, concerns))
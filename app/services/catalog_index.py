@@ -0,0 +1,189 @@
+"""
+Catalog Indexes
+
+In-memory indexes over the products cache (fuzzy name matching, typeahead
+suggestions and ingredient allergens), owned by each worker process.
+They are loaded with one scan at startup, updated directly when this worker
+saves or harvests products or writes them through the /products routes, and
+kept in step with other workers by a periodic delta sync on `cached_at` and
+`details_fetched_at`.
+"""
+
+import asyncio
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from ..core.config import settings
+from ..core.database import Database
+from .fuzzy_index import TrigramIndex
+from .suggest_index import PrefixIndex
+from .allergen_index import AllergenIndex, ingredient_tokens
+from .product_normalizer import canonical_product_key
+
+
+class CatalogIndexes:
+    """Per-process catalog indexes and their sync loop"""
+    
+    PROJECTION = {
+        "_id": 1, "key": 1, "query": 1, "title": 1, "reviews": 1, "cached_at": 1,
+        "details_fetched_at": 1, "ingredient_tokens": 1, "ingredients": 1, "specifications": 1
+    }
+    
+    def __init__(self, collection_name: str = "products_cache", recommendations_collection_name: str = "user_recommended_products"):
+        self.collection_name = collection_name
+        self.recommendations_collection_name = recommendations_collection_name
+        self.fuzzy = TrigramIndex()
+        self.suggest = PrefixIndex()
+        self.allergens = AllergenIndex()
+        self.ready = False
+        self.last_synced_at: Optional[datetime] = None
+        self._watermark: Optional[datetime] = None
+        self._sync_task: Optional[asyncio.Task] = None
+        self.fuzzy_lookups = {"hits": 0, "misses": 0}
+    
+    @staticmethod
+    def product_key(product: Dict[str, Any]) -> Optional[str]:
+        """Index key of a product: its normalized _id, else a CRUD document's canonical key field"""
+        key = product.get("_id")
+        if isinstance(key, str):
+            return key or None
+        # Documents created through the /products routes have ObjectId _ids and are
+        # looked up by their key field, which only matches when it is already canonical
+        key = product.get("key")
+        if isinstance(key, str) and key and canonical_product_key(key) == key:
+            return key
+        return None
+    
+    def add_product(self, product: Dict[str, Any]) -> None:
+        """Index a cached product under its key and its normalized title"""
+        key = self.product_key(product)
+        if key is None:
+            return
+        
+        texts = [key, canonical_product_key(product.get("title") or "")]
+        self.fuzzy.add(key, texts)
+        self.suggest.add(key, product.get("title") or key, self._reviews(product))
+        self.add_ingredients(key, product)
+    
+    def add_ingredients(self, key: str, product: Dict[str, Any]) -> None:
+        """Index a product's ingredient tokens (stored ones, else parsed from its detail fields)"""
+        tokens = product.get("ingredient_tokens")
+        if tokens is None:
+            tokens = ingredient_tokens(product)
+        self.allergens.add(key, tokens)
+    
+    @staticmethod
+    def _reviews(product: Dict[str, Any]) -> int:
+        reviews = product.get("reviews")
+        return reviews if isinstance(reviews, int) else 0
+    
+    def remove_product(self, key: str) -> None:
+        """Drop a product that no longer exists under this key"""
+        self.fuzzy.remove(key)
+        self.suggest.remove(key)
+        self.allergens.add(key, [])
+    
+    def record_recommendation(self, query: str) -> None:
+        """Count a recommendation towards the product's suggestion ranking"""
+        self.suggest.record_recommendation(canonical_product_key(query))
+    
+    def match(self, query_key: str) -> Optional[str]:
+        """Cache key of the most similar indexed product, or None"""
+        if not self.ready:
+            return None
+        
+        match = self.fuzzy.search(query_key, settings.PRODUCT_FUZZY_MATCH_THRESHOLD)
+        if match is None:
+            self.fuzzy_lookups["misses"] += 1
+            return None
+        
+        self.fuzzy_lookups["hits"] += 1
+        return match[0]
+    
+    async def sync(self) -> int:
+        """Load products cached since the last sync (everything on the first run)"""
+        collection = Database.get_database()[self.collection_name]
+        
+        # CRUD documents have no cached_at: they are loaded by the first scan and kept
+        # current by the /products routes of the worker that writes them
+        query: Dict[str, Any] = {}
+        if self._watermark is not None:
+            query["$or"] = [
+                {"cached_at": {"$gte": self._watermark}},
+                {"details_fetched_at": {"$gte": self._watermark}}
+            ]
+        
+        loaded = 0
+        watermark = self._watermark
+        suggestions = []
+        async for product in collection.find(query, self.PROJECTION):
+            key = self.product_key(product)
+            if key is None:
+                continue
+            self.fuzzy.add(key, [key, canonical_product_key(product.get("title") or "")])
+            suggestions.append((key, product.get("title") or key, self._reviews(product)))
+            self.add_ingredients(key, product)
+            loaded += 1
+            for field in ("cached_at", "details_fetched_at"):
+                changed_at = product.get(field)
+                if isinstance(changed_at, datetime) and (watermark is None or changed_at > watermark):
+                    watermark = changed_at
+        
+        self.suggest.add_many(suggestions)
+        await self._sync_popularity()
+        
+        # Advanced only from scanned documents, so local writes never hide other workers' writes
+        self._watermark = watermark
+        
+        self.ready = True
+        self.last_synced_at = datetime.utcnow()
+        return loaded
+    
+    async def _sync_popularity(self) -> None:
+        """Recommendation counts per product across all sessions"""
+        collection = Database.get_database()[self.recommendations_collection_name]
+        counts: Dict[str, int] = {}
+        
+        async for row in collection.aggregate([{"$group": {"_id": "$product_query", "count": {"$sum": 1}}}]):
+            if row["_id"]:
+                key = canonical_product_key(row["_id"])
+                counts[key] = counts.get(key, 0) + row["count"]
+        
+        self.suggest.set_recommendations(counts)
+    
+    async def _sync_loop(self) -> None:
+        while True:
+            try:
+                loaded = await self.sync()
+                if loaded:
+                    print(f"🔎 Catalog indexes synced: {loaded} products ({len(self.fuzzy)} indexed)")
+            except Exception as e:
+                print(f"❌ Error syncing catalog indexes: {e}")
+            
+            await asyncio.sleep(settings.CATALOG_INDEX_SYNC_SECONDS)
+    
+    def start(self) -> None:
+        """Start the initial load and periodic sync (requires a running event loop)"""
+        if self._sync_task is None:
+            self._sync_task = asyncio.ensure_future(self._sync_loop())
+    
+    async def stop(self) -> None:
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            await asyncio.gather(self._sync_task, return_exceptions=True)
+            self._sync_task = None
+    
+    def stats(self) -> Dict[str, Any]:
+        """Index sizes and fuzzy lookup counters"""
+        return {
+            "ready": self.ready,
+            "indexed_products": len(self.fuzzy),
+            "suggest_products": len(self.suggest),
+            "ingredient_products": len(self.allergens),
+            "last_synced_at": self.last_synced_at,
+            "fuzzy_hits": self.fuzzy_lookups["hits"],
+            "fuzzy_misses": self.fuzzy_lookups["misses"]
+        }
+
+
+catalog_indexes = CatalogIndexes()
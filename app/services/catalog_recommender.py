@@ -0,0 +1,228 @@
+"""
+Catalog Recommender
+
+Picks products straight from `products_cache` instead of asking Gemini. The
+catalog is loaded into precomputed NumPy feature columns (category, price,
+skin-type suitability, rating, review count, recommendation count and
+allergen flags); recommending for a profile is a handful of vectorized
+operations over those columns:
+
+    score = 0.35 * suitability + 0.25 * rating + 0.15 * reviews
+          + 0.15 * popularity + 0.10 * budget fit
+
+restricted to the category, to prices within the category budget and to
+products without flagged allergens. Products are rebuilt from MongoDB on a
+timer, so new harvests become recommendable without a restart; the columns
+are computed in a worker thread and swapped in at once. Category and
+skin-type suitability come from the stored `classification` field (see
+product_classifier) when the batch job has tagged a product.
+"""
+
+import asyncio
+import re
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional
+
+import numpy as np
+
+from ..core.config import settings
+from ..core.database import Database
+from .product_normalizer import canonical_product_key, fold_unicode
+from .allergen_index import ALLERGEN_ALIASES, ALLERGEN_PATTERNS, normalize_allergies
+from .product_classifier import (
+    CATEGORIES, SKIN_TYPES, classify_category, product_fields, skin_type_scores, SUITABILITY_THRESHOLD
+)
+
+# Allergen groups flagged per product (shared alias table, see allergen_index)
+ALLERGEN_NAMES = list(ALLERGEN_ALIASES)
+
+# "fragrance-free", "paraben free": claims that must not flag the allergen
+_FREE_OF_RE = re.compile(r"\b\w+[- ]free\b")
+
+SCORE_WEIGHTS = {"suitability": 0.35, "rating": 0.25, "reviews": 0.15, "popularity": 0.15, "budget_fit": 0.10}
+
+
+def _product_text(product: Dict[str, Any]) -> str:
+    parts = [product.get("title"), product.get("description"), product.get("ingredients")]
+    parts.extend(product.get("highlights") or [])
+    return fold_unicode(" ".join(str(part) for part in parts if part))
+
+
+class CatalogRecommender:
+    """Vectorized product scoring over a snapshot of the products cache"""
+    
+    PROJECTION = {
+        "_id": 1, "query": 1, "title": 1, "description": 1, "highlights": 1, "ingredients": 1,
+        "extracted_price": 1, "rating": 1, "reviews": 1, "classification": 1
+    }
+    
+    def __init__(self):
+        self.products_collection = "products_cache"
+        self.recommendations_collection = "user_recommended_products"
+        self.names: List[str] = []
+        self.texts: List[str] = []
+        self.category = np.zeros(0, dtype=np.int8)
+        self.price = np.zeros(0, dtype=np.float64)
+        self.rating = np.zeros(0, dtype=np.float32)
+        self.reviews = np.zeros(0, dtype=np.float32)
+        self.popularity = np.zeros(0, dtype=np.float32)
+        self.suitability = np.zeros((0, len(SKIN_TYPES)), dtype=np.float32)
+        self.allergens = np.zeros((0, len(ALLERGEN_NAMES)), dtype=bool)
+        self.built_at: Optional[datetime] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+    
+    def __len__(self) -> int:
+        return len(self.names)
+    
+    def build(self, products: Iterable[Dict[str, Any]], recommendation_counts: Dict[str, int]) -> None:
+        """Precompute the feature columns for cached products"""
+        self.__dict__.update(self._columns(products, recommendation_counts))
+    
+    def _columns(self, products: Iterable[Dict[str, Any]], recommendation_counts: Dict[str, int]) -> Dict[str, Any]:
+        """Feature columns for cached products, without touching the live ones"""
+        rows = [(product, self._category(product)) for product in products]
+        rows = [(product, category) for product, category in rows if category and product.get("extracted_price")]
+        texts = [_product_text(product) for product, _ in rows]
+        
+        reviews = np.log1p(np.array([float(product.get("reviews") or 0) for product, _ in rows], dtype=np.float32))
+        popularity = np.array([recommendation_counts.get(product["_id"], 0) for product, _ in rows], dtype=np.float32)
+        suitable = [self._skin_types(product) for product, _ in rows]
+        allergen_texts = [_FREE_OF_RE.sub(" ", text) for text in texts]
+        
+        return {
+            "category": np.array([CATEGORIES.index(category) for _, category in rows], dtype=np.int8),
+            "price": np.array([float(product["extracted_price"]) for product, _ in rows], dtype=np.float64),
+            "rating": np.array([float(product.get("rating") or 0) for product, _ in rows], dtype=np.float32),
+            "reviews": reviews / max(reviews.max(initial=0), 1),
+            "popularity": np.log1p(popularity) / max(np.log1p(popularity).max(initial=0), 1),
+            "suitability": np.array(
+                [[skin_type in skin_types for skin_type in SKIN_TYPES] for skin_types in suitable],
+                dtype=np.float32
+            ).reshape(len(rows), len(SKIN_TYPES)),
+            "allergens": np.array(
+                [[bool(ALLERGEN_PATTERNS[name].search(text)) for name in ALLERGEN_NAMES] for text in allergen_texts],
+                dtype=bool
+            ).reshape(len(rows), len(ALLERGEN_NAMES)),
+            "names": [product.get("query") or product.get("title") for product, _ in rows],
+            "texts": texts,
+            "built_at": datetime.utcnow()
+        }
+    
+    @staticmethod
+    def _category(product: Dict[str, Any]) -> Optional[str]:
+        """Stored classification (classify_products job), else the live keyword rules"""
+        classification = product.get("classification") or {}
+        if classification.get("category"):
+            return classification["category"]
+        return classify_category(product.get("title") or "", product_fields(product)["highlights"])
+    
+    @staticmethod
+    def _skin_types(product: Dict[str, Any]) -> List[str]:
+        classification = product.get("classification") or {}
+        if "skin_types" in classification:
+            return classification["skin_types"]
+        scores = skin_type_scores(product_fields(product), idf={})
+        return [skin_type for skin_type, score in scores.items() if score >= SUITABILITY_THRESHOLD]
+    
+    def _scores(self, rows: np.ndarray, skin_types: List[str], budget: float) -> np.ndarray:
+        """Scores for the given rows (see the module docstring for the formula)"""
+        user_skin = np.array([skin_type in skin_types for skin_type in SKIN_TYPES], dtype=np.float32)
+        suitability = self.suitability[rows] @ user_skin / max(user_skin.sum(), 1)
+        # Best fit at ~70% of the budget, falling off linearly either side
+        budget_fit = 1 - np.minimum(np.abs(self.price[rows] / max(budget, 1) - 0.7) / 0.7, 1)
+        
+        return (
+            SCORE_WEIGHTS["suitability"] * suitability
+            + SCORE_WEIGHTS["rating"] * self.rating[rows] / 5
+            + SCORE_WEIGHTS["reviews"] * self.reviews[rows]
+            + SCORE_WEIGHTS["popularity"] * self.popularity[rows]
+            + SCORE_WEIGHTS["budget_fit"] * budget_fit
+        )
+    
+    def recommend(self, category: str, budget: Optional[float], skin_types: List[str], allergies: List[str], k: int = 5) -> List[Dict[str, Any]]:
+        """Top-k products of a category within budget, in the LLM output format"""
+        if not len(self) or category not in CATEGORIES:
+            return []
+        
+        mask = self.category == CATEGORIES.index(category)
+        if budget:
+            mask &= self.price <= budget * (1 + settings.ENRICHMENT_PRICE_BAND_TOLERANCE)
+        
+        groups, unknown_terms = normalize_allergies(allergies)
+        if groups:
+            mask &= ~self.allergens[:, [ALLERGEN_NAMES.index(group) for group in groups]].any(axis=1)
+        
+        candidates = np.flatnonzero(mask)
+        if not candidates.size:
+            return []
+        
+        scores = self._scores(candidates, skin_types, budget or float(np.median(self.price[candidates])))
+        # Allergies outside the known groups are checked as whole words on the shortlist
+        shortlist = candidates[np.argsort(-scores)][:k * 4 if unknown_terms else k]
+        term_patterns = [re.compile(rf"\b{re.escape(term)}\b") for term in unknown_terms]
+        
+        picks, seen = [], set()
+        for row in shortlist:
+            if any(pattern.search(self.texts[row]) for pattern in term_patterns):
+                continue
+            key = canonical_product_key(self.names[row])
+            if key in seen:
+                continue
+            seen.add(key)
+            picks.append({"name": self.names[row], "price": f"₱{self.price[row]:,.2f}"})
+            if len(picks) == k:
+                break
+        
+        return picks
+    
+    async def refresh(self) -> int:
+        """Rebuild the feature columns from MongoDB"""
+        db = Database.get_database()
+        products = []
+        async for product in db[self.products_collection].find(
+            {"_id": {"$type": "string"}, "extracted_price": {"$gt": 0}}, self.PROJECTION, batch_size=1000
+        ):
+            products.append(product)
+        
+        counts: Dict[str, int] = {}
+        async for row in db[self.recommendations_collection].aggregate([{"$group": {"_id": "$product_query", "count": {"$sum": 1}}}]):
+            if row["_id"]:
+                key = canonical_product_key(row["_id"])
+                counts[key] = counts.get(key, 0) + row["count"]
+        
+        # Classification and text scans are CPU-bound; swap the result in on the loop
+        columns = await asyncio.to_thread(self._columns, products, counts)
+        self.__dict__.update(columns)
+        return len(self)
+    
+    async def _refresh_loop(self) -> None:
+        while True:
+            try:
+                size = await self.refresh()
+                print(f"🧭 Catalog recommender rebuilt: {size} classified products")
+            except Exception as e:
+                print(f"❌ Error rebuilding catalog recommender: {e}")
+            
+            await asyncio.sleep(settings.CATALOG_RECOMMENDER_REFRESH_SECONDS)
+    
+    def start(self) -> None:
+        """Start the initial build and periodic rebuilds (requires a running event loop)"""
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.ensure_future(self._refresh_loop())
+    
+    async def stop(self) -> None:
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            await asyncio.gather(self._refresh_task, return_exceptions=True)
+            self._refresh_task = None
+    
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "products": len(self),
+            "per_category": {category: int((self.category == index).sum()) for index, category in enumerate(CATEGORIES)},
+            "built_at": self.built_at
+        }
+
+
+# Global instance
+catalog_recommender = CatalogRecommender()
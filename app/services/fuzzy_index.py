@@ -0,0 +1,199 @@
+"""
+Fuzzy Product Name Index
+
+In-memory character-trigram index over canonical product names (cache keys and
+titles). Lookups return the most similar product by Jaccard similarity of
+trigram sets, above a threshold.
+
+Candidate generation uses prefix filtering: a text can only reach Jaccard >= t
+with a query of n trigrams if it shares at least m = ceil(t * n) of them, so
+it must contain one of the query's (n - m + 1) rarest trigrams, and at least
+k + 1 of its (n - m + 1 + k) rarest. Posting lists are bucketed by document
+size, so only documents whose size allows Jaccard >= t are read, and shared
+trigrams are counted with NumPy over cached posting arrays.
+
+Lookups run on the event loop, so their cost is bounded: rarer trigrams are
+probed until MAX_SCANNED_POSTINGS posting entries have been read, and at
+most MAX_CANDIDATES documents (those sharing the most probed trigrams) are
+verified. A query made only of very common words can exhaust the budget
+before the prefix is covered and miss a match, falling back to the slower
+lookups. benchmarks/bench_fuzzy_index.py measures hits and misses on a
+synthetic 100k-product catalog: about 0.6 ms p50 and 1.5 ms p99 per lookup
+once posting arrays are built (a trigram's first lookup after a change
+rebuilds its array, up to a few ms for common trigrams).
+
+Names that differ in a numeric token (spf 30/spf 50, 2%/5%, shade n20/n30)
+or a time-of-day or shade word (am/pm, fair/medium) are different products
+even when their trigram sets are close, so a candidate with a conflicting
+token of that kind is rejected. Other words ("for", "gel", "spf") never
+veto a match.
+"""
+
+import math
+from typing import Dict, FrozenSet, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+MAX_SCANNED_POSTINGS = 100000
+MAX_CANDIDATES = 100
+
+# Words naming a variant of a product line (time of day, shade); numeric tokens always do
+VARIANT_WORDS = frozenset({
+    "am", "pm", "day", "night",
+    "fair", "porcelain", "ivory", "beige", "sand", "medium", "tan", "nude", "mocha", "espresso"
+})
+
+
+def trigrams(text: str) -> FrozenSet[str]:
+    """Character trigrams of a canonical name, padded so word edges count"""
+    padded = f"  {text} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def distinguishing_tokens(text: str) -> FrozenSet[str]:
+    """Numeric, size, shade and time-of-day tokens, which name variants rather than describe them"""
+    return frozenset(
+        token for token in text.split()
+        if token in VARIANT_WORDS or any(char.isdigit() for char in token)
+    )
+
+
+class TrigramIndex:
+    """Trigram similarity index mapping indexed texts back to product keys"""
+
+    def __init__(self):
+        # trigram -> document size (trigram count) -> document ids
+        self._postings: Dict[str, Dict[int, Set[int]]] = {}
+        self._gram_counts: Dict[str, int] = {}
+        # trigram -> (document sizes, document ids) ordered by size, rebuilt after changes
+        self._arrays: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._doc_grams: List[Optional[FrozenSet[str]]] = []
+        self._doc_tokens: List[Optional[FrozenSet[str]]] = []
+        self._doc_keys: List[Optional[str]] = []
+        self._key_docs: Dict[str, List[int]] = {}
+        self._free_ids: List[int] = []
+
+    def __len__(self) -> int:
+        return len(self._key_docs)
+
+    def add(self, key: str, texts: Iterable[str]) -> None:
+        """Index (or re-index) a product key under one or more canonical texts"""
+        self.remove(key)
+        doc_ids = []
+
+        for text in dict.fromkeys(t for t in texts if t):
+            grams = trigrams(text)
+            if self._free_ids:
+                doc_id = self._free_ids.pop()
+                self._doc_grams[doc_id] = grams
+                self._doc_tokens[doc_id] = distinguishing_tokens(text)
+                self._doc_keys[doc_id] = key
+            else:
+                doc_id = len(self._doc_grams)
+                self._doc_grams.append(grams)
+                self._doc_tokens.append(distinguishing_tokens(text))
+                self._doc_keys.append(key)
+
+            size = len(grams)
+            for gram in grams:
+                self._postings.setdefault(gram, {}).setdefault(size, set()).add(doc_id)
+                self._arrays.pop(gram, None)
+                self._gram_counts[gram] = self._gram_counts.get(gram, 0) + 1
+            doc_ids.append(doc_id)
+
+        if doc_ids:
+            self._key_docs[key] = doc_ids
+
+    def remove(self, key: str) -> None:
+        """Drop a product key from the index"""
+        for doc_id in self._key_docs.pop(key, []):
+            grams = self._doc_grams[doc_id]
+            size = len(grams)
+            for gram in grams:
+                buckets = self._postings.get(gram)
+                posting = buckets.get(size) if buckets else None
+                if posting is None or doc_id not in posting:
+                    continue
+                posting.discard(doc_id)
+                self._arrays.pop(gram, None)
+                if not posting:
+                    del buckets[size]
+                self._gram_counts[gram] -= 1
+                if not self._gram_counts[gram]:
+                    del self._postings[gram]
+                    del self._gram_counts[gram]
+            self._doc_grams[doc_id] = None
+            self._doc_tokens[doc_id] = None
+            self._doc_keys[doc_id] = None
+            self._free_ids.append(doc_id)
+
+    def search(self, text: str, threshold: float) -> Optional[Tuple[str, float]]:
+        """Best (key, similarity) for a canonical text, or None below threshold"""
+        query_grams = trigrams(text)
+        query_size = len(query_grams)
+        if not query_size or threshold <= 0:
+            return None
+
+        min_overlap = math.ceil(threshold * query_size)
+        sizes = range(min_overlap, math.floor(query_size / threshold) + 1)
+
+        # Rarest trigrams first (unknown trigrams have no postings)
+        known_grams = sorted(
+            (gram for gram in query_grams if gram in self._postings),
+            key=self._gram_counts.__getitem__
+        )
+        prefix = len(known_grams) - min_overlap + 1
+        if prefix <= 0:
+            return None
+
+        # Probe the prefix, then further trigrams while the scan budget lasts
+        arrays = []
+        scanned = probed = 0
+        for gram in known_grams:
+            if probed >= prefix and scanned + self._gram_counts[gram] > MAX_SCANNED_POSTINGS:
+                break
+            doc_sizes, doc_ids = self._posting_arrays(gram)
+            start, stop = doc_sizes.searchsorted((sizes.start, sizes.stop))
+            arrays.append(doc_ids[start:stop])
+            scanned += stop - start
+            probed += 1
+            if scanned >= MAX_SCANNED_POSTINGS:
+                break
+
+        shared = np.bincount(np.concatenate(arrays))
+        candidates = np.flatnonzero(shared >= max(probed - prefix + 1, 1))
+        if len(candidates) > MAX_CANDIDATES:
+            candidates = candidates[np.argpartition(shared[candidates], -MAX_CANDIDATES)[-MAX_CANDIDATES:]]
+
+        query_tokens = distinguishing_tokens(text)
+
+        best_key, best_score = None, threshold
+        for doc_id in candidates.tolist():
+            doc_grams = self._doc_grams[doc_id]
+            doc_size = len(doc_grams)
+            overlap = len(query_grams & doc_grams)
+            score = overlap / (query_size + doc_size - overlap)
+            if score < best_score:
+                continue
+
+            doc_tokens = self._doc_tokens[doc_id]
+            if (query_tokens - doc_tokens) and (doc_tokens - query_tokens):
+                continue  # e.g. "am" vs "pm": a different variant
+            best_key, best_score = self._doc_keys[doc_id], score
+
+        if best_key is None:
+            return None
+        return best_key, best_score
+
+    def _posting_arrays(self, gram: str) -> Tuple[np.ndarray, np.ndarray]:
+        arrays = self._arrays.get(gram)
+        if arrays is None:
+            buckets = self._postings[gram]
+            sizes = sorted(buckets)
+            doc_sizes = np.repeat(sizes, [len(buckets[size]) for size in sizes])
+            doc_ids = np.fromiter(
+                (doc_id for size in sizes for doc_id in buckets[size]),
+                dtype=np.int32, count=len(doc_sizes)
+            )
+            arrays = self._arrays[gram] = (doc_sizes, doc_ids)
+        return arrays
@@ -5,35 +5,26 @@ Handles facial image analysis using AI for skin condition assessment.
 PRESERVED ORIGINAL LOGIC - Only extracted into service class.
 """
 
-import re
-import json
 import io
+import asyncio
 from PIL import Image
 from fastapi import HTTPException
 from fastapi.responses import JSONResponse
-import google.generativeai as genai
-from ..core.config import settings
-
-# Configure the AI model (same as original)
-genai.configure(api_key=settings.GEMINI_API_KEY)
+from ..core.llm_client import llm_client
+from ..models.skincare.analysis_schemas import SkinAnalysis
 
 
 class Phase2Service:
     """Service for Phase 2: Image Analysis (Original logic preserved)"""
     
     @staticmethod
-    def clean_response(text: str) -> str:
-        """Clean Gemini Response Text - ORIGINAL LOGIC PRESERVED"""
-        text = text.replace("`", "").replace(""", '"').replace(""", '"').replace("'", "'").strip()
-        text = re.sub(r'^\s*```[a-zA-Z]*', '', text, flags=re.MULTILINE)
-        text = re.sub(r'```\s*$', '', text, flags=re.MULTILINE)
-        return text
+    def _load_image(file_bytes: bytes) -> Image.Image:
+        """Decode image bytes into an RGB image"""
+        return Image.open(io.BytesIO(file_bytes)).convert("RGB")
 
     @staticmethod
-    def analyze_face_image(image: Image.Image):
+    async def analyze_face_image(image: Image.Image):
         """Analyze face image - ORIGINAL LOGIC PRESERVED"""
-        model = genai.GenerativeModel(model_name="gemini-2.0-flash")
-
         prompt = """
 You are a skincare AI.
 
@@ -81,12 +72,8 @@ Only respond with the valid JSON object.
 """
 
         try:
-            response = model.generate_content([prompt, image])
-            cleaned = Phase2Service.clean_response(response.text)
-
-            result = json.loads(re.search(r"\{.*\}", cleaned, re.DOTALL).group())
-
-            return result
+            result = await llm_client.generate_json([prompt, image], SkinAnalysis)
+            return result.model_dump()
 
         except Exception as e:
             print(f"[Gemini Error] {e}")
@@ -103,8 +90,9 @@ Only respond with the valid JSON object.
         ORIGINAL LOGIC PRESERVED
         """
         try:
-            image = Image.open(io.BytesIO(file_bytes)).convert("RGB")
-            ai_result = Phase2Service.analyze_face_image(image)
+            # Decoding is CPU-bound, keep it off the event loop
+            image = await asyncio.to_thread(Phase2Service._load_image, file_bytes)
+            ai_result = await Phase2Service.analyze_face_image(image)
 
             return JSONResponse(content={
                 "message": "Face analyzed using Gemini 1.5 Flash",
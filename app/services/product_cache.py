@@ -0,0 +1,74 @@
+"""
+Product L1 Cache
+
+In-process tier in front of the products_cache collection. Keeps recently used
+product documents per worker with size and TTL eviction and tracks hit/miss
+counters for the cache statistics endpoint. Invalidation is per worker, so the
+TTL bounds how long another worker can serve an entry changed elsewhere.
+"""
+
+from typing import Optional, Dict, Any
+from cachetools import TTLCache
+from ..core.config import settings
+
+
+class ProductL1Cache:
+    """Size- and TTL-bounded in-memory product cache"""
+    
+    def __init__(self, maxsize: int = None, ttl: float = None):
+        self.maxsize = maxsize or settings.PRODUCT_L1_CACHE_SIZE
+        self.ttl = ttl or settings.PRODUCT_L1_CACHE_TTL_SECONDS
+        self._cache = TTLCache(maxsize=self.maxsize, ttl=self.ttl)
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+    
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Get a copy of a cached product, counting the hit or miss"""
+        product = self._cache.get(key)
+        if product is None:
+            self.misses += 1
+            return None
+        
+        self.hits += 1
+        return dict(product)
+    
+    def set(self, key: str, product: Dict[str, Any]) -> None:
+        """Cache a product document under a lookup key"""
+        self._cache[key] = dict(product)
+    
+    def invalidate(self, key: Optional[str] = None) -> None:
+        """
+        Drop a product from the cache, including entries cached under other
+        lookup keys (fuzzy matches) that resolved to it. Clears everything
+        when no key is given.
+        """
+        if key is None:
+            self.invalidations += len(self._cache)
+            self._cache.clear()
+            return
+        
+        stale_keys = [
+            lookup_key for lookup_key, product in list(self._cache.items())
+            if lookup_key == key or product.get("_id") == key or product.get("key") == key
+        ]
+        for lookup_key in stale_keys:
+            self._cache.pop(lookup_key, None)
+        self.invalidations += len(stale_keys)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Cache size and hit/miss counters"""
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._cache),
+            "maxsize": self.maxsize,
+            "ttl_seconds": self.ttl,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "invalidations": self.invalidations
+        }
+
+
+# Global instance
+product_l1_cache = ProductL1Cache()
@@ -0,0 +1,155 @@
+"""
+Product Classifier
+
+Rule-based tagging of cached products, run in batch by
+`app.jobs.classify_products` and stored under each document's
+`classification` field:
+
+- category: first matching title keyword (highlights as a fallback)
+- skin_types: skin types whose keywords score at least
+  SUITABILITY_THRESHOLD, where each keyword hit counts
+  field weight x IDF (keywords that appear on every product count little)
+- price_tier: cheap / mid-range / expensive by the product's category price
+  terciles (extracted_price)
+"""
+
+import math
+import re
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .product_normalizer import fold_unicode
+
+CLASSIFICATION_VERSION = 1
+
+CATEGORIES = [
+    "facial_wash", "moisturizer", "sunscreen", "treatment", "toner",
+    "serum", "eye_cream", "exfoliant", "mask", "essence", "ampoule"
+]
+
+# Checked in order; the first category with a keyword in the title wins
+CATEGORY_KEYWORDS = [
+    ("eye_cream", ("eye cream", "eye gel", "eye serum", "under eye")),
+    ("sunscreen", ("sunscreen", "sun screen", "sunblock", "sun block", "spf", "uv ")),
+    ("facial_wash", ("cleanser", "face wash", "facial wash", "cleansing", "foam")),
+    ("toner", ("toner", "tonic")),
+    ("exfoliant", ("exfoliant", "exfoliating", "peeling", "scrub", "aha", "bha", "glycolic")),
+    ("ampoule", ("ampoule",)),
+    ("essence", ("essence",)),
+    ("serum", ("serum",)),
+    ("mask", ("mask", "sheet")),
+    ("treatment", ("spot", "treatment", "acne gel", "benzoyl", "adapalene", "pimple")),
+    ("moisturizer", ("moisturizer", "moisturiser", "moisturizing", "cream", "lotion", "gel cream", "emulsion")),
+]
+
+SKIN_TYPES = ["oily", "dry", "combination", "normal", "sensitive", "acne-prone"]
+
+SKIN_TYPE_KEYWORDS = {
+    "oily": ("oil free", "oil control", "mattifying", "matte", "non comedogenic", "oily", "gel"),
+    "dry": ("hydrating", "ceramide", "hyaluronic", "nourishing", "rich", "dry skin", "moisture"),
+    "combination": ("balancing", "lightweight", "combination"),
+    "normal": ("all skin types", "daily"),
+    "sensitive": ("fragrance free", "gentle", "sensitive", "soothing", "centella", "calming"),
+    "acne-prone": ("acne", "salicylic", "blemish", "niacinamide", "non comedogenic", "tea tree"),
+}
+KEYWORDS = sorted({keyword for keywords in SKIN_TYPE_KEYWORDS.values() for keyword in keywords})
+
+FIELD_WEIGHTS = {"title": 2.0, "highlights": 1.5, "description": 1.0, "detailed_description": 1.0, "ingredients": 1.0}
+SUITABILITY_THRESHOLD = 2.0
+
+PRICE_TIERS = ["cheap", "mid-range", "expensive"]
+PRICE_TIER_QUANTILES = [1 / 3, 2 / 3]
+
+_SEPARATOR_RE = re.compile(r"[^\w]+|_")
+
+
+def _fold(value: Any) -> str:
+    """Folded text with punctuation as spaces ("oil-free" -> "oil free")"""
+    if isinstance(value, list):
+        value = " ".join(str(item) for item in value if item)
+    return f" {' '.join(_SEPARATOR_RE.sub(' ', fold_unicode(str(value or ''))).split())} "
+
+
+def product_fields(product: Dict[str, Any]) -> Dict[str, str]:
+    """Folded text of each weighted field"""
+    return {field: _fold(product.get(field)) for field in FIELD_WEIGHTS}
+
+
+def classify_category(title: str, fallback_text: str = "") -> Optional[str]:
+    """Product category from title keywords (then fallback text), or None"""
+    for text in (_fold(title), fallback_text):
+        for category, keywords in CATEGORY_KEYWORDS:
+            if any(f" {keyword.strip()} " in text for keyword in keywords):
+                return category
+    return None
+
+
+def keyword_idf(documents: List[Dict[str, str]]) -> Dict[str, float]:
+    """Smoothed inverse document frequency of each suitability keyword (matched at word starts)"""
+    total = len(documents)
+    idf = {}
+    for keyword in KEYWORDS:
+        needle = f" {keyword}"
+        frequency = sum(1 for fields in documents if any(needle in text for text in fields.values()))
+        idf[keyword] = math.log((1 + total) / (1 + frequency)) + 1
+    return idf
+
+
+def skin_type_scores(fields: Dict[str, str], idf: Dict[str, float]) -> Dict[str, float]:
+    """Field-weighted IDF score per skin type"""
+    scores = {}
+    for skin_type, keywords in SKIN_TYPE_KEYWORDS.items():
+        score = 0.0
+        for keyword in keywords:
+            needle = f" {keyword}"
+            for field, text in fields.items():
+                if needle in text:
+                    score += FIELD_WEIGHTS[field] * idf.get(keyword, 1.0)
+        scores[skin_type] = round(score, 3)
+    return scores
+
+
+def price_tiers(categories: List[Optional[str]], prices: List[Optional[float]]) -> Tuple[List[Optional[str]], Dict[str, List[float]]]:
+    """Price tier per product from its category's price terciles, plus the bounds used"""
+    category_array = np.array([category or "" for category in categories])
+    price_array = np.array([price if isinstance(price, (int, float)) and price > 0 else np.nan for price in prices], dtype=np.float64)
+    tier_index = np.full(len(price_array), -1)
+    bounds = {}
+    
+    for category in CATEGORIES:
+        mask = (category_array == category) & ~np.isnan(price_array)
+        if not mask.any():
+            continue
+        category_bounds = np.quantile(price_array[mask], PRICE_TIER_QUANTILES)
+        tier_index[mask] = np.searchsorted(category_bounds, price_array[mask], side="left")
+        bounds[category] = [round(float(bound), 2) for bound in category_bounds]
+    
+    return [PRICE_TIERS[index] if index >= 0 else None for index in tier_index], bounds
+
+
+def classify_products(products: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Classification documents for a batch (the whole catalog, for meaningful IDF and quantiles)"""
+    documents = [product_fields(product) for product in products]
+    idf = keyword_idf(documents)
+    categories = [
+        classify_category(product.get("title") or "", fields["highlights"])
+        for product, fields in zip(products, documents)
+    ]
+    tiers, bounds = price_tiers(categories, [product.get("extracted_price") for product in products])
+    now = datetime.utcnow()
+    
+    classifications = []
+    for category, tier, fields in zip(categories, tiers, documents):
+        scores = skin_type_scores(fields, idf)
+        classifications.append({
+            "category": category,
+            "skin_types": [skin_type for skin_type in SKIN_TYPES if scores[skin_type] >= SUITABILITY_THRESHOLD],
+            "skin_type_scores": scores,
+            "price_tier": tier,
+            "price_tier_bounds": bounds.get(category),
+            "version": CLASSIFICATION_VERSION,
+            "classified_at": now
+        })
+    return classifications
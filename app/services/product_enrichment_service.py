@@ -0,0 +1,219 @@
+"""
+Product Enrichment Service
+
+Resolves AI-recommended product names into detailed product data in parallel.
+Cache hits for the whole set come from one bulk query, only misses go to
+SerpAPI, and user recommendations are saved in one bulk write. Lookups are
+bounded by a process-wide semaphore shared by every request and by a
+per-request semaphore, and each product gets its own timeout so a single slow
+lookup only fails that product.
+"""
+
+import asyncio
+from typing import Dict, Any, List, Optional, Tuple, Awaitable
+from ..core.config import settings
+from .product_search_service import product_search_service
+from .catalog_index import catalog_indexes
+from .allergen_index import token_conflicts
+from .product_normalizer import canonical_product_key
+
+
+class ProductEnrichmentService:
+    """Parallel enrichment engine used by Phase 3"""
+
+    def __init__(self):
+        self.request_concurrency = settings.ENRICHMENT_REQUEST_CONCURRENCY
+        self.product_timeout = settings.ENRICHMENT_PRODUCT_TIMEOUT_SECONDS
+        self.price_band_tolerance = settings.ENRICHMENT_PRICE_BAND_TOLERANCE
+        self._global_semaphore = asyncio.Semaphore(settings.ENRICHMENT_GLOBAL_CONCURRENCY)
+
+    async def _run_lookup(self, request_semaphore: asyncio.Semaphore, product_name: str, lookup: Awaitable) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Run a single product lookup, returning (product_details, error)"""
+        # Take the per-request slot first so one request cannot hog the global pool
+        async with request_semaphore, self._global_semaphore:
+            try:
+                product_details = await asyncio.wait_for(lookup, timeout=self.product_timeout)
+            except asyncio.TimeoutError:
+                print(f"⏱️ Timed out enriching '{product_name}' after {self.product_timeout}s")
+                return None, "Product search timed out"
+            except Exception as e:
+                print(f"❌ Error enriching '{product_name}': {e}")
+                return None, str(e)
+
+        if not product_details:
+            return None, "Product details not found"
+
+        return product_details, None
+
+    @staticmethod
+    def _product_key(product_details: Dict[str, Any]) -> str:
+        return product_details.get("_id") or canonical_product_key(product_details.get("query", ""))
+
+    def _knows_ingredients(self, product_details: Dict[str, Any]) -> bool:
+        return bool(product_details.get("ingredient_tokens")) or catalog_indexes.allergens.has_ingredients(self._product_key(product_details))
+
+    async def _fetch_missing_ingredients(self, request_semaphore: asyncio.Semaphore, results: List[Tuple[Optional[Dict[str, Any]], Optional[str]]]) -> List[Tuple[Optional[Dict[str, Any]], Optional[str]]]:
+        """Fetch details (lazy since the two-stage fetch) for resolved products without ingredient data"""
+        missing = [
+            position for position, (product_details, _) in enumerate(results)
+            if product_details and product_details.get("product_api_url") and not self._knows_ingredients(product_details)
+        ]
+        fetched = await asyncio.gather(*(
+            self._run_lookup(
+                request_semaphore,
+                results[position][0].get("title", ""),
+                product_search_service.fetch_product_details(results[position][0])
+            )
+            for position in missing
+        ))
+
+        results = list(results)
+        for position, (product_details, _) in zip(missing, fetched):
+            if product_details:
+                results[position] = (product_details, results[position][1])
+        return results
+
+    def _drop_allergen_conflicts(self, entries: List[Tuple], results: List[Tuple[Optional[Dict[str, Any]], Optional[str]]], allergies: Optional[List[str]]) -> Tuple[List[Tuple], List[Tuple], List[Optional[str]]]:
+        """
+        Remove resolved products whose ingredients contain one of the user's
+        allergens. Also returns each kept product's allergen check: "passed",
+        "ingredients_unknown" (no ingredient list to check), or None when no
+        allergies were given.
+        """
+        bitsets = catalog_indexes.allergens.allergy_bitsets(allergies) if allergies else []
+        if not bitsets:
+            return entries, results, [None] * len(results)
+
+        kept_entries, kept_results, checks = [], [], []
+        for entry, result in zip(entries, results):
+            product_details = result[0]
+            check = None
+            if product_details:
+                key = self._product_key(product_details)
+                if catalog_indexes.allergens.has_ingredients(key):
+                    conflicts, check = catalog_indexes.allergens.conflicts(key, bitsets), "passed"
+                elif product_details.get("ingredient_tokens"):
+                    conflicts, check = token_conflicts(product_details["ingredient_tokens"], allergies), "passed"
+                else:
+                    conflicts, check = [], "ingredients_unknown"
+                if conflicts:
+                    print(f"🚫 Dropping '{product_details.get('title', key)}': contains {', '.join(conflicts)}")
+                    continue
+            kept_entries.append(entry)
+            kept_results.append(result)
+            checks.append(check)
+        return kept_entries, kept_results, checks
+
+    async def enrich_recommendations(self, products: Dict[str, List[Dict[str, Any]]], future_recommendations: List[Dict[str, Any]], session_id: str, context: Dict[str, Any], category_budgets: Optional[Dict[str, float]] = None, allergies: Optional[List[str]] = None) -> Tuple[Dict[str, List[Dict[str, Any]]], List[Dict[str, Any]]]:
+        """
+        Enrich current and future recommendations in one parallel batch.
+
+        Returns (enriched_products, enriched_future) in the same structure the
+        sequential implementation produced. Failed lookups are kept as
+        unsuccessful entries instead of failing the whole batch. When
+        category_budgets is given, SerpAPI fetches for current products pick
+        the best result priced within the category budget. When allergies are
+        given, details are fetched first for products without ingredient
+        data, products whose ingredients contain one of them are dropped (see
+        allergen_index), and each remaining entry reports its allergen_check.
+        """
+        request_semaphore = asyncio.Semaphore(self.request_concurrency)
+
+        product_entries = [
+            (category, product)
+            for category, product_list in products.items()
+            for product in product_list
+            if product.get("name")
+        ]
+        future_entries = [
+            (index, recommendation.get("category", ""), product)
+            for index, recommendation in enumerate(future_recommendations)
+            for product in recommendation.get("products", [])
+            if product.get("name")
+        ]
+
+        # One bulk cache lookup for the whole set; only misses hit SerpAPI
+        names = [product["name"] for _, product in product_entries]
+        names += [product["name"] for _, _, product in future_entries]
+        price_bands = {}
+        for category, product in product_entries:
+            if category_budgets and category in category_budgets:
+                max_price = category_budgets[category] * (1 + self.price_band_tolerance)
+                price_bands.setdefault(product["name"], (None, max_price))
+
+        resolved = await product_search_service.resolve_products(
+            names,
+            runner=lambda name, lookup: self._run_lookup(request_semaphore, name, lookup),
+            price_bands=price_bands
+        )
+
+        product_results = [resolved[product["name"]] for _, product in product_entries]
+        future_results = [resolved[product["name"]] for _, _, product in future_entries]
+        if allergies:
+            product_results, future_results = await asyncio.gather(
+                self._fetch_missing_ingredients(request_semaphore, product_results),
+                self._fetch_missing_ingredients(request_semaphore, future_results)
+            )
+        product_entries, product_results, product_checks = self._drop_allergen_conflicts(product_entries, product_results, allergies)
+        future_entries, future_results, future_checks = self._drop_allergen_conflicts(future_entries, future_results, allergies)
+
+        user_recommendations = [
+            (product_details, {
+                "category": category,
+                "recommended_price": product.get("price", "₱0.00"),
+                "user_context": context,
+                "ai_recommended": True
+            })
+            for (category, product), (product_details, _) in zip(product_entries, product_results)
+            if product_details
+        ]
+        user_recommendations += [
+            (product_details, {
+                "category": category,
+                "recommended_price": product.get("price", "$0.00"),
+                "user_context": context,
+                "ai_recommended": True,
+                "future_recommendation": True
+            })
+            for (_, category, product), (product_details, _) in zip(future_entries, future_results)
+            if product_details
+        ]
+        await product_search_service.save_user_recommended_products(session_id, user_recommendations)
+
+        enriched_products = {category: [] for category in products}
+        for (category, product), (product_details, error), check in zip(product_entries, product_results, product_checks):
+            if product_details:
+                enriched_products[category].append({
+                    "ai_recommendation": product,
+                    "product_details": product_details,
+                    "category": category,
+                    "enriched_at": product_details.get("fetched_at"),
+                    "search_successful": True,
+                    "allergen_check": check
+                })
+            else:
+                enriched_products[category].append({
+                    "ai_recommendation": product,
+                    "product_details": None,
+                    "category": category,
+                    "search_successful": False,
+                    "error": error
+                })
+
+        enriched_future = [
+            {"category": recommendation.get("category", ""), "products": []}
+            for recommendation in future_recommendations
+        ]
+        for (index, _, product), (product_details, _), check in zip(future_entries, future_results, future_checks):
+            enriched_future[index]["products"].append({
+                "ai_recommendation": product,
+                "product_details": product_details,
+                "search_successful": product_details is not None,
+                "allergen_check": check
+            })
+
+        return enriched_products, enriched_future
+
+
+# Global instance
+product_enrichment_service = ProductEnrichmentService()
@@ -0,0 +1,113 @@
+"""
+Product Freshness Policy
+
+Stale-while-revalidate rules for cached product data. Each reported field is
+aged from the timestamp it was fetched with:
+- fresh:   younger than the soft TTL, served as is
+- stale:   past the soft TTL, served immediately and refreshed in the background
+- expired: past the hard TTL, refetched before being served
+
+Fields that change slowly (ratings, reviews, detail data) get a longer TTL
+through a multiplier on the base soft/hard TTLs. Only shopping-level fields
+decide the overall status; detail data is refreshed on demand.
+"""
+
+from datetime import datetime, timezone
+from typing import Optional, Dict, Any
+from ..core.config import settings
+
+FRESH = "fresh"
+STALE = "stale"
+EXPIRED = "expired"
+
+_STATUS_ORDER = {FRESH: 0, STALE: 1, EXPIRED: 2}
+
+DETAILS_TTL_MULTIPLIER = 8
+
+# field -> (timestamp field, TTL multiplier)
+FIELD_POLICY = {
+    "price": ("fetched_at", 1),
+    "extracted_price": ("fetched_at", 1),
+    "delivery": ("fetched_at", 1),
+    "store": ("fetched_at", 1),
+    "rating": ("fetched_at", 4),
+    "reviews": ("fetched_at", 4),
+    "detailed_description": ("details_fetched_at", DETAILS_TTL_MULTIPLIER),
+    "ingredients": ("details_fetched_at", DETAILS_TTL_MULTIPLIER),
+    "specifications": ("details_fetched_at", DETAILS_TTL_MULTIPLIER),
+    "seller_info": ("details_fetched_at", DETAILS_TTL_MULTIPLIER),
+}
+
+
+def _to_utc(value: Any) -> Optional[datetime]:
+    """Parse a stored timestamp (datetime or ISO string) into an aware UTC datetime"""
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            return None
+        # fetched_at strings are written in server local time
+        return value.astimezone(timezone.utc)
+    
+    if isinstance(value, datetime):
+        # MongoDB returns naive UTC datetimes
+        return value.replace(tzinfo=timezone.utc) if value.tzinfo is None else value
+    
+    return None
+
+
+def field_age_seconds(product: Dict[str, Any], timestamp_field: str, now: datetime) -> Optional[float]:
+    """Age of a timestamp field, falling back to cached_at when it is missing"""
+    fetched = _to_utc(product.get(timestamp_field)) or _to_utc(product.get("cached_at"))
+    if fetched is None:
+        return None
+    return max((now - fetched).total_seconds(), 0.0)
+
+
+def status_for_age(age_seconds: Optional[float], multiplier: float = 1) -> str:
+    """Freshness status for an age; unknown ages are treated as expired"""
+    if age_seconds is None or age_seconds >= settings.PRODUCT_HARD_TTL_SECONDS * multiplier:
+        return EXPIRED
+    if age_seconds >= settings.PRODUCT_SOFT_TTL_SECONDS * multiplier:
+        return STALE
+    return FRESH
+
+
+def evaluate_freshness(product: Dict[str, Any], now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    Per-field freshness report for a cached product.
+    The overall status is the worst status among fields present on the product.
+    """
+    now = now or datetime.now(timezone.utc)
+    fields = {}
+    
+    for field, (timestamp_field, multiplier) in FIELD_POLICY.items():
+        if product.get(field) is None:
+            continue
+        age = field_age_seconds(product, timestamp_field, now)
+        fields[field] = {
+            "age_seconds": int(age) if age is not None else None,
+            "status": status_for_age(age, multiplier)
+        }
+    
+    age = field_age_seconds(product, "fetched_at", now)
+    overall = max(
+        [status_for_age(age)] + [
+            info["status"] for field, info in fields.items()
+            if FIELD_POLICY[field][0] == "fetched_at"
+        ],
+        key=_STATUS_ORDER.get
+    )
+    
+    return {
+        "status": overall,
+        "age_seconds": int(age) if age is not None else None,
+        "fields": fields
+    }
+
+
+def details_status(product: Dict[str, Any], now: Optional[datetime] = None) -> str:
+    """Freshness status of a product's detail data"""
+    now = now or datetime.now(timezone.utc)
+    age = field_age_seconds(product, "details_fetched_at", now)
+    return status_for_age(age, DETAILS_TTL_MULTIPLIER)
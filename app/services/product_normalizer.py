@@ -0,0 +1,72 @@
+"""
+Product Name Normalizer
+
+Canonical form of product names, shared by cache writes (_id generation) and
+lookups so that spelling variants of the same product resolve to one cache
+entry. All patterns are compiled once at import.
+
+Canonicalization steps:
+1. Unicode folding (NFKD, combining marks dropped, casefold)
+2. Parenthetical notes and usage instructions removed
+3. Size/volume/pack tokens removed (236ml, 1.7 fl oz, pack of 2)
+4. Punctuation collapsed to single spaces
+5. Brand aliases mapped to one spelling
+"""
+
+import re
+import unicodedata
+
+_PARENTHETICAL_RE = re.compile(r"\s*[\(\[][^\)\]]*[\)\]]")
+_INSTRUCTIONS_RE = re.compile(
+    r"\b(?:patch test only|use sparingly|for sensitive skin|apply at night|morning use only|evening use only)\b",
+    re.IGNORECASE
+)
+_SIZE_RE = re.compile(
+    r"\b\d+(?:[.,]\d+)?\s*(?:fl\.?\s*oz|ml|l|g|kg|mg|oz|pcs|pc|pieces|ct|count|sheets)\b"
+)
+_PACK_RE = re.compile(r"\b(?:pack of \d+|set of \d+|\d+\s*-?\s*pack)\b")
+_PUNCTUATION_RE = re.compile(r"[^\w\s]+|_")
+_WHITESPACE_RE = re.compile(r"\s+")
+
+# Variant spelling -> canonical brand spelling (both already folded and de-punctuated)
+BRAND_ALIASES = {
+    "cera ve": "cerave",
+    "larocheposay": "la roche posay",
+    "lrp": "la roche posay",
+    "the ordinary deciem": "the ordinary",
+    "paula s choice": "paulas choice",
+    "cos rx": "cosrx",
+    "somebymi": "some by mi",
+    "kiehl s": "kiehls",
+    "skin 1004": "skin1004",
+}
+
+_BRAND_ALIAS_RE = re.compile(
+    r"\b(" + "|".join(re.escape(alias) for alias in sorted(BRAND_ALIASES, key=len, reverse=True)) + r")\b"
+)
+
+
+def fold_unicode(text: str) -> str:
+    """Strip accents and apply Unicode case folding"""
+    decomposed = unicodedata.normalize("NFKD", text)
+    return "".join(char for char in decomposed if not unicodedata.combining(char)).casefold()
+
+
+def clean_search_query(query: str) -> str:
+    """Query sent to SerpAPI: notes and instructions removed, sizes kept"""
+    cleaned = _PARENTHETICAL_RE.sub("", query)
+    cleaned = _INSTRUCTIONS_RE.sub("", cleaned)
+    return _WHITESPACE_RE.sub(" ", cleaned).strip()
+
+
+def canonical_product_key(name: str) -> str:
+    """Canonical cache key for a product name"""
+    key = fold_unicode(name)
+    key = _PARENTHETICAL_RE.sub(" ", key)
+    key = _INSTRUCTIONS_RE.sub(" ", key)
+    key = _PUNCTUATION_RE.sub(lambda match: "." if match.group() in (".", ",") else " ", key)
+    key = _SIZE_RE.sub(" ", key)
+    key = _PACK_RE.sub(" ", key)
+    key = key.replace(".", " ").replace(",", " ")
+    key = _WHITESPACE_RE.sub(" ", key).strip()
+    return _BRAND_ALIAS_RE.sub(lambda match: BRAND_ALIASES[match.group(1)], key)
@@ -7,25 +7,40 @@ PRESERVED ORIGINAL LOGIC - Added product search integration.
 """
 
 import json
-import google.generativeai as genai
+import asyncio
 from fastapi import HTTPException
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from ..core.config import settings
+from ..core.llm_client import llm_client
 from ..models.skincare.form_schemas import FormData, ProductExperience
-from .product_search_service import product_search_service
-
-genai.configure(api_key=settings.GEMINI_API_KEY)
+from ..models.skincare.recommendation_schemas import BudgetAllocation, FusedRecommendationResponse, FutureRecommendation, Product
+from .product_enrichment_service import product_enrichment_service
+from .budget_allocator import allocate_budget, category_weights
+from .catalog_recommender import CATEGORIES as CATALOG_CATEGORIES, catalog_recommender
+from .recommendation_cache import canonical_profile, profile_fingerprint, recommendation_cache
+from .profile_index import profile_vector
 
 
 class Phase3Service:
     """Service for Phase 3: Product Recommendation (Original logic preserved)"""
     
     def __init__(self):
-        self.model = genai.GenerativeModel('gemini-2.0-flash')
+        self.llm = llm_client
+        self.max_concurrency = settings.PHASE3_MAX_CONCURRENCY
 
-    def get_budget_allocation(self, form_data: FormData) -> Dict[str, int]:
+    def _budget_in_php(self, budget: str) -> float:
+        """Budget string ("₱1000", "$20", "1000 PHP") as an amount in PHP"""
+        budget_str = budget.replace("₱", "").replace("$", "").replace("PHP", "").replace("USD", "").strip()
+        budget_amount = float(budget_str)
+        
+        if "$" in budget or "USD" in budget.upper():
+            budget_amount = budget_amount * 56 
+        
+        return budget_amount
+
+    def _allowed_categories(self, budget_amount: float) -> List[str]:
         """
-        Generates a budget allocation based on user profile and skincare concerns.
+        Product categories the budget can cover.
         The budget is divided into four tiers based on the user's total budget:
         Tier	     Priority	                    Description
         🟢 Tier 1	Core Essentials	                Cleanser, Moisturizer, Sunscreen
@@ -33,24 +48,46 @@ class Phase3Service:
         🟠 Tier 3	Specialized Boosters	        Eye Cream, Essence, Ampoule, Exfoliants
         🔵 Tier 4	Occasional / Luxury	            Masks, Face Mist, Facial Oil, Neck Cream, Lip Care
         """
-        budget_str = form_data.budget.replace("₱", "").replace("$", "").replace("PHP", "").replace("USD", "").strip()
-        budget_amount = float(budget_str)
-        
-        if "$" in form_data.budget or "USD" in form_data.budget.upper():
-            budget_amount = budget_amount * 56 
-        
         if budget_amount < 500: 
-            allowed_categories = ["facial_wash", "moisturizer", "sunscreen"]
+            return ["facial_wash", "moisturizer", "sunscreen"]
         elif budget_amount < 800: 
-            allowed_categories = ["facial_wash", "moisturizer", "sunscreen", "treatment"]
+            return ["facial_wash", "moisturizer", "sunscreen", "treatment"]
         elif budget_amount < 1500: 
-            allowed_categories = ["facial_wash", "moisturizer", "sunscreen", "treatment", "toner", "serum"]
+            return ["facial_wash", "moisturizer", "sunscreen", "treatment", "toner", "serum"]
         else:
-            allowed_categories = [
+            return [
                 "facial_wash", "moisturizer", "sunscreen", "treatment", "toner",
                 "serum", "eye_cream", "exfoliant", "mask", "essence", "ampoule"
             ]
 
+    async def get_budget_allocation(self, form_data: FormData, mode: Optional[str] = None) -> Dict[str, int]:
+        """
+        Generates a budget allocation based on user profile and skincare concerns.
+        
+        Modes (BUDGET_ALLOCATION_MODE, overridable per call):
+        - "rules": deterministic weight table, no LLM call (default)
+        - "llm": Gemini split of the same categories, falling back to the rules
+          when the response is missing, malformed or uses other categories
+        """
+        allowed_categories = self._allowed_categories(self._budget_in_php(form_data.budget))
+        rules_allocation = allocate_budget(
+            allowed_categories,
+            form_data.skin_type,
+            form_data.skin_conditions + form_data.goals + ([form_data.custom_goal] if form_data.custom_goal else [])
+        )
+        
+        if (mode or settings.BUDGET_ALLOCATION_MODE) != "llm":
+            print("💰 Budget Allocation (rules):", rules_allocation)
+            return rules_allocation
+        
+        allocation = await self._get_llm_budget_allocation(form_data, allowed_categories)
+        if allocation is None:
+            print("⚠️ Falling back to rule-based budget allocation")
+            return rules_allocation
+        return allocation
+
+    async def _get_llm_budget_allocation(self, form_data: FormData, allowed_categories: List[str]) -> Optional[Dict[str, int]]:
+        """Gemini budget split; None when the response cannot be used"""
         categories_str = ", ".join(allowed_categories)
 
         prompt = f"""
@@ -73,25 +110,24 @@ Instructions:
 """
 
         try:
-            response = self.model.generate_content(prompt)
-            raw = getattr(response, 'text', '').strip()
-
-            print("🧪 Raw Budget Response:\n", raw)
-
-            if raw.startswith("```"):
-                raw = raw.strip("`").strip()
-                if raw.startswith("json"):
-                    raw = raw[4:].strip()
-
-            parsed = json.loads(raw)
+            response = await self.llm.generate_json(prompt, BudgetAllocation)
+            # Categories listed with 0 (or null) get nothing, whether allowed or not
+            parsed = {category: value for category, value in response.model_dump().items() if value}
+            if not parsed or not set(parsed) <= set(allowed_categories):
+                print("❌ Budget allocation uses categories outside the allowed set:", parsed)
+                return None
+            if abs(sum(float(value) for value in parsed.values()) - 100) > 1:
+                print("❌ Budget allocation does not sum to 100:", parsed)
+                return None
+            
             print("💰 Budget Allocation:", parsed)
             return parsed
 
         except Exception as e:
             print("❌ Failed to parse budget allocation:", e)
-            raise HTTPException(status_code=500, detail="Failed to allocate budget")
+            return None
 
-    def get_product_recommendations(self, category: str, budget: float, form_data: FormData, skin_analysis=None) -> List[Dict[str, Any]]:
+    async def get_product_recommendations(self, category: str, budget: float, form_data: FormData, skin_analysis=None) -> List[Dict[str, Any]]:
         """Get product recommendations - ORIGINAL LOGIC PRESERVED"""
 
         analysis_context = ""
@@ -136,31 +172,8 @@ Example format:
 """
 
         try:
-            response = self.model.generate_content(prompt)
-            raw = getattr(response, 'text', '').strip()
-
-            print(f"🧪 Raw {category} Response:\n", raw)
-
-      
-            if raw.startswith("```"):
-                lines = raw.split('\n')  
-                json_start = 1 if lines[0].startswith("```") else 0
-                json_end = len(lines)
-                for i in range(len(lines) - 1, -1, -1):
-                    if lines[i].strip() == "```":
-                        json_end = i
-                        break
-                raw = '\n'.join(lines[json_start:json_end]).strip()
-
-            raw = raw.replace("```json", "").replace("```", "").strip()
-
-            if not (raw.startswith('[') and raw.endswith(']')):
-                import re
-                json_match = re.search(r'\[.*?\]', raw, re.DOTALL)
-                if json_match:
-                    raw = json_match.group()
-
-            parsed = json.loads(raw)
+            products = await self.llm.generate_json(prompt, List[Product])
+            parsed = [product.model_dump() for product in products]
             print(f"💄 {category} products:", parsed)
             return parsed
 
@@ -168,7 +181,7 @@ Example format:
             print(f"❌ Failed to get {category} recommendations:", e)
             raise HTTPException(status_code=500, detail=f"Failed to get {category} recommendations")
 
-    def get_future_recommendations(self, form_data: FormData, current_categories: List[str], skin_analysis=None) -> List[Dict[str, Any]]:
+    async def get_future_recommendations(self, form_data: FormData, current_categories: List[str], skin_analysis=None) -> List[Dict[str, Any]]:
         """Get future recommendations - ORIGINAL LOGIC PRESERVED"""
         all_categories = [
             "facial_wash", "moisturizer", "sunscreen", "treatment", "toner",
@@ -221,24 +234,8 @@ Format:
 """
 
         try:
-            response = self.model.generate_content(prompt)
-            raw = getattr(response, 'text', '').strip()
-
-            print("🧪 Raw Future Recommendations:\n", raw)
-
-            if raw.startswith("```"):
-                lines = raw.split('\n')
-                json_start = 1 if lines[0].startswith("```") else 0
-                json_end = len(lines)
-                for i in range(len(lines) - 1, -1, -1):
-                    if lines[i].strip() == "```":
-                        json_end = i
-                        break
-                raw = '\n'.join(lines[json_start:json_end]).strip()
-
-            raw = raw.replace("```json", "").replace("```", "").strip()
-
-            parsed = json.loads(raw)
+            recommendations = await self.llm.generate_json(prompt, List[FutureRecommendation])
+            parsed = [recommendation.model_dump() for recommendation in recommendations]
             print("🔮 Future recommendations:", parsed)
             return parsed
 
@@ -255,112 +252,216 @@ Format:
         2. Searches for each product in the database cache
         3. If not found, fetches from SerpAPI and stores in cache
         4. Stores user's recommended products linked to session_id
-        """
-        enriched_products = {}
         
-        try:
-            for category, product_list in products.items():
-                enriched_category = []
-                
-                for product in product_list:
-                    product_name = product.get("name", "")
-                    recommended_price = product.get("price", "₱0.00")
-                    
-                    if not product_name:
-                        continue
-                    
-                    # Create recommendation context for this product
-                    recommendation_context = {
-                        "category": category,
-                        "recommended_price": recommended_price,
-                        "user_context": context,
-                        "ai_recommended": True
-                    }
-                    
-                    # Search for product details (cache first, then SerpAPI)
-                    product_details = await product_search_service.get_or_fetch_product(
-                        query=product_name,
-                        session_id=session_id,
-                        recommendation_context=recommendation_context
-                    )
-                    
-                    if product_details:
-                        # Combine AI recommendation with detailed product data
-                        enriched_product = {
-                            "ai_recommendation": product,  # Original AI recommendation
-                            "product_details": product_details,  # Detailed product info from SerpAPI
-                            "category": category,
-                            "enriched_at": product_details.get("fetched_at"),
-                            "search_successful": True
-                        }
-                    else:
-                        # Keep original recommendation if search fails
-                        enriched_product = {
-                            "ai_recommendation": product,
-                            "product_details": None,
-                            "category": category,
-                            "search_successful": False,
-                            "error": "Product details not found"
-                        }
-                    
-                    enriched_category.append(enriched_product)
-                
-                enriched_products[category] = enriched_category
-            
-            return enriched_products
-            
-        except Exception as e:
-            print(f"❌ Error enriching products: {e}")
-            # Return original products if enrichment fails
-            return {category: [{"ai_recommendation": p, "product_details": None, "search_successful": False} for p in products] for category, products in products.items()}
+        Lookups run in parallel through the enrichment engine.
+        """
+        enriched_products, _ = await product_enrichment_service.enrich_recommendations(
+            products, [], session_id, context
+        )
+        return enriched_products
     
     async def enrich_future_recommendations(self, future_recommendations: List[Dict[str, Any]], session_id: str, context: Dict[str, Any]) -> List[Dict[str, Any]]:
         """Enrich future recommendations with product details"""
-        enriched_future = []
-        
+        _, enriched_future = await product_enrichment_service.enrich_recommendations(
+            {}, future_recommendations, session_id, context
+        )
+        return enriched_future
+
+    async def get_fused_recommendations(self, form_data: FormData, total_budget: float, skin_analysis=None, allocation: Optional[Dict[str, int]] = None):
+        """
+        Allocation, per-category products and future recommendations from a
+        single schema-constrained Gemini call, so the user profile is sent
+        once instead of once per category. With a precomputed (rule-based)
+        allocation the model is told to use it as given. Returns (allocation,
+        products, future) or None when the response does not validate, so the
+        caller can fan out instead.
+        """
+        allowed_categories = self._allowed_categories(self._budget_in_php(form_data.budget))
+        all_categories = [
+            "facial_wash", "moisturizer", "sunscreen", "treatment", "toner",
+            "serum", "eye_cream", "exfoliant", "mask", "essence", "ampoule"
+        ]
+
+        analysis_context = ""
+        if skin_analysis:
+            analysis_context = f"""
+Skin Analysis Results:
+- Redness/Irritation: {getattr(skin_analysis, 'redness_irritation', 'N/A')}
+- Acne Breakouts: {getattr(skin_analysis, 'acne_breakouts', 'N/A')}
+- Oiliness/Shine: {getattr(skin_analysis, 'oiliness_shine', 'N/A')}
+- Dryness/Flaking: {getattr(skin_analysis, 'dryness_flaking', 'N/A')}
+- Uneven Skin Tone: {getattr(skin_analysis, 'uneven_skin_tone', 'N/A')}
+- Dark Spots/Scars: {getattr(skin_analysis, 'dark_spots_scars', 'N/A')}
+- Pore Size: {getattr(skin_analysis, 'pores_size', 'N/A')}
+"""
+
+        if allocation:
+            allocation_instructions = f"""- Use exactly this budget allocation (percent of the total budget per category): {json.dumps(allocation)}
+- Copy it unchanged into the "allocation" field"""
+        else:
+            allocation_instructions = f"""- Allocate the budget into percentages per category, using only these categories: {', '.join(allowed_categories)}
+- Allocation values must be raw numbers (not strings) that sum up to 100"""
+
+        prompt = f"""
+You are a skincare product recommendation expert. Based on the user's profile and budget, plan their routine in one response.
+
+User Profile:
+- Skin Type: {', '.join(form_data.skin_type)}
+- Skin Conditions: {', '.join(form_data.skin_conditions)}
+- Allergies: {', '.join(form_data.allergies)}
+- Product Experiences: {[f"{p.product} ({p.experience})" for p in form_data.product_experiences]}
+- Goals: {', '.join(form_data.goals + ([form_data.custom_goal] if form_data.custom_goal else []))}
+- Total Budget: ₱{total_budget} PHP
+
+{analysis_context}
+
+Instructions:
+{allocation_instructions}
+- For every allocated category, recommend 3-5 specific products within that category's share of the budget
+- Recommend 2-3 future categories (not in the allocation) from: {', '.join(all_categories)}, with 2-3 products each
+- Include real product names with prices in Philippine Peso (PHP), as strings like "₱1,299.00"
+- Consider the user's skin type, conditions, and goals
+- Avoid ingredients they're allergic to
+- Output a single JSON object, no markdown or explanations
+
+Format:
+{{
+  "allocation": {{"facial_wash": 30, "moisturizer": 40, "sunscreen": 30}},
+  "products": {{
+    "facial_wash": [{{"name": "Product Name", "price": "₱1,299.00"}}]
+  }},
+  "future_recommendations": [
+    {{"category": "serum", "products": [{{"name": "Product Name", "price": "₱1,680.00"}}]}}
+  ]
+}}
+"""
+
         try:
-            for recommendation in future_recommendations:
-                category = recommendation.get("category", "")
-                products = recommendation.get("products", [])
-                
-                enriched_products = []
-                for product in products:
-                    product_name = product.get("name", "")
-                    
-                    if product_name:
-                        recommendation_context = {
-                            "category": category,
-                            "recommended_price": product.get("price", "$0.00"),
-                            "user_context": context,
-                            "ai_recommended": True,
-                            "future_recommendation": True
-                        }
-                        
-                        product_details = await product_search_service.get_or_fetch_product(
-                            query=product_name,
-                            session_id=session_id,
-                            recommendation_context=recommendation_context
-                        )
-                        
-                        enriched_product = {
-                            "ai_recommendation": product,
-                            "product_details": product_details,
-                            "search_successful": product_details is not None
-                        }
-                        enriched_products.append(enriched_product)
-                
-                enriched_future.append({
-                    "category": category,
-                    "products": enriched_products
-                })
-            
-            return enriched_future
-            
+            response = await self.llm.generate_json(prompt, FusedRecommendationResponse)
+            products = response.products.model_dump(exclude_none=True)
+
+            if allocation is None:
+                allocation = response.allocation.model_dump(exclude_none=True)
+                if not allocation or not set(allocation) <= set(allowed_categories):
+                    print("❌ Fused allocation uses categories outside the allowed set:", allocation)
+                    return None
+                if abs(sum(allocation.values()) - 100) > 1:
+                    print("❌ Fused allocation does not sum to 100:", allocation)
+                    return None
+
+            missing = [category for category in allocation if not products.get(category)]
+            if missing:
+                print("❌ Fused response has no products for:", missing)
+                return None
+
+            products = {category: products[category] for category in allocation}
+            future = [
+                recommendation.model_dump()
+                for recommendation in response.future_recommendations
+                if recommendation.category not in allocation and recommendation.products
+            ]
+            print(f"🧩 Fused recommendations: {sum(len(p) for p in products.values())} products, {len(future)} future categories")
+            return allocation, products, future
+
         except Exception as e:
-            print(f"❌ Error enriching future recommendations: {e}")
-            return future_recommendations
+            print("❌ Failed to parse fused recommendations:", e)
+            return None
+
+    async def _generate_recommendations(self, form_data: FormData, skin_analysis, total_budget: float, allocation_mode: str, engine: str = "llm", prompt_mode: str = "fanout"):
+        """
+        Budget allocation, per-category products and future recommendations
+        for a total budget in PHP.
+        With engine="catalog" products come from the catalog recommender and
+        Gemini is only called for categories the catalog cannot fill. With
+        prompt_mode="fused" (LLM engine only) everything comes from one call,
+        falling back to the fan-out calls when it fails.
+        """
+        if engine != "catalog" and prompt_mode == "fused":
+            allocation = None
+            if allocation_mode != "llm":
+                allocation = await self.get_budget_allocation(form_data, mode=allocation_mode)
+            fused = await self.get_fused_recommendations(form_data, total_budget, skin_analysis, allocation=allocation)
+            if fused:
+                return fused
+            print("⚠️ Falling back to fan-out recommendation prompts")
+
+        # Budget allocation (rule-based unless LLM mode is requested)
+        allocation = await self.get_budget_allocation(form_data, mode=allocation_mode)
+        
+        catalog_products = {}
+        catalog_future = None
+        if engine == "catalog":
+            catalog_products, catalog_future = self._catalog_recommendations(form_data, allocation, total_budget)
+
+        # Product and future recommendations run concurrently
+        # (original prompts preserved; calls are independent of each other)
+        product_categories = list(allocation.keys())
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def bounded(coro):
+            async with semaphore:
+                return await coro
+
+        async def ready(value):
+            return value
+
+        category_tasks = []
+        for category, percent in allocation.items():
+            category_budget = round((percent / 100) * total_budget, 2)
+            print(f"🧮 Budget for {category}: ₱{category_budget}")
+            if category in catalog_products:
+                category_tasks.append(ready(catalog_products[category]))
+                continue
+            category_tasks.append(bounded(
+                self.get_product_recommendations(category, category_budget, form_data, skin_analysis)
+            ))
+
+        if catalog_future is not None:
+            future_task = ready(catalog_future)
+        else:
+            future_task = bounded(self.get_future_recommendations(
+                form_data,
+                current_categories=product_categories,
+                skin_analysis=skin_analysis
+            ))
+
+        *category_products, future = await asyncio.gather(*category_tasks, future_task)
+        return allocation, dict(zip(product_categories, category_products)), future
+
+    def _catalog_recommendations(self, form_data: FormData, allocation: Dict[str, int], total_budget: float):
+        """
+        Products and future recommendations from the local catalog.
+        Categories with fewer than CATALOG_MIN_PRODUCTS matches are left out
+        (and the future list is None) so the caller can ask Gemini instead.
+        """
+        products = {}
+        for category, percent in allocation.items():
+            picks = catalog_recommender.recommend(
+                category,
+                round((percent / 100) * total_budget, 2),
+                form_data.skin_type,
+                form_data.allergies,
+                k=5
+            )
+            if len(picks) >= settings.CATALOG_MIN_PRODUCTS:
+                products[category] = picks
+        
+        # Future categories: the highest-weighted categories outside the allocation
+        concerns = form_data.skin_conditions + form_data.goals + ([form_data.custom_goal] if form_data.custom_goal else [])
+        remaining = [category for category in CATALOG_CATEGORIES if category not in allocation]
+        weights = category_weights(remaining, form_data.skin_type, concerns)
+        future = []
+        for category in sorted(remaining, key=lambda category: weights[category], reverse=True):
+            picks = catalog_recommender.recommend(category, total_budget, form_data.skin_type, form_data.allergies, k=3)
+            if len(picks) >= 2:
+                future.append({"category": category, "products": picks})
+            if len(future) == 3:
+                break
+        
+        print(f"🧭 Catalog engine filled {len(products)}/{len(allocation)} categories")
+        return products, (future if len(future) >= 2 or not remaining else None)
 
-    async def budget_distribution(self, data: dict, session_id: str) -> Dict[str, Any]:
+    async def budget_distribution(self, data: dict, session_id: str, allocation_mode: Optional[str] = None, reuse_mode: Optional[str] = None, engine: Optional[str] = None, prompt_mode: Optional[str] = None) -> Dict[str, Any]:
         """
         Main budget distribution function with product search integration.
         
@@ -381,28 +482,47 @@ Format:
                             setattr(self, key, value)
                 skin_analysis = SkinAnalysis(skin_analysis_data)
 
-            # Step 1: Budget allocation (original logic preserved)
-            allocation = self.get_budget_allocation(form_data)
-
-            # Step 2: Convert total budget
+            # Step 1: Reuse LLM output for an equivalent (or, in "similar" mode, the nearest) profile
+            mode = allocation_mode or settings.BUDGET_ALLOCATION_MODE
+            prompt_mode = prompt_mode or settings.PHASE3_PROMPT_MODE
+            budget_php = self._budget_in_php(form_data.budget)
+            profile = canonical_profile(form_data, budget_php, skin_analysis_data, mode, prompt_mode)
+            fingerprint = profile_fingerprint(profile)
+            vector = profile_vector(profile, budget_php)
+            engine = engine or settings.RECOMMENDATION_ENGINE
+            cached = None
+            if engine != "catalog":
+                cached = await recommendation_cache.get(fingerprint)
+                if not cached and (reuse_mode or settings.RECOMMENDATION_REUSE_MODE) == "similar":
+                    cached = await recommendation_cache.get_similar(profile, vector, exclude=fingerprint)
+
+            # Step 2: Convert total budget (display value; budgets and prices are in PHP)
             total_budget = float(form_data.budget.replace("$", "").strip())
 
-            # Step 3: Generate AI product recommendations (original logic preserved)
-            product_results = {}
-            product_categories = list(allocation.keys())
-
-            for category, percent in allocation.items():
-                category_budget = round((percent / 100) * total_budget, 2)
-                print(f"🧮 Budget for {category}: ${category_budget}")
-                products = self.get_product_recommendations(category, category_budget, form_data, skin_analysis)
-                product_results[category] = products
-
-            # Step 4: Generate future recommendations (original logic preserved)
-            future = self.get_future_recommendations(
-                form_data,
-                current_categories=product_categories,
-                skin_analysis=skin_analysis
-            )
+            if cached:
+                print(f"⚡ Recommendation cache hit for profile {fingerprint[:12]}")
+                allocation = cached["allocation"]
+                product_results = cached["products"]
+                future = cached["future_recommendations"]
+            elif engine == "catalog":
+                # Catalog picks are cheap and track the live catalog, so they are not cached
+                allocation, product_results, future = await self._generate_recommendations(
+                    form_data, skin_analysis, budget_php, mode, engine="catalog"
+                )
+            else:
+                allocation, product_results, future = await self._generate_recommendations(
+                    form_data, skin_analysis, budget_php, mode, prompt_mode=prompt_mode
+                )
+                await recommendation_cache.set(fingerprint, profile, {
+                    "allocation": allocation,
+                    "products": product_results,
+                    "future_recommendations": future
+                }, vector=vector)
+
+            category_budgets = {
+                category: round((percent / 100) * budget_php, 2)
+                for category, percent in allocation.items()
+            }
 
             # Step 5: NEW - Enrich products with detailed information from database/SerpAPI
             user_context = {
@@ -412,18 +532,28 @@ Format:
                 "goals": form_data.goals
             }
             
-            enriched_products = await self.enrich_products_with_details(
+            # Current and future products are enriched together in one parallel batch
+            enriched_products, enriched_future = await product_enrichment_service.enrich_recommendations(
                 products=product_results,
-                session_id=session_id,
-                context=user_context
-            )
-            
-            enriched_future = await self.enrich_future_recommendations(
                 future_recommendations=future,
                 session_id=session_id,
-                context=user_context
+                context=user_context,
+                category_budgets=category_budgets,
+                allergies=form_data.allergies
             )
 
+            # Products dropped for allergen conflicts are left out of the API response too
+            searched_products = sum(len(products) for products in product_results.values())
+            if form_data.allergies:
+                product_results = {
+                    category: [entry["ai_recommendation"] for entry in entries]
+                    for category, entries in enriched_products.items()
+                }
+                future = [
+                    {**recommendation, "products": [entry["ai_recommendation"] for entry in enriched_future[index]["products"]]}
+                    for index, recommendation in enumerate(future)
+                ]
+
             # Step 6: Prepare response in original format for API compatibility
             # Store enriched data separately for database
             enriched_response = {
@@ -432,7 +562,11 @@ Format:
                 "total_budget": f"${total_budget}",
                 "future_recommendations": enriched_future,
                 "enrichment_summary": {
-                    "total_products_searched": sum(len(products) for products in product_results.values()),
+                    "total_products_searched": searched_products,
+                    "allergen_conflicts_dropped": searched_products - sum(len(products) for products in product_results.values()),
+                    "successful_searches": sum(
+                        1 for products in enriched_products.values() for product in products if product["search_successful"]
+                    ),
                     "session_id": session_id,
                     "search_completed": True
                 }
@@ -5,41 +5,150 @@ Handles product searching via SerpAPI and database caching.
 Based on serpapi_immersive.py logic with MongoDB integration.
 """
 
-import requests
-import json
+import os
+import math
+import uuid
+import socket
+import asyncio
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Tuple, Callable, Awaitable
 from urllib.parse import urlparse, parse_qs
+import httpx
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import TEXT, ReplaceOne, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
 
 from ..core.config import settings
 from ..core.database import Database
+from ..core.http_client import HTTPClient
+from .product_cache import ProductL1Cache, product_l1_cache
+from .catalog_index import catalog_indexes
+from .allergen_index import ingredient_tokens
+from .single_flight import SingleFlight
+from .background_queue import BackgroundQueue
+from . import product_freshness
+from .product_normalizer import canonical_product_key, clean_search_query
+
+# (min_price, max_price) in PHP; either bound may be None
+PriceBand = Tuple[Optional[float], Optional[float]]
 
 
 class ProductSearchService:
     """Service for searching and caching product data"""
     
+    # Negative cache reason codes
+    NEGATIVE_NO_RESULTS = "no_results"
+    NEGATIVE_API_ERROR = "api_error"
+    NEGATIVE_HTTP_ERROR = "http_error"
+    NEGATIVE_REQUEST_FAILED = "request_failed"
+    
+    # Detail (second-stage) fetch states
+    DETAILS_PENDING = "pending"
+    DETAILS_FETCHED = "fetched"
+    DETAILS_UNAVAILABLE = "unavailable"
+    DETAIL_FIELDS = [
+        "detailed_description", "highlights", "specifications", "about_this_item",
+        "ingredients", "directions", "warnings", "detailed_rating", "detailed_reviews",
+        "media", "variants", "seller_info", "description"
+    ]
+    # Fields describing the specific product an entry holds (details, batch-job tags)
+    PRODUCT_SPECIFIC_FIELDS = DETAIL_FIELDS + ["details_status", "details_fetched_at", "ingredient_tokens", "classification"]
+    
     def __init__(self):
         self.api_key = settings.SERPAPI_KEY
+        self.serpapi_url = "https://serpapi.com/search.json"
         self.products_cache_collection = "products_cache"  # Existing cache
         self.user_products_collection = "user_recommended_products"  # New collection
+        self.fetch_leases_collection = "product_fetch_leases"  # Cross-worker fetch leases
+        self.negative_cache_collection = "products_negative_cache"  # Products SerpAPI could not find
+        self.negative_l1_cache = ProductL1Cache(
+            maxsize=settings.PRODUCT_L1_CACHE_SIZE,
+            ttl=min(settings.PRODUCT_L1_CACHE_TTL_SECONDS, settings.NEGATIVE_CACHE_ERROR_TTL_SECONDS)
+        )
+        self.negative_cache_stats = {"hits": 0, "recorded": 0}
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.fetch_flight = SingleFlight()
+        self._background_tasks = set()
+        self.details_queue = BackgroundQueue(
+            self._fetch_details_for_query,
+            workers=settings.PRODUCT_DETAILS_WORKERS,
+            maxsize=settings.PRODUCT_DETAILS_QUEUE_SIZE,
+            name="product-details"
+        )
     
     def _get_database(self) -> AsyncIOMotorDatabase:
         """Get MongoDB database instance"""
         return Database.get_database()
     
-    async def search_product_in_cache(self, query: str) -> Optional[Dict[str, Any]]:
-        """Search for product in existing cache by query"""
+    def _get_http_client(self) -> httpx.AsyncClient:
+        """Get the shared pooled HTTP client"""
+        return HTTPClient.get_client()
+    
+    def _cache_key(self, query: str) -> str:
+        """Canonical cache key used as the products_cache primary key"""
+        return canonical_product_key(query)
+    
+    async def ensure_indexes(self) -> None:
+        """Create the indexes used by cache lookups (safe to call on every startup)"""
         try:
+            db = self._get_database()
+            products_cache = db[self.products_cache_collection]
+            await products_cache.create_index("key")
+            await products_cache.create_index("product_id", sparse=True)
+            await products_cache.create_index(
+                [("key", TEXT), ("title", TEXT)],
+                name="products_cache_text",
+                default_language="none"
+            )
+            await db[self.products_cache_collection].create_index(
+                [("classification.category", 1), ("classification.price_tier", 1)], sparse=True
+            )
+            await db[self.products_cache_collection].create_index("classification.skin_types", sparse=True)
+            await db[self.products_cache_collection].create_index("ingredient_tokens", sparse=True)
+            await db[self.products_cache_collection].create_index("cached_at")
+            await db[self.products_cache_collection].create_index("details_fetched_at", sparse=True)
+            await db[self.user_products_collection].create_index("session_id")
+            await db[self.fetch_leases_collection].create_index("expires_at", expireAfterSeconds=0)
+            await db[self.negative_cache_collection].create_index("expires_at", expireAfterSeconds=0)
+        except Exception as e:
+            print(f"❌ Error creating product cache indexes: {e}")
+    
+    async def search_product_in_cache(self, query: str, exact: bool = True) -> Optional[Dict[str, Any]]:
+        """
+        Search for product in existing cache by query.
+        Pass exact=False when the exact-key lookup was already done in bulk.
+        """
+        try:
+            query_key = self._cache_key(query)
             db = self._get_database()
             collection = db[self.products_cache_collection]
             
-            # Search by query (case-insensitive)
-            query_key = query.lower().strip()
-            product = await collection.find_one({"query": {"$regex": query_key, "$options": "i"}})
+            if exact:
+                # L1: in-process cache
+                product = product_l1_cache.get(query_key)
+                if product:
+                    return product
+                
+                # Exact lookup on the normalized primary key, then on the key field
+                # (documents created through the /products routes have ObjectId _ids)
+                product = await collection.find_one({"_id": query_key})
+                if not product:
+                    product = await collection.find_one({"key": query_key})
+                
+                if product:
+                    print(f"✅ Found '{query}' in cache")
+                    product_l1_cache.set(query_key, product)
+                    return product
+            
+            # Fuzzy fallback: in-memory trigram index, or the text index until it has loaded
+            if catalog_indexes.ready:
+                product = await self._search_cache_by_trigrams(collection, query_key)
+            else:
+                product = await self._search_cache_by_text(collection, query_key)
             
             if product:
-                print(f"✅ Found '{query}' in cache")
+                print(f"✅ Found '{query}' in cache (fuzzy match: '{product.get('key')}')")
+                product_l1_cache.set(query_key, product)
                 return product
             
             return None
@@ -48,33 +157,110 @@ class ProductSearchService:
             print(f"❌ Error searching cache for '{query}': {e}")
             return None
     
-    def _clean_product_query(self, query: str) -> str:
-        """Clean product query for better SerpAPI results"""
-        import re
-        
-        # Remove parenthetical notes and instructions
-        cleaned = re.sub(r'\s*\([^)]*\)', '', query)
-        
-        # Remove common skincare instructions that might confuse search
-        instructions_to_remove = [
-            "patch test only",
-            "use sparingly", 
-            "for sensitive skin",
-            "apply at night",
-            "morning use only",
-            "evening use only"
-        ]
+    async def find_many_in_cache(self, queries: List[str]) -> Dict[str, Dict[str, Any]]:
+        """
+        Exact-key cache lookup for a batch of queries.
+        Names are normalized and de-duplicated; everything not in the L1 cache
+        is fetched with a single query on _id or key. Returns cache key -> product.
+        """
+        hits = {}
+        missing_keys = []
         
-        for instruction in instructions_to_remove:
-            cleaned = cleaned.replace(instruction, '')
+        for query_key in dict.fromkeys(self._cache_key(query) for query in queries):
+            product = product_l1_cache.get(query_key)
+            if product:
+                hits[query_key] = product
+            else:
+                missing_keys.append(query_key)
         
-        # Clean up extra whitespace and normalize
-        cleaned = re.sub(r'\s+', ' ', cleaned).strip()
+        if not missing_keys:
+            return hits
         
-        return cleaned
+        total_keys = len(hits) + len(missing_keys)
+        try:
+            db = self._get_database()
+            collection = db[self.products_cache_collection]
+            
+            query = {"$or": [{"_id": {"$in": missing_keys}}, {"key": {"$in": missing_keys}}]}
+            async for product in collection.find(query):
+                by_id = isinstance(product["_id"], str)
+                query_key = product["_id"] if by_id else product.get("key")
+                if not by_id and query_key in hits:
+                    continue  # an _id match wins over a CRUD document with the same key
+                hits[query_key] = product
+                product_l1_cache.set(query_key, product)
+            
+            print(f"✅ Bulk cache lookup: {len(hits)}/{total_keys} products found")
+            
+        except Exception as e:
+            print(f"❌ Error in bulk cache lookup: {e}")
+        
+        return hits
+    
+    async def _search_cache_by_trigrams(self, collection, query_key: str) -> Optional[Dict[str, Any]]:
+        """Most similar cached product by trigram similarity (PRODUCT_FUZZY_MATCH_THRESHOLD)"""
+        match_key = catalog_indexes.match(query_key)
+        if match_key is None or match_key == query_key:
+            return None
+        
+        product = product_l1_cache.get(match_key)
+        if product:
+            return product
+        
+        product = await collection.find_one({"_id": match_key})
+        if product is None:
+            product = await collection.find_one({"key": match_key})
+        if product is None:
+            # Removed or re-keyed since it was indexed
+            catalog_indexes.remove_product(match_key)
+            return None
+        
+        product_l1_cache.set(match_key, product)
+        return product
+    
+    async def _search_cache_by_text(self, collection, query_key: str) -> Optional[Dict[str, Any]]:
+        """
+        Best text-index match for a query, accepted only when it covers enough
+        of the query's words (PRODUCT_CACHE_FUZZY_MIN_COVERAGE).
+        """
+        query_terms = set(query_key.split())
+        if not query_terms:
+            return None
+        
+        cursor = collection.find(
+            {"$text": {"$search": query_key}},
+            {"score": {"$meta": "textScore"}}
+        ).sort([("score", {"$meta": "textScore"})]).limit(1)
+        
+        candidates = await cursor.to_list(length=1)
+        if not candidates:
+            return None
+        
+        product = candidates[0]
+        product.pop("score", None)
+        
+        candidate_terms = set(f"{product.get('key', '')} {self._cache_key(product.get('title', ''))}".split())
+        coverage = len(query_terms & candidate_terms) / len(query_terms)
+        if coverage < settings.PRODUCT_CACHE_FUZZY_MIN_COVERAGE:
+            return None
+        
+        return product
+    
+    def _clean_product_query(self, query: str) -> str:
+        """Clean product query for better SerpAPI results"""
+        return clean_search_query(query)
 
     async def fetch_product_from_serpapi(self, query: str) -> Optional[Dict[str, Any]]:
-        """Fetch product data from SerpAPI using Google Shopping with detailed descriptions"""
+        """
+        Fetch shopping-level product data from SerpAPI using Google Shopping.
+        Detail data (description, ingredients, media...) is fetched lazily by
+        fetch_product_details().
+        """
+        product_data, _ = await self._fetch_product(query)
+        return product_data
+    
+    async def _search_shopping(self, query: str) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """Google Shopping search returning (shopping_results, failure_reason)"""
         try:
             # Clean up query
             cleaned_query = self._clean_product_query(query)
@@ -88,114 +274,334 @@ class ProductSearchService:
                 "gl": "ph"   # Country: Philippines (for PHP prices)
             }
             
-            search_res = requests.get("https://serpapi.com/search.json", params=search_params)
+            client = self._get_http_client()
+            search_res = await client.get(self.serpapi_url, params=search_params)
             
             if search_res.status_code != 200:
                 print(f"❌ SerpAPI request failed for '{query}'")
-                return None
+                return [], self.NEGATIVE_HTTP_ERROR
                 
             data = search_res.json()
             
             # Check for errors in response
             if "error" in data:
                 print(f"❌ SerpAPI Error for '{query}': {data['error']}")
-                return None
+                # SerpAPI reports an empty search as an error message
+                if "returned any results" in str(data["error"]):
+                    return [], self.NEGATIVE_NO_RESULTS
+                return [], self.NEGATIVE_API_ERROR
             
             # Extract from shopping_results
             shopping_results = data.get("shopping_results", [])
             if not shopping_results:
                 print(f"❌ No shopping results found for '{query}'")
-                return None
-                
-            first_result = shopping_results[0]
+                return [], self.NEGATIVE_NO_RESULTS
             
-            # Start with basic product data
-            product_data = {
-                "query": query,
-                "title": first_result.get("title"),
-                "price": first_result.get("price"),
-                "thumbnail": first_result.get("thumbnail"),
-                "rating": first_result.get("rating"),
-                "reviews": first_result.get("reviews"),
-                "source": "shopping_results",
-                "fetched_at": datetime.now().isoformat(),
-                "position": first_result.get("position"),
-                "product_id": first_result.get("product_id"),
-                "delivery": first_result.get("delivery"),
-                "store": first_result.get("source") or first_result.get("merchant"),
-                "product_link": first_result.get("product_link") or first_result.get("link"),
-                "extracted_price": first_result.get("extracted_price"),
-                "basic_snippet": first_result.get("snippet", ""),
-            }
-            
-            # Try to get detailed product description from product API
-            product_api_url = first_result.get("serpapi_product_api")
-            detailed_description = ""
-            
-            if product_api_url:
-                try:
-                    # Parse and prepare product API parameters
-                    parsed_url = urlparse(product_api_url)
-                    product_params = parse_qs(parsed_url.query)
-                    product_params = {k: v[0] for k, v in product_params.items()}
-                    product_params["api_key"] = self.api_key
-                    
-                    # Fetch detailed product data
-                    product_res = requests.get("https://serpapi.com/search.json", params=product_params)
-                    
-                    if product_res.status_code == 200:
-                        product_detail_data = product_res.json()
-                        
-                        # Extract detailed information
-                        product_results = product_detail_data.get("product_results", {})
-                        
-                        # Get the full description
-                        detailed_description = (
-                            product_results.get("description") or 
-                            product_results.get("about_this_item") or
-                            product_results.get("product_description") or
-                            ""
-                        )
-                        
-                        # Add more detailed information if available
-                        if product_results:
-                            product_data.update({
-                                "detailed_description": detailed_description,
-                                "highlights": product_results.get("highlights", []),
-                                "specifications": product_results.get("specifications", {}),
-                                "about_this_item": product_results.get("about_this_item"),
-                                "ingredients": product_results.get("ingredients"),
-                                "directions": product_results.get("directions"),
-                                "warnings": product_results.get("warnings"),
-                                "detailed_rating": product_results.get("rating"),
-                                "detailed_reviews": product_results.get("reviews"),
-                                "media": product_results.get("media", []),
-                                "variants": product_results.get("variants", []),
-                                "seller_info": product_results.get("sellers", []),
-                            })
-                        
-                except Exception as e:
-                    # Silently continue if detailed fetch fails
-                    pass
-            
-            # Use the best available description
-            final_description = (
-                detailed_description or 
-                product_data.get("basic_snippet", "") or
-                "No description available"
-            )
-            
-            product_data["description"] = final_description
-            
-            # Clean up None values and empty strings
-            product_data = {k: v for k, v in product_data.items() if v is not None and v != "" and v != []}
-            
-            print(f"✅ Successfully fetched '{query}' from SerpAPI")
-            return product_data
+            return shopping_results, None
             
         except Exception as e:
             print(f"❌ Error fetching '{query}' from SerpAPI: {e}")
+            return [], self.NEGATIVE_REQUEST_FAILED
+    
+    def _build_product_data(self, query: str, result: Dict[str, Any]) -> Dict[str, Any]:
+        """Shopping-level product record for one shopping result"""
+        product_api_url = result.get("serpapi_product_api")
+        
+        product_data = {
+            "query": query,
+            "title": result.get("title"),
+            "price": result.get("price"),
+            "thumbnail": result.get("thumbnail"),
+            "rating": result.get("rating"),
+            "reviews": result.get("reviews"),
+            "source": "shopping_results",
+            "fetched_at": datetime.now().isoformat(),
+            "position": result.get("position"),
+            "product_id": result.get("product_id"),
+            "delivery": result.get("delivery"),
+            "store": result.get("source") or result.get("merchant"),
+            "product_link": result.get("product_link") or result.get("link"),
+            "extracted_price": result.get("extracted_price"),
+            "basic_snippet": result.get("snippet", ""),
+            "product_api_url": product_api_url,
+            "details_status": self.DETAILS_PENDING if product_api_url else self.DETAILS_UNAVAILABLE,
+        }
+        
+        # Best available description until details are fetched
+        product_data["description"] = product_data.get("basic_snippet", "") or "No description available"
+        
+        # Clean up None values and empty strings
+        return {k: v for k, v in product_data.items() if v is not None and v != "" and v != []}
+    
+    async def ingest_shopping_results(self, search_query: str, shopping_results: List[Dict[str, Any]], selected_result: Optional[Dict[str, Any]] = None) -> int:
+        """
+        Harvest every shopping result of a search into the products cache.
+        
+        Each result is upserted under its normalized title with provenance
+        metadata, so later lookups for those products are cache hits. Results
+        are de-duplicated by product_id: one already cached under any key (or
+        the selected result, which is cached under the search query) only has
+        the search added to its provenance. Existing entries are not
+        overwritten. Returns the number of newly inserted products.
+        """
+        now = datetime.utcnow()
+        search_key = self._cache_key(search_query)
+        selected_id = (selected_result or {}).get("product_id")
+        records = {}
+        seen_ids = set()
+        
+        for result in shopping_results[:settings.PRODUCT_HARVEST_MAX_RESULTS]:
+            title = result.get("title")
+            product_id = result.get("product_id")
+            if not title or result is selected_result or (product_id and product_id in seen_ids | {selected_id}):
+                continue
+            
+            key = self._cache_key(title)
+            if not key or key == search_key or key in records:
+                continue
+            
+            record = self._build_product_data(title, result)
+            record.update({
+                "key": key,
+                "cached_at": now,
+                "provenance.source": "serpapi_google_shopping",
+                "provenance.search_query": search_query,
+                "provenance.position": result.get("position"),
+                "provenance.harvested_at": now,
+            })
+            records[key] = record
+            if product_id:
+                seen_ids.add(product_id)
+        
+        if not records:
+            return 0
+        
+        try:
+            collection = self._get_database()[self.products_cache_collection]
+            
+            # Products already cached under another key (query or title) are not inserted again
+            cached_ids = {}
+            if seen_ids:
+                async for document in collection.find({"product_id": {"$in": list(seen_ids)}}, {"product_id": 1}):
+                    cached_ids[document["product_id"]] = document["_id"]
+            
+            operations = []
+            for key, record in records.items():
+                cached_key = cached_ids.get(record.get("product_id"))
+                if cached_key:
+                    operations.append(UpdateOne(
+                        {"_id": cached_key},
+                        {"$addToSet": {"provenance.search_queries": search_query}}
+                    ))
+                else:
+                    operations.append(UpdateOne(
+                        {"_id": key},
+                        {
+                            "$setOnInsert": record,
+                            "$addToSet": {"provenance.search_queries": search_query}
+                        },
+                        upsert=True
+                    ))
+            
+            result = await collection.bulk_write(operations, ordered=False)
+            print(f"📥 Harvested {result.upserted_count} new products from '{search_query}'")
+            
+            for key in result.upserted_ids.values():
+                catalog_indexes.add_product({"_id": key, "title": records[key].get("title")})
+            return result.upserted_count
+        
+        except Exception as e:
+            print(f"❌ Error harvesting shopping results for '{search_query}': {e}")
+            return 0
+    
+    def _run_in_background(self, coro) -> None:
+        """Run a coroutine off the request's critical path"""
+        task = asyncio.ensure_future(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+    
+    @staticmethod
+    def _in_price_band(price: Optional[float], price_band: Optional[PriceBand]) -> bool:
+        """Whether an extracted price falls inside a price band"""
+        if not price_band:
+            return True
+        if price is None:
+            return False
+        min_price, max_price = price_band
+        return (min_price is None or price >= min_price) and (max_price is None or price <= max_price)
+    
+    def _select_result(self, shopping_results: List[Dict[str, Any]], price_band: Optional[PriceBand] = None) -> Tuple[Dict[str, Any], bool]:
+        """
+        Pick the shopping result to cache for a query, returning (result, in_band).
+        
+        Without a price band this is the first result (SerpAPI's own ranking).
+        With one, in-band results are ranked by position, rating and review
+        count; if none are in band the first result is used.
+        """
+        if not price_band:
+            return shopping_results[0], True
+        
+        in_band = [
+            result for result in shopping_results
+            if self._in_price_band(result.get("extracted_price"), price_band)
+        ]
+        if not in_band:
+            return shopping_results[0], False
+        
+        result_count = len(shopping_results)
+        
+        def score(result: Dict[str, Any]) -> float:
+            position = result.get("position") or result_count
+            position_score = 1 - (min(position, result_count) - 1) / result_count
+            rating_score = (result.get("rating") or 0) / 5
+            reviews_score = min(math.log10((result.get("reviews") or 0) + 1) / 4, 1)
+            return 0.5 * position_score + 0.3 * rating_score + 0.2 * reviews_score
+        
+        return max(in_band, key=score), True
+    
+    def _product_from_results(self, query: str, shopping_results: List[Dict[str, Any]], price_band: Optional[PriceBand] = None) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+        """Select a shopping result for a price band; returns (selected_result, product_data)"""
+        selected_result, in_band = self._select_result(shopping_results, price_band)
+        product_data = self._build_product_data(query, selected_result)
+        if price_band:
+            product_data["selection"] = {"price_band": list(price_band), "in_band": in_band}
+        return selected_result, product_data
+    
+    async def _search_and_select(self, query: str, price_band: Optional[PriceBand] = None) -> Tuple[Optional[Dict[str, Any]], Optional[str], List[Dict[str, Any]]]:
+        """SerpAPI fetch returning (product_data, failure_reason, shopping_results)"""
+        shopping_results, failure_reason = await self._search_shopping(query)
+        
+        if not shopping_results:
+            return None, failure_reason, []
+        
+        selected_result, product_data = self._product_from_results(query, shopping_results, price_band)
+        if settings.PRODUCT_HARVEST_ENABLED:
+            self._run_in_background(self.ingest_shopping_results(query, shopping_results, selected_result))
+        
+        print(f"✅ Successfully fetched '{query}' from SerpAPI")
+        return product_data, None, shopping_results
+    
+    async def _fetch_product(self, query: str, price_band: Optional[PriceBand] = None) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """SerpAPI fetch returning (product_data, failure_reason); reason is None on success"""
+        product_data, failure_reason, _ = await self._search_and_select(query, price_band)
+        return product_data, failure_reason
+    
+    async def _fetch_detail_fields(self, product_api_url: str) -> Optional[Dict[str, Any]]:
+        """Call the SerpAPI product API and extract the detail fields"""
+        # Parse and prepare product API parameters
+        parsed_url = urlparse(product_api_url)
+        product_params = parse_qs(parsed_url.query)
+        product_params = {k: v[0] for k, v in product_params.items()}
+        product_params["api_key"] = self.api_key
+        
+        # Fetch detailed product data
+        client = self._get_http_client()
+        product_res = await client.get(self.serpapi_url, params=product_params)
+        
+        if product_res.status_code != 200:
+            return None
+        
+        # Extract detailed information
+        product_results = product_res.json().get("product_results", {})
+        if not product_results:
             return None
+        
+        # Get the full description
+        detailed_description = (
+            product_results.get("description") or 
+            product_results.get("about_this_item") or
+            product_results.get("product_description") or
+            ""
+        )
+        
+        detail_fields = {
+            "detailed_description": detailed_description,
+            "highlights": product_results.get("highlights", []),
+            "specifications": product_results.get("specifications", {}),
+            "about_this_item": product_results.get("about_this_item"),
+            "ingredients": product_results.get("ingredients"),
+            "directions": product_results.get("directions"),
+            "warnings": product_results.get("warnings"),
+            "detailed_rating": product_results.get("rating"),
+            "detailed_reviews": product_results.get("reviews"),
+            "media": product_results.get("media", []),
+            "variants": product_results.get("variants", []),
+            "seller_info": product_results.get("sellers", []),
+        }
+        
+        if detailed_description:
+            detail_fields["description"] = detailed_description
+        
+        return {k: v for k, v in detail_fields.items() if v is not None and v != "" and v != []}
+    
+    def _needs_details(self, product_data: Dict[str, Any]) -> bool:
+        """Whether a product's detail data is missing or past its freshness window"""
+        if not product_data.get("product_api_url"):
+            return False
+        if product_data.get("details_status") == self.DETAILS_PENDING or not product_data.get("details_fetched_at"):
+            return True
+        return product_freshness.details_status(product_data) == product_freshness.EXPIRED
+    
+    async def fetch_product_details(self, product_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Second-stage fetch: load detail data for a cached product and store it
+        on the cache entry. Returns the product with details merged in; on
+        failure the product is returned unchanged.
+        """
+        if not self._needs_details(product_data):
+            return product_data
+        
+        query_key = self._cache_key(product_data["query"])
+        
+        async def fetch_details():
+            try:
+                detail_fields = await self._fetch_detail_fields(product_data["product_api_url"])
+            except Exception as e:
+                print(f"❌ Error fetching details for '{product_data['query']}': {e}")
+                return None
+            
+            if detail_fields is None:
+                detail_fields = {}
+            tokens = ingredient_tokens(detail_fields)
+            if tokens:
+                detail_fields["ingredient_tokens"] = tokens
+            detail_fields.update({
+                "details_status": self.DETAILS_FETCHED if detail_fields else self.DETAILS_UNAVAILABLE,
+                "details_fetched_at": datetime.utcnow()
+            })
+            
+            try:
+                # Only store details on the cache entry if it still holds this product
+                # (a caller's own price-band pick may differ from the cached one)
+                cache_filter = {"_id": query_key}
+                if product_data.get("product_id"):
+                    cache_filter["product_id"] = product_data["product_id"]
+                collection = self._get_database()[self.products_cache_collection]
+                result = await collection.update_one(cache_filter, {"$set": detail_fields})
+                if result.matched_count:
+                    product_l1_cache.invalidate(query_key)
+                    catalog_indexes.allergens.add(query_key, tokens)
+            except Exception as e:
+                print(f"❌ Error saving details for '{product_data['query']}': {e}")
+            
+            print(f"✅ Fetched details for '{product_data['query']}'")
+            return detail_fields
+        
+        detail_fields = await self.fetch_flight.do(f"details:{query_key}|{product_data.get('product_id')}", fetch_details)
+        if not detail_fields:
+            return product_data
+        
+        return {**product_data, **detail_fields}
+    
+    async def _fetch_details_for_query(self, query: str) -> None:
+        """Background worker job: fetch details for a cached product"""
+        product_data = await self.search_product_in_cache(query)
+        if product_data:
+            await self.fetch_product_details(product_data)
+    
+    def enqueue_product_details(self, query: str) -> bool:
+        """Queue a background detail fetch; returns False if the queue is full"""
+        return self.details_queue.enqueue(self._cache_key(query), query)
     
     async def save_to_products_cache(self, product_data: Dict[str, Any]) -> bool:
         """Save product data to products cache collection"""
@@ -203,20 +609,34 @@ class ProductSearchService:
             db = self._get_database()
             collection = db[self.products_cache_collection]
             
-            # Create cache document with unique key
-            query_key = product_data["query"].lower().strip()
-            cache_document = {
-                "_id": query_key,
+            # Only the fetched fields are set: provenance, batch-job tags and
+            # details stored for the same product are kept
+            query_key = self._cache_key(product_data["query"])
+            fields = {
                 "key": query_key,
                 **product_data,
                 "cached_at": datetime.utcnow()
             }
             
-            await collection.replace_one(
-                {"_id": query_key}, 
-                cache_document, 
-                upsert=True
+            cache_document = await collection.find_one_and_update(
+                {"_id": query_key, "product_id": product_data.get("product_id")},
+                {"$set": fields},
+                return_document=ReturnDocument.AFTER
             )
+            if cache_document is None:
+                # New entry, or the query now resolves to another product
+                update = {"$set": fields}
+                stale = {field: "" for field in self.PRODUCT_SPECIFIC_FIELDS if field not in fields}
+                if stale:
+                    update["$unset"] = stale
+                cache_document = await collection.find_one_and_update(
+                    {"_id": query_key},
+                    update,
+                    upsert=True,
+                    return_document=ReturnDocument.AFTER
+                )
+            product_l1_cache.invalidate(query_key)
+            catalog_indexes.add_product(cache_document)
             
             return True
             
@@ -232,7 +652,7 @@ class ProductSearchService:
             
             # Create user product document
             user_product_document = {
-                "_id": f"{session_id}_{product_data['query'].lower().strip()}",
+                "_id": f"{session_id}_{self._cache_key(product_data['query'])}",
                 "session_id": session_id,
                 "product_query": product_data["query"],
                 "product_data": product_data,
@@ -246,6 +666,7 @@ class ProductSearchService:
                 user_product_document, 
                 upsert=True
             )
+            catalog_indexes.record_recommendation(product_data["query"])
             
             return True
             
@@ -253,24 +674,315 @@ class ProductSearchService:
             print(f"❌ Error saving user recommended product: {e}")
             return False
     
-    async def get_or_fetch_product(self, query: str, session_id: str = None, recommendation_context: Dict[str, Any] = None) -> Optional[Dict[str, Any]]:
+    async def save_user_recommended_products(self, session_id: str, recommendations: List[Tuple[Dict[str, Any], Dict[str, Any]]]) -> bool:
+        """Save a batch of (product_data, recommendation_context) for a session in one bulk write"""
+        if not recommendations:
+            return True
+        
+        try:
+            db = self._get_database()
+            collection = db[self.user_products_collection]
+            
+            now = datetime.utcnow()
+            documents = {}
+            for product_data, recommendation_context in recommendations:
+                document_id = f"{session_id}_{self._cache_key(product_data['query'])}"
+                documents[document_id] = {
+                    "_id": document_id,
+                    "session_id": session_id,
+                    "product_query": product_data["query"],
+                    "product_data": product_data,
+                    "recommendation_context": recommendation_context,
+                    "recommended_at": now,
+                    "expires_at": now + timedelta(days=365)  # Keep user recommendations longer
+                }
+            
+            await collection.bulk_write(
+                [ReplaceOne({"_id": document_id}, document, upsert=True) for document_id, document in documents.items()],
+                ordered=False
+            )
+            for document in documents.values():
+                catalog_indexes.record_recommendation(document["product_query"])
+            
+            return True
+            
+        except Exception as e:
+            print(f"❌ Error saving user recommended products: {e}")
+            return False
+    
+    async def _acquire_fetch_lease(self, query_key: str) -> bool:
+        """Try to take the cross-worker lease for fetching a product"""
+        collection = self._get_database()[self.fetch_leases_collection]
+        now = datetime.utcnow()
+        lease = {
+            "_id": query_key,
+            "owner": self.worker_id,
+            "acquired_at": now,
+            "expires_at": now + timedelta(seconds=settings.PRODUCT_FETCH_LEASE_TTL_SECONDS)
+        }
+        
+        try:
+            await collection.insert_one(lease)
+            return True
+        except DuplicateKeyError:
+            # Take over a lease whose holder died before the TTL monitor removed it
+            result = await collection.replace_one({"_id": query_key, "expires_at": {"$lt": now}}, lease)
+            return result.modified_count > 0
+    
+    async def _release_fetch_lease(self, query_key: str) -> None:
+        """Release a fetch lease held by this worker"""
+        try:
+            collection = self._get_database()[self.fetch_leases_collection]
+            await collection.delete_one({"_id": query_key, "owner": self.worker_id})
+        except Exception as e:
+            print(f"❌ Error releasing fetch lease for '{query_key}': {e}")
+    
+    async def _wait_for_leased_fetch(self, query_key: str) -> Optional[Dict[str, Any]]:
+        """Poll the cache while another worker holds the fetch lease"""
+        collection = self._get_database()[self.products_cache_collection]
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.PRODUCT_FETCH_LEASE_WAIT_SECONDS
+        
+        while loop.time() < deadline:
+            await asyncio.sleep(settings.PRODUCT_FETCH_LEASE_POLL_SECONDS)
+            product = await collection.find_one({"_id": query_key})
+            if product:
+                return product
+        
+        return None
+    
+    def _negative_cache_ttl(self, reason: str) -> int:
+        """Seconds to remember a failed lookup; transient failures are kept briefly"""
+        if reason == self.NEGATIVE_NO_RESULTS:
+            return settings.NEGATIVE_CACHE_TTL_SECONDS
+        return settings.NEGATIVE_CACHE_ERROR_TTL_SECONDS
+    
+    async def search_negative_cache(self, query: str) -> Optional[Dict[str, Any]]:
+        """Return the negative-cache entry for a query if SerpAPI recently failed to find it"""
+        query_key = self._cache_key(query)
+        entry = self.negative_l1_cache.get(query_key)
+        
+        try:
+            if entry is None:
+                collection = self._get_database()[self.negative_cache_collection]
+                entry = await collection.find_one({"_id": query_key})
+                if entry:
+                    self.negative_l1_cache.set(query_key, entry)
+        except Exception as e:
+            print(f"❌ Error searching negative cache for '{query}': {e}")
+            return None
+        
+        # The TTL monitor runs about once a minute, so check expiry explicitly
+        if not entry or entry["expires_at"] < datetime.utcnow():
+            return None
+        
+        self.negative_cache_stats["hits"] += 1
+        return entry
+    
+    async def save_to_negative_cache(self, query: str, reason: str) -> bool:
+        """Remember that SerpAPI could not return a product for a query"""
+        try:
+            query_key = self._cache_key(query)
+            now = datetime.utcnow()
+            entry = {
+                "_id": query_key,
+                "query": query,
+                "reason": reason,
+                "created_at": now,
+                "expires_at": now + timedelta(seconds=self._negative_cache_ttl(reason))
+            }
+            
+            collection = self._get_database()[self.negative_cache_collection]
+            await collection.replace_one({"_id": query_key}, entry, upsert=True)
+            self.negative_l1_cache.set(query_key, entry)
+            self.negative_cache_stats["recorded"] += 1
+            
+            return True
+            
+        except Exception as e:
+            print(f"❌ Error saving '{query}' to negative cache: {e}")
+            return False
+    
+    async def fetch_and_cache_product(self, query: str, price_band: Optional[PriceBand] = None) -> Optional[Dict[str, Any]]:
+        """
+        Fetch a product from SerpAPI and save it to the products cache.
+        Concurrent fetches for the same normalized query share one SerpAPI
+        search whatever their price bands: the first caller's pick is cached
+        and every other caller picks from the shared shopping results with
+        its own band.
+        """
+        product_data, shopping_results = await self.fetch_flight.do(
+            self._cache_key(query),
+            lambda: self._fetch_and_cache_product(query, price_band)
+        )
+        
+        selected_band = (product_data or {}).get("selection", {}).get("price_band")
+        if shopping_results and selected_band != (list(price_band) if price_band else None):
+            _, product_data = self._product_from_results(query, shopping_results, price_band)
+        
+        return product_data
+    
+    async def _fetch_and_cache_product(self, query: str, price_band: Optional[PriceBand] = None) -> Tuple[Optional[Dict[str, Any]], List[Dict[str, Any]]]:
+        """
+        SerpAPI fetch + cache save, optionally guarded by a cross-worker lease.
+        Returns (product_data, shopping_results); the results are empty when
+        the product came from the negative cache or another worker.
+        """
+        query_key = self._cache_key(query)
+        has_lease = False
+        
+        negative_entry = await self.search_negative_cache(query)
+        if negative_entry:
+            print(f"🚫 Skipping SerpAPI for '{query}' (negative cache: {negative_entry['reason']})")
+            return None, []
+        
+        if settings.PRODUCT_FETCH_LEASE_ENABLED:
+            try:
+                has_lease = await self._acquire_fetch_lease(query_key)
+                if not has_lease:
+                    product = await self._wait_for_leased_fetch(query_key)
+                    if product:
+                        print(f"✅ '{query}' fetched by another worker")
+                        return product, []
+                    # Lease holder is slow or failed, fall through and fetch ourselves
+            except Exception as e:
+                print(f"❌ Error using fetch lease for '{query}': {e}")
+        
+        try:
+            product_data, failure_reason, shopping_results = await self._search_and_select(query, price_band)
+            
+            if not product_data:
+                await self.save_to_negative_cache(query, failure_reason)
+                return None, []
+            
+            await self.save_to_products_cache(product_data)
+            
+            if settings.PRODUCT_DETAILS_PREFETCH and product_data.get("details_status") == self.DETAILS_PENDING:
+                self.enqueue_product_details(query)
+            
+            return product_data, shopping_results
+        
+        finally:
+            if has_lease:
+                await self._release_fetch_lease(query_key)
+    
+    async def refresh_product(self, query: str, cached_product: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+        """
+        Refetch a cached product from SerpAPI and overwrite its cache entry.
+        Detail data is carried over when the refetch resolves to the same
+        product. Failures keep the existing entry and are not negatively cached.
+        """
+        # Keep the price band the entry was originally selected with
+        price_band = ((cached_product or {}).get("selection") or {}).get("price_band")
+        
+        async def refresh():
+            product_data, failure_reason = await self._fetch_product(query, tuple(price_band) if price_band else None)
+            if not product_data:
+                print(f"❌ Refresh failed for '{query}' ({failure_reason}), keeping cached data")
+                return None
+            
+            if (cached_product and cached_product.get("details_status") == self.DETAILS_FETCHED
+                    and cached_product.get("product_id") == product_data.get("product_id")):
+                for field in self.DETAIL_FIELDS + ["details_status", "details_fetched_at"]:
+                    if field in cached_product:
+                        product_data[field] = cached_product[field]
+            
+            await self.save_to_products_cache(product_data)
+            return product_data
+        
+        return await self.fetch_flight.do(f"refresh:{self._cache_key(query)}", refresh)
+    
+    def _schedule_refresh(self, query: str, cached_product: Optional[Dict[str, Any]] = None) -> None:
+        """Refresh a product in the background without blocking the caller"""
+        self._run_in_background(self.refresh_product(query, cached_product))
+    
+    async def _apply_freshness_policy(self, product_data: Dict[str, Any], price_band: Optional[PriceBand] = None) -> Dict[str, Any]:
+        """
+        Stale-while-revalidate for a cached product.
+        Stale entries are served at once and refreshed in the background;
+        expired entries are refetched, falling back to the cached copy.
+        The returned copy carries a per-field freshness report and, when a
+        price band is given, whether the cached price falls inside it.
+        """
+        freshness = product_freshness.evaluate_freshness(product_data)
+        cached_query = product_data.get("query")
+        
+        if cached_query and freshness["status"] == product_freshness.EXPIRED:
+            refreshed = await self.refresh_product(cached_query, product_data)
+            if refreshed:
+                product_data = refreshed
+                freshness = product_freshness.evaluate_freshness(refreshed)
+        elif cached_query and freshness["status"] == product_freshness.STALE:
+            self._schedule_refresh(cached_query, product_data)
+            freshness["refreshing"] = True
+        
+        result = {**product_data, "freshness": freshness}
+        if price_band:
+            result["selection"] = {
+                "price_band": list(price_band),
+                "in_band": self._in_price_band(product_data.get("extracted_price"), price_band)
+            }
+        
+        return result
+    
+    async def resolve_product(self, query: str, bulk_hits: Optional[Dict[str, Dict[str, Any]]] = None, price_band: Optional[PriceBand] = None) -> Optional[Dict[str, Any]]:
+        """
+        Get product data from cache or fetch from SerpAPI if not found.
+        bulk_hits is the result of find_many_in_cache() for a batch containing
+        this query; when given, the per-query exact lookup is skipped.
+        price_band steers which shopping result is picked on a SerpAPI fetch.
+        """
+        if bulk_hits is None:
+            product_data = await self.search_product_in_cache(query)
+        else:
+            product_data = bulk_hits.get(self._cache_key(query)) or await self.search_product_in_cache(query, exact=False)
+        
+        if product_data:
+            return await self._apply_freshness_policy(product_data, price_band)
+        
+        return await self.fetch_and_cache_product(query, price_band)
+    
+    async def resolve_products(self, queries: List[str], runner: Optional[Callable[[str, Awaitable], Awaitable]] = None, price_bands: Optional[Dict[str, PriceBand]] = None) -> Dict[str, Any]:
+        """
+        Bulk resolver for a whole recommendation set.
+        
+        Queries are normalized and de-duplicated, cache hits are fetched with
+        one $in query and only the misses go to SerpAPI. runner(query, lookup)
+        can wrap each lookup (e.g. with semaphores and timeouts) and its return
+        value is what gets mapped; by default the lookup is simply awaited.
+        price_bands optionally maps a query to its price band.
+        Returns original query -> result.
+        """
+        price_bands = price_bands or {}
+        unique_queries = {}
+        for query in queries:
+            unique_queries.setdefault(self._cache_key(query), query)
+        
+        bulk_hits = await self.find_many_in_cache(list(unique_queries.values()))
+        
+        async def run(query: str):
+            lookup = self.resolve_product(query, bulk_hits, price_bands.get(query))
+            if runner is None:
+                return await lookup
+            return await runner(query, lookup)
+        
+        results = await asyncio.gather(*(run(query) for query in unique_queries.values()))
+        by_key = dict(zip(unique_queries.keys(), results))
+        
+        return {query: by_key[self._cache_key(query)] for query in queries}
+    
+    async def get_or_fetch_product(self, query: str, session_id: str = None, recommendation_context: Dict[str, Any] = None, price_band: Optional[PriceBand] = None) -> Optional[Dict[str, Any]]:
         """
         Get product data from cache or fetch from SerpAPI if not found.
         Optionally save to user recommendations if session_id provided.
+        With a price band, a SerpAPI fetch picks the best in-band result.
         """
         try:
-            # Step 1: Try to find in cache
-            product_data = await self.search_product_in_cache(query)
+            # Step 1 & 2: Cache first, then SerpAPI
+            product_data = await self.resolve_product(query, price_band=price_band)
             
-            # Step 2: If not in cache, fetch from SerpAPI
             if not product_data:
-                product_data = await self.fetch_product_from_serpapi(query)
-                
-                if not product_data:
-                    return None
-                
-                # Save to products cache
-                await self.save_to_products_cache(product_data)
+                return None
             
             # Step 3: If session provided, save to user recommendations
             if session_id and recommendation_context:
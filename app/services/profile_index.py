@@ -0,0 +1,148 @@
+"""
+Profile Vector Index
+
+Fixed-length numeric encoding of a phase-3 profile and a NumPy matrix index
+for nearest-neighbour lookup. Used by the "similar" reuse mode to serve a new
+session with the recommendations of the closest earlier profile.
+
+Vector layout (unit-normalized, so a dot product is cosine similarity):
+- one-hot skin types
+- one-hot concerns, matched by keyword over conditions and goals
+- ordinal SkinAnalysis severities (none 0, mild 1/3, moderate 2/3, severe 1)
+- log budget, scaled to 0-1 over ₱200-₱20,000
+
+Only profiles in the same budget tier, allocation mode and prompt mode are
+compared, and a neighbour is only reused if it avoided at least the same
+allergies.
+"""
+
+import math
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+# SkinAnalysis fields included in the phase-3 prompts
+ANALYSIS_FIELDS = [
+    "redness_irritation", "acne_breakouts", "oiliness_shine", "dryness_flaking",
+    "uneven_skin_tone", "dark_spots_scars", "pores_size"
+]
+
+SKIN_TYPES = ["oily", "dry", "combination", "normal", "sensitive", "acne-prone"]
+
+CONCERNS = [
+    ("acne", ("acne", "breakout", "pimple")),
+    ("pigmentation", ("dark spot", "hyperpigment", "melasma", "scar")),
+    ("dullness", ("dull", "bright", "uneven", "glow")),
+    ("aging", ("wrinkle", "fine line", "aging", "firm", "elastic")),
+    ("dryness", ("dry", "dehydrat", "hydrat", "flak")),
+    ("oiliness", ("oil", "shine", "sebum")),
+    ("pores", ("pore", "blackhead", "whitehead")),
+    ("redness", ("redness", "rosacea", "irritat", "sensitiv")),
+    ("texture", ("texture", "rough", "smooth")),
+    ("eyes", ("dark circle", "puff", "eye bag")),
+]
+
+LEVEL_VALUES = {"none": 0.0, "mild": 1 / 3, "present": 0.5, "moderate": 2 / 3, "severe": 1.0}
+
+BUDGET_LOG_MIN = math.log(200)
+BUDGET_LOG_MAX = math.log(20000)
+
+# Group weights: how much each block contributes to similarity
+SKIN_TYPE_WEIGHT = 1.0
+CONCERN_WEIGHT = 0.8
+ANALYSIS_WEIGHT = 0.6
+BUDGET_WEIGHT = 1.0
+
+VECTOR_SIZE = len(SKIN_TYPES) + len(CONCERNS) + len(ANALYSIS_FIELDS) + 1
+
+
+def profile_vector(profile: Dict[str, Any], budget_php: float) -> np.ndarray:
+    """Unit-length feature vector for a canonical profile (recommendation_cache.canonical_profile)"""
+    vector = np.zeros(VECTOR_SIZE, dtype=np.float32)
+    offset = 0
+    
+    for skin_type in profile.get("skin_type", []):
+        if skin_type in SKIN_TYPES:
+            vector[offset + SKIN_TYPES.index(skin_type)] = SKIN_TYPE_WEIGHT
+    offset += len(SKIN_TYPES)
+    
+    concern_text = " ".join(profile.get("skin_conditions", []) + profile.get("goals", []))
+    for position, (_, keywords) in enumerate(CONCERNS):
+        if any(keyword in concern_text for keyword in keywords):
+            vector[offset + position] = CONCERN_WEIGHT
+    offset += len(CONCERNS)
+    
+    analysis = profile.get("skin_analysis") or {}
+    for position, field in enumerate(ANALYSIS_FIELDS):
+        vector[offset + position] = ANALYSIS_WEIGHT * LEVEL_VALUES.get(analysis.get(field, "none"), 0.5)
+    offset += len(ANALYSIS_FIELDS)
+    
+    scaled_budget = (math.log(max(budget_php, 1.0)) - BUDGET_LOG_MIN) / (BUDGET_LOG_MAX - BUDGET_LOG_MIN)
+    vector[offset] = BUDGET_WEIGHT * min(max(scaled_budget, 0.0), 1.0)
+    
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class ProfileIndex:
+    """Append-only matrix of profile vectors with cosine nearest-neighbour search"""
+    
+    def __init__(self, capacity: int = 1024):
+        self._matrix = np.zeros((capacity, VECTOR_SIZE), dtype=np.float32)
+        self._tiers = np.zeros(capacity, dtype=np.int8)
+        self._expires = np.zeros(capacity, dtype=np.float64)
+        self._fingerprints: List[str] = []
+        self._modes: List[Tuple[str, Optional[str]]] = []
+        self._allergies: List[frozenset] = []
+        self._rows: Dict[str, int] = {}
+        self.size = 0
+    
+    def __len__(self) -> int:
+        return self.size
+    
+    def _grow(self) -> None:
+        capacity = self._matrix.shape[0] * 2
+        self._matrix = np.resize(self._matrix, (capacity, VECTOR_SIZE))
+        self._tiers = np.resize(self._tiers, capacity)
+        self._expires = np.resize(self._expires, capacity)
+    
+    def add(self, fingerprint: str, vector: np.ndarray, budget_tier: int, allocation_mode: str, prompt_mode: Optional[str], allergies: List[str], expires_at: float) -> None:
+        """Add a profile, or refresh it if the fingerprint is already indexed"""
+        row = self._rows.get(fingerprint)
+        if row is None:
+            if self.size == self._matrix.shape[0]:
+                self._grow()
+            row = self.size
+            self.size += 1
+            self._rows[fingerprint] = row
+            self._fingerprints.append(fingerprint)
+            self._modes.append((allocation_mode, prompt_mode))
+            self._allergies.append(frozenset(allergies))
+        else:
+            self._modes[row] = (allocation_mode, prompt_mode)
+            self._allergies[row] = frozenset(allergies)
+        
+        self._matrix[row] = vector
+        self._tiers[row] = budget_tier
+        self._expires[row] = expires_at
+    
+    def nearest(self, vector: np.ndarray, budget_tier: int, allocation_mode: str, prompt_mode: str, allergies: List[str], threshold: float, now: float, exclude: Optional[str] = None) -> Optional[Tuple[str, float]]:
+        """Most similar live profile at or above the threshold, as (fingerprint, similarity)"""
+        if not self.size:
+            return None
+        
+        similarities = self._matrix[:self.size] @ vector
+        eligible = (self._tiers[:self.size] == budget_tier) & (self._expires[:self.size] > now) & (similarities >= threshold)
+        candidates = np.flatnonzero(eligible)
+        if not candidates.size:
+            return None
+        
+        required_allergies = frozenset(allergies)
+        for row in candidates[np.argsort(-similarities[candidates])]:
+            fingerprint = self._fingerprints[row]
+            if fingerprint == exclude or self._modes[row] != (allocation_mode, prompt_mode):
+                continue
+            if required_allergies <= self._allergies[row]:
+                return fingerprint, float(similarities[row])
+        
+        return None
@@ -0,0 +1,294 @@
+"""
+Recommendation Cache
+
+Caches phase-3 LLM output (budget allocation, per-category products and
+future recommendations) by a canonical profile fingerprint, so users with
+equivalent profiles skip the Gemini calls entirely.
+
+The fingerprint is a SHA-256 of:
+- sorted, normalized FormData fields (skin types, conditions, goals,
+  allergies, product experiences)
+- the budget tier and a ~10% wide budget bucket (in PHP)
+- a coarse bucketing of the SkinAnalysis fields the prompts use
+- the allocation mode and the prompt mode (fan-out and fused prompts
+  produce different output)
+
+Entries live in MongoDB with a TTL index; hits and misses are counted per
+process and reported by the cache-stats endpoint.
+
+Each entry also stores the profile's feature vector (see profile_index). In
+the "similar" reuse mode, an exact miss falls back to the nearest cached
+profile above PROFILE_SIMILARITY_THRESHOLD.
+"""
+
+import asyncio
+import hashlib
+import json
+import math
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from ..core.config import settings
+from ..core.database import Database
+from ..models.skincare.form_schemas import FormData
+from .product_normalizer import canonical_product_key, fold_unicode
+from .profile_index import ANALYSIS_FIELDS, ProfileIndex
+
+FINGERPRINT_VERSION = 2
+
+_LEVEL_WORDS = [
+    ("severe", "severe"), ("high", "severe"), ("large", "severe"), ("significant", "severe"),
+    ("moderate", "moderate"), ("medium", "moderate"),
+    ("mild", "mild"), ("slight", "mild"), ("low", "mild"), ("minimal", "mild"), ("small", "mild"),
+    ("none", "none"), ("no ", "none"), ("not ", "none"), ("absent", "none"),
+]
+_WHITESPACE_RE = re.compile(r"\s+")
+BUDGET_TIER_LIMITS = [500, 800, 1500]
+BUDGET_BUCKET_RATIO = 1.1
+
+
+def normalize_terms(values: List[Optional[str]]) -> List[str]:
+    """Lower-cased, de-duplicated, sorted free-text entries"""
+    terms = {_WHITESPACE_RE.sub(" ", fold_unicode(value)).strip() for value in values if value}
+    return sorted(term for term in terms if term)
+
+
+def coarse_level(value: Any) -> str:
+    """Collapse a SkinAnalysis value into none / mild / moderate / severe / present"""
+    if value is None:
+        return "none"
+    if isinstance(value, bool):
+        return "present" if value else "none"
+    if isinstance(value, dict):
+        for field in ("severity", "level"):
+            if value.get(field):
+                return coarse_level(str(value[field]))
+        if "presence" in value:
+            return coarse_level(bool(value["presence"]))
+        return "present"
+    
+    # The earliest level word wins ("no significant redness" -> none)
+    text = f" {fold_unicode(str(value))} "
+    matches = [(text.find(f" {word}"), level) for word, level in _LEVEL_WORDS if f" {word}" in text]
+    return min(matches)[1] if matches else "present"
+
+
+def budget_tier(budget_php: float) -> int:
+    """0-3, matching Phase3Service._allowed_categories"""
+    return sum(1 for limit in BUDGET_TIER_LIMITS if budget_php >= limit)
+
+
+def budget_bucket(budget_php: float) -> int:
+    """Geometric bucket index; neighbouring budgets within ~10% share a bucket"""
+    return int(math.floor(math.log(max(budget_php, 1.0), BUDGET_BUCKET_RATIO)))
+
+
+def canonical_profile(form_data: FormData, budget_php: float, skin_analysis: Optional[Dict[str, Any]], allocation_mode: str, prompt_mode: str) -> Dict[str, Any]:
+    """Order- and spelling-insensitive view of everything the phase-3 prompts depend on"""
+    experiences = sorted({
+        (canonical_product_key(experience.product), experience.experience)
+        for experience in form_data.product_experiences
+    })
+    analysis = skin_analysis or {}
+    
+    return {
+        "version": FINGERPRINT_VERSION,
+        "skin_type": sorted(set(form_data.skin_type)),
+        "skin_conditions": normalize_terms(form_data.skin_conditions),
+        "goals": normalize_terms(form_data.goals + [form_data.custom_goal]),
+        "allergies": normalize_terms(form_data.allergies),
+        "product_experiences": [list(experience) for experience in experiences],
+        "budget_tier": budget_tier(budget_php),
+        "budget_bucket": budget_bucket(budget_php),
+        "skin_analysis": {field: coarse_level(analysis.get(field)) for field in ANALYSIS_FIELDS} if skin_analysis else None,
+        "allocation_mode": allocation_mode,
+        "prompt_mode": prompt_mode,
+    }
+
+
+def profile_fingerprint(profile: Dict[str, Any]) -> str:
+    encoded = json.dumps(profile, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+def _timestamp(value: datetime) -> float:
+    """Epoch seconds for a naive UTC datetime"""
+    return value.replace(tzinfo=timezone.utc).timestamp()
+
+
+class RecommendationCache:
+    """MongoDB-backed cache of phase-3 LLM output keyed by profile fingerprint"""
+    
+    def __init__(self):
+        self.collection_name = "recommendation_cache"
+        self.stats_counters = {"hits": 0, "misses": 0, "stored": 0, "similar_hits": 0, "similar_misses": 0}
+        self.profile_index = ProfileIndex()
+        self._watermark: Optional[datetime] = None
+        self._sync_task: Optional[asyncio.Task] = None
+    
+    def _get_database(self) -> AsyncIOMotorDatabase:
+        """Get MongoDB database instance"""
+        return Database.get_database()
+    
+    async def ensure_indexes(self) -> None:
+        try:
+            collection = self._get_database()[self.collection_name]
+            await collection.create_index("expires_at", expireAfterSeconds=0)
+            await collection.create_index("created_at")
+        except Exception as e:
+            print(f"❌ Error creating recommendation cache indexes: {e}")
+    
+    async def _load(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        collection = self._get_database()[self.collection_name]
+        document = await collection.find_one_and_update(
+            {"_id": fingerprint, "expires_at": {"$gt": datetime.utcnow()}},
+            {"$inc": {"hits": 1}, "$set": {"last_hit_at": datetime.utcnow()}},
+            projection={"recommendations": 1}
+        )
+        return document["recommendations"] if document else None
+    
+    async def get(self, fingerprint: str) -> Optional[Dict[str, Any]]:
+        """Cached {allocation, products, future_recommendations} for a fingerprint"""
+        if not settings.RECOMMENDATION_CACHE_ENABLED:
+            return None
+        
+        try:
+            recommendations = await self._load(fingerprint)
+        except Exception as e:
+            print(f"❌ Error reading recommendation cache: {e}")
+            return None
+        
+        self.stats_counters["hits" if recommendations else "misses"] += 1
+        return recommendations
+    
+    async def get_similar(self, profile: Dict[str, Any], vector: np.ndarray, exclude: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """Recommendations of the nearest cached profile above PROFILE_SIMILARITY_THRESHOLD"""
+        if not settings.RECOMMENDATION_CACHE_ENABLED:
+            return None
+        
+        match = self.profile_index.nearest(
+            vector,
+            budget_tier=profile["budget_tier"],
+            allocation_mode=profile["allocation_mode"],
+            prompt_mode=profile["prompt_mode"],
+            allergies=profile["allergies"],
+            threshold=settings.PROFILE_SIMILARITY_THRESHOLD,
+            now=time.time(),
+            exclude=exclude
+        )
+        
+        recommendations = None
+        if match is not None:
+            try:
+                recommendations = await self._load(match[0])
+            except Exception as e:
+                print(f"❌ Error reading recommendation cache: {e}")
+        
+        if recommendations is None:
+            self.stats_counters["similar_misses"] += 1
+            return None
+        
+        print(f"⚡ Reusing recommendations of a similar profile ({match[1]:.3f} similarity)")
+        self.stats_counters["similar_hits"] += 1
+        return recommendations
+    
+    async def set(self, fingerprint: str, profile: Dict[str, Any], recommendations: Dict[str, Any], vector: Optional[np.ndarray] = None) -> bool:
+        if not settings.RECOMMENDATION_CACHE_ENABLED:
+            return False
+        
+        now = datetime.utcnow()
+        expires_at = now + timedelta(seconds=settings.RECOMMENDATION_CACHE_TTL_SECONDS)
+        document = {
+            "_id": fingerprint,
+            "profile": profile,
+            "recommendations": recommendations,
+            "hits": 0,
+            "created_at": now,
+            "expires_at": expires_at
+        }
+        if vector is not None:
+            document["vector"] = vector.tolist()
+        
+        try:
+            await self._get_database()[self.collection_name].replace_one({"_id": fingerprint}, document, upsert=True)
+            self.stats_counters["stored"] += 1
+        
+        except Exception as e:
+            print(f"❌ Error writing recommendation cache: {e}")
+            return False
+        
+        self._index_document(document)
+        return True
+    
+    def _index_document(self, document: Dict[str, Any]) -> None:
+        if not document.get("vector"):
+            return
+        profile = document["profile"]
+        self.profile_index.add(
+            document["_id"],
+            np.asarray(document["vector"], dtype=np.float32),
+            budget_tier=profile["budget_tier"],
+            allocation_mode=profile["allocation_mode"],
+            prompt_mode=profile.get("prompt_mode"),
+            allergies=profile["allergies"],
+            expires_at=_timestamp(document["expires_at"])
+        )
+    
+    async def sync_profile_index(self) -> int:
+        """Load profile vectors cached since the last sync (all live entries on the first run)"""
+        query: Dict[str, Any] = {"vector": {"$exists": True}, "expires_at": {"$gt": datetime.utcnow()}}
+        if self._watermark is not None:
+            query["created_at"] = {"$gte": self._watermark}
+        
+        loaded = 0
+        watermark = self._watermark
+        cursor = self._get_database()[self.collection_name].find(
+            query, {"vector": 1, "profile": 1, "created_at": 1, "expires_at": 1}
+        )
+        async for document in cursor:
+            self._index_document(document)
+            loaded += 1
+            if watermark is None or document["created_at"] > watermark:
+                watermark = document["created_at"]
+        
+        self._watermark = watermark
+        return loaded
+    
+    async def _sync_loop(self) -> None:
+        while True:
+            try:
+                await self.sync_profile_index()
+            except Exception as e:
+                print(f"❌ Error syncing profile index: {e}")
+            
+            await asyncio.sleep(settings.PROFILE_INDEX_SYNC_SECONDS)
+    
+    def start(self) -> None:
+        """Start the profile index load and periodic sync (requires a running event loop)"""
+        if self._sync_task is None:
+            self._sync_task = asyncio.ensure_future(self._sync_loop())
+    
+    async def stop(self) -> None:
+        if self._sync_task is not None:
+            self._sync_task.cancel()
+            await asyncio.gather(self._sync_task, return_exceptions=True)
+            self._sync_task = None
+    
+    async def stats(self) -> Dict[str, Any]:
+        """Entry count and per-process hit rate"""
+        lookups = self.stats_counters["hits"] + self.stats_counters["misses"]
+        return {
+            "total_entries": await self._get_database()[self.collection_name].count_documents({}),
+            "indexed_profiles": len(self.profile_index),
+            **self.stats_counters,
+            "hit_rate": round(self.stats_counters["hits"] / lookups, 4) if lookups else None
+        }
+
+
+# Global instance
+recommendation_cache = RecommendationCache()
@@ -6,24 +6,20 @@ PRESERVED ORIGINAL LOGIC - Only extracted into service class.
 """
 
 import json
-import google.generativeai as genai
 from fastapi import HTTPException
 from typing import List, Dict, Any
-from ..core.config import settings
+from ..core.llm_client import llm_client
 from ..models.skincare.form_schemas import FormData
 from ..models.skincare.analysis_schemas import RoutineStep, SkincareRoutineResponse
 
-# Configure the AI model (same as original)
-genai.configure(api_key=settings.GEMINI_API_KEY)
-
 
 class Phase4Service:
     """Service for Phase 4: Routine Creation (Original logic preserved)"""
     
     def __init__(self):
-        self.model = genai.GenerativeModel("gemini-2.0-flash")
+        self.llm = llm_client
 
-    def get_routine_for_user(self, form_data: FormData, product_recommendations: dict) -> dict:
+    async def get_routine_for_user(self, form_data: FormData, product_recommendations: dict) -> List[Dict[str, Any]]:
         """Get routine for user - ORIGINAL LOGIC PRESERVED"""
         user_profile = f"""
     User Profile:
@@ -53,7 +49,8 @@ class Phase4Service:
     - Only provide the raw JSON without markdown or extra commentary.
 
     Example:
-    "cleanser": {{
+    [
+    {{
         "name": "CeraVe Renewing SA Cleanser",
         "tag": "Gentle Hydrating Cleanser",
         "description": "Ideal for daily use, removes dirt and impurities",
@@ -76,7 +73,7 @@ class Phase4Service:
         }},
         "time": ["morning"]
     }},
-    "moisturizer": {{
+    {{
         "name": "Neutrogena Hydro Boost Water Gel",
         "tag": "Hyaluronic Acid Moisturizer",
         "description": "Hydrates and replenishes moisture",
@@ -97,30 +94,18 @@ class Phase4Service:
         }},
         "time": ["morning", "night"]
     }}
+    ]
     """
 
         try:
-            response = self.model.generate_content(prompt)
-            raw = getattr(response, 'text', '').strip()
-
-            if raw.startswith("```"):
-                raw = raw.strip("`").strip()
-                if raw.startswith("json"):
-                    raw = raw[4:].strip()
-
-            print("🧪 Raw Response:", raw)
-
-            if not raw:
-                raise ValueError("Received an empty response from the AI model.")
-
-            routine = json.loads(raw) 
-            return routine
+            routine = await self.llm.generate_json(prompt, List[RoutineStep])
+            return [step.model_dump() for step in routine]
 
         except Exception as e:
             print("❌ Failed to generate skincare routine:", e)
             raise HTTPException(status_code=500, detail="Failed to create skincare routine")
 
-    def create_routine(self, data: dict) -> Dict[str, Any]:
+    async def create_routine(self, data: dict) -> Dict[str, Any]:
         """
         Create a personalized skincare routine based on user data and product recommendations.
         ORIGINAL LOGIC PRESERVED
@@ -132,16 +117,11 @@ class Phase4Service:
             if not product_recommendations:
                 raise HTTPException(status_code=400, detail="No product recommendations provided")
 
-            routine = self.get_routine_for_user(form_data, product_recommendations)
-
-            if isinstance(routine, dict):
-                routine_list = list(routine.values())
-            else:
-                routine_list = routine
+            routine = await self.get_routine_for_user(form_data, product_recommendations)
 
             return {
                 "product_type": "custom", 
-                "routine": routine_list
+                "routine": routine
             }
 
         except Exception as e:
@@ -0,0 +1,50 @@
+"""
+Single-flight call coalescing
+
+Concurrent callers asking for the same key share one in-flight task instead of
+each doing the work. Used to stop many sessions that miss the cache for the
+same product from all calling SerpAPI at once.
+"""
+
+import asyncio
+from typing import Any, Awaitable, Callable, Dict
+
+
+class SingleFlight:
+    """Coalesces concurrent calls with the same key into one task"""
+    
+    def __init__(self):
+        self._in_flight: Dict[str, asyncio.Task] = {}
+        self.calls = 0
+        self.coalesced = 0
+    
+    async def do(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Run fn() for key, or wait for the call already in flight for key.
+        The shared task is shielded so one caller timing out or being
+        cancelled does not cancel it for the others.
+        """
+        task = self._in_flight.get(key)
+        
+        if task is None:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        
+        return await asyncio.shield(task)
+    
+    def _forget(self, key: str, task: asyncio.Task) -> None:
+        """Drop a finished task, unless a newer call already replaced it"""
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+    
+    def stats(self) -> Dict[str, int]:
+        """Call and coalescing counters"""
+        return {
+            "calls": self.calls,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight)
+        }
@@ -0,0 +1,299 @@
+"""
+Product Suggestion Index
+
+Typeahead index over catalog titles. Every word-start suffix of a canonical
+title ("cerave foaming cleanser", "foaming cleanser", "cleanser") is kept in
+one sorted array, so the products matching a typed prefix at any word
+boundary are a contiguous range found with two bisections. Matches are ranked
+by popularity.
+
+Short prefixes (and longer ones shared by a common word) match a large
+share of the catalog, so their ranked top TOP_K is precomputed, trie-style:
+every prefix of up to SHORT_PREFIX_LENGTH characters, and any longer one
+with more than HEAVY_PREFIX_ENTRIES suffixes, is ranked by merging the
+lists of its one-character extensions. Other prefixes are ranked from their
+(small) range on first use and kept in a bounded LRU memo. A recommendation
+or new title only updates the ranked lists of the prefixes of that
+product's own suffixes. Removing a product from a full precomputed list
+ranks it again by merging its extensions' lists (longest prefix first), so
+a write never sorts the range of a short prefix; a full memo list is dropped,
+to be ranked again on its next use.
+"""
+
+import heapq
+import re
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from .product_normalizer import canonical_product_key, fold_unicode
+
+_NON_WORD_RE = re.compile(r"[^\w]+|_")
+_RANGE_END = "\U0010ffff"
+
+
+def normalize_prefix(prefix: str) -> str:
+    """Typed prefix in the same folded, de-punctuated form as indexed titles"""
+    return " ".join(_NON_WORD_RE.sub(" ", fold_unicode(prefix)).split())
+
+
+class PrefixIndex:
+    """Sorted word-suffix array with popularity-ranked top lists per prefix"""
+    
+    TOP_K = 50
+    SHORT_PREFIX_LENGTH = 4
+    HEAVY_PREFIX_ENTRIES = 1000
+    MEMO_SIZE = 4096
+    INSORT_BATCH_LIMIT = 256
+    
+    def __init__(self):
+        self._entries: List[Tuple[str, str]] = []
+        self._suffixes: Dict[str, List[str]] = {}
+        self._titles: Dict[str, str] = {}
+        self._popularity: Dict[str, Tuple[int, int]] = {}
+        # precomputed prefix -> up to TOP_K keys, most popular first
+        self._ranked: Dict[str, List[str]] = {}
+        self._memo: "OrderedDict[str, List[str]]" = OrderedDict()
+    
+    def __len__(self) -> int:
+        return len(self._titles)
+    
+    def add(self, key: str, title: str, reviews: int = 0) -> None:
+        """Index (or re-index) a product under its title"""
+        self.add_many([(key, title, reviews)])
+    
+    def add_many(self, products: Iterable[Tuple[str, str, int]]) -> None:
+        """Index a batch of (key, title, reviews) with a single re-sort"""
+        new_entries = []
+        added = []
+        for key, title, reviews in products:
+            text = canonical_product_key(title or "") or key
+            words = text.split()
+            suffixes = [" ".join(words[i:]) for i in range(len(words))]
+            recommendations, old_reviews = self._popularity.get(key, (0, 0))
+            
+            if self._suffixes.get(key) == suffixes and (reviews or 0) >= old_reviews:
+                # Same title: only its ranking can have moved up
+                self._titles[key] = title or key
+                self._popularity[key] = (recommendations, reviews or 0)
+                self._promote(key)
+                continue
+            
+            self.remove(key)
+            new_entries.extend((suffix, key) for suffix in suffixes)
+            self._suffixes[key] = suffixes
+            self._titles[key] = title or key
+            self._popularity[key] = (recommendations, reviews or 0)
+            added.append(key)
+        
+        # Small batches are cheaper to insert (and rank in place) than a full re-sort
+        if len(new_entries) <= self.INSORT_BATCH_LIMIT:
+            for entry in new_entries:
+                insort(self._entries, entry)
+            for key in added:
+                self._promote(key)
+        else:
+            self._entries.extend(new_entries)
+            self._entries.sort()
+            self._rebuild()
+    
+    def remove(self, key: str) -> None:
+        """Drop a product from the index"""
+        suffixes = self._suffixes.pop(key, [])
+        for suffix in suffixes:
+            position = bisect_left(self._entries, (suffix, key))
+            if position < len(self._entries) and self._entries[position] == (suffix, key):
+                del self._entries[position]
+        self._titles.pop(key, None)
+        self._demote(key, suffixes)
+    
+    def set_recommendations(self, counts: Dict[str, int]) -> None:
+        """Replace recommendation counts (the primary popularity signal)"""
+        changed = [
+            (key, counts.get(key, 0))
+            for key, (recommendations, _) in self._popularity.items()
+            if counts.get(key, 0) != recommendations
+        ]
+        
+        if len(changed) > self.INSORT_BATCH_LIMIT:
+            for key, count in changed:
+                self._popularity[key] = (count, self._popularity[key][1])
+            self._rebuild()
+            return
+        
+        # One product at a time, so ranked lists are in order before each update
+        for key, count in changed:
+            recommendations, reviews = self._popularity[key]
+            if count < recommendations:
+                self._demote(key, self._suffixes.get(key, []))
+            self._popularity[key] = (count, reviews)
+            self._promote(key)
+    
+    def record_recommendation(self, key: str) -> None:
+        recommendations, reviews = self._popularity.get(key, (0, 0))
+        self._popularity[key] = (recommendations + 1, reviews)
+        self._promote(key)
+    
+    def suggest(self, prefix: str, limit: int = 10) -> List[Dict[str, Any]]:
+        """Top products with a word starting with the prefix, most popular first"""
+        prefix = normalize_prefix(prefix)
+        if not prefix or limit <= 0:
+            return []
+        
+        if limit > self.TOP_K:
+            top = self._rank_range(prefix, limit)
+        elif prefix in self._ranked:
+            top = self._ranked[prefix]
+        elif len(prefix) <= self.SHORT_PREFIX_LENGTH:
+            top = self._ranked[prefix] = self._rerank(prefix)
+        else:
+            top = self._memo.get(prefix)
+            if top is None:
+                top = self._memo[prefix] = self._rank_range(prefix, self.TOP_K)
+                if len(self._memo) > self.MEMO_SIZE:
+                    self._memo.popitem(last=False)
+            else:
+                self._memo.move_to_end(prefix)
+        
+        return [
+            {
+                "key": key,
+                "title": self._titles[key],
+                "recommendations": self._popularity.get(key, (0, 0))[0]
+            }
+            for key in top[:limit]
+        ]
+    
+    def _rank(self, key: str) -> Tuple[Tuple[int, int], str]:
+        return self._popularity.get(key, (0, 0)), key
+    
+    def _rank_range(self, prefix: str, limit: int) -> List[str]:
+        """Most popular keys among the suffixes starting with prefix"""
+        start = bisect_left(self._entries, (prefix,))
+        end = bisect_left(self._entries, (prefix + _RANGE_END,), lo=start)
+        keys = {key for _, key in self._entries[start:end]}
+        return heapq.nlargest(limit, keys, key=self._rank)
+    
+    def _prefixes(self, suffixes: List[str]) -> Set[str]:
+        return {suffix[:length] for suffix in suffixes for length in range(1, len(suffix) + 1)}
+    
+    def _ranked_lists(self, suffixes: List[str]):
+        """(prefix, ranked list, store) for every ranked prefix of the given suffixes"""
+        for prefix in self._prefixes(suffixes):
+            for store in (self._ranked, self._memo):
+                top = store.get(prefix)
+                if top is not None:
+                    yield prefix, top, store
+    
+    def _promote(self, key: str) -> None:
+        """Re-rank a product whose popularity rose (or that was just added)"""
+        rank = self._rank(key)
+        for _, top, _ in self._ranked_lists(self._suffixes.get(key, [])):
+            if key in top:
+                top.remove(key)
+            elif len(top) >= self.TOP_K:
+                if rank <= self._rank(top[-1]):
+                    continue
+                top.pop()
+            top.append(key)
+            top.sort(key=self._rank, reverse=True)
+        
+        # Short prefixes stay precomputed: new ones are ranked now
+        for suffix in self._suffixes.get(key, []):
+            for length in range(1, min(len(suffix), self.SHORT_PREFIX_LENGTH) + 1):
+                if suffix[:length] not in self._ranked:
+                    self._ranked[suffix[:length]] = self._rerank(suffix[:length])
+    
+    def _demote(self, key: str, suffixes: List[str]) -> None:
+        """Drop a product from ranked lists, refilling full precomputed ones from their extensions"""
+        # Longest first, so extension lists no longer hold the product when a prefix is refilled
+        affected = sorted(self._ranked_lists(suffixes), key=lambda item: len(item[0]), reverse=True)
+        for prefix, top, store in affected:
+            if key not in top:
+                continue
+            if len(top) < self.TOP_K:
+                top.remove(key)
+            elif store is self._ranked:
+                store[prefix] = self._rerank(prefix, exclude=key)
+            else:
+                del store[prefix]
+    
+    def _rebuild(self) -> None:
+        """Rank every short or heavy prefix from the sorted array; forget the rest"""
+        self._memo.clear()
+        self._ranked = {}
+        self._rank_extensions("", 0, len(self._entries))
+    
+    def _rank_extensions(self, prefix: str, lo: int, hi: int) -> List[List[str]]:
+        """
+        Rank the one-character extensions of prefix among entries[lo:hi] (all
+        starting with prefix) and return their lists. Short or heavy extensions
+        are split further and ranked by merging their own extensions' lists.
+        """
+        length = len(prefix) + 1
+        tops = []
+        start = lo
+        while start < hi:
+            head = self._entries[start][0][:length]
+            if len(head) < length:
+                # Suffixes equal to the prefix itself: a group that can't be split
+                end = bisect_left(self._entries, (head + "\0",), start, hi)
+                tops.append(heapq.nlargest(self.TOP_K, {key for _, key in self._entries[start:end]}, key=self._rank))
+                start = end
+                continue
+            
+            end = bisect_left(self._entries, (head + _RANGE_END,), start, hi)
+            if length < self.SHORT_PREFIX_LENGTH or end - start > self.HEAVY_PREFIX_ENTRIES:
+                top = self._merge(self._rank_extensions(head, start, end))
+            else:
+                top = heapq.nlargest(self.TOP_K, {key for _, key in self._entries[start:end]}, key=self._rank)
+            self._ranked[head] = top
+            tops.append(top)
+            start = end
+        return tops
+    
+    def _rerank(self, prefix: str, exclude: Optional[str] = None) -> List[str]:
+        """
+        Rank a short or heavy prefix by merging its one-character extensions'
+        lists, ranking only the extensions that have none (recursively, down to
+        ranges of at most HEAVY_PREFIX_ENTRIES). exclude leaves out a product
+        whose entries are still indexed but which is being re-ranked.
+        """
+        start = bisect_left(self._entries, (prefix,))
+        end = bisect_left(self._entries, (prefix + _RANGE_END,), lo=start)
+        if len(prefix) >= self.SHORT_PREFIX_LENGTH and end - start <= self.HEAVY_PREFIX_ENTRIES:
+            keys = {key for _, key in self._entries[start:end]}
+            keys.discard(exclude)
+            return heapq.nlargest(self.TOP_K, keys, key=self._rank)
+        
+        length = len(prefix) + 1
+        tops = []
+        while start < end:
+            head = self._entries[start][0][:length]
+            if len(head) < length:
+                # Suffixes equal to the prefix itself
+                stop = bisect_left(self._entries, (head + "\0",), start, end)
+                keys = {key for _, key in self._entries[start:stop]}
+                keys.discard(exclude)
+                tops.append(heapq.nlargest(self.TOP_K, keys, key=self._rank))
+            else:
+                stop = bisect_left(self._entries, (head + _RANGE_END,), start, end)
+                top = self._ranked.get(head)
+                if top is None:
+                    top = self._ranked[head] = self._rerank(head, exclude)
+                tops.append(top)
+            start = stop
+        return self._merge(tops, exclude)
+    
+    def _merge(self, tops: List[List[str]], exclude: Optional[str] = None) -> List[str]:
+        if len(tops) == 1 and exclude not in tops[0]:
+            return list(tops[0])
+        merged: List[str] = []
+        seen = {exclude}
+        for key in heapq.merge(*tops, key=self._rank, reverse=True):
+            if key not in seen:
+                seen.add(key)
+                merged.append(key)
+                if len(merged) == self.TOP_K:
+                    break
+        return merged
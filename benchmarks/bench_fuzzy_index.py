@@ -0,0 +1,123 @@
+"""
+Benchmark Script: Fuzzy Product Name Index
+
+Build a TrigramIndex over a synthetic catalog of skincare product names
+(brand + product line + common descriptive words + product type, with
+am/pm, SPF and strength variants) and time lookups
+for three kinds of query:
+- hits: catalog names with a word dropped or a typo
+- brand misses: a real brand followed by common words that match no product
+- common-word misses: common words only
+
+Posting arrays are built on first use, so a first batch of hits is reported
+separately (cold) before the steady-state batches. Reports p50 / p99 / max
+latency per kind and the hit rate.
+
+Usage: python benchmarks/bench_fuzzy_index.py [--products N] [--queries N]
+"""
+
+import argparse
+import random
+import statistics
+import sys
+import time
+from pathlib import Path
+
+# Add the project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.services.fuzzy_index import TrigramIndex
+
+
+SYLLABLES = ["ce", "ra", "ve", "neo", "ski", "der", "ma", "lu", "mi", "aq", "ua", "pu", "re", "vi", "ta",
+             "glo", "bi", "o", "cla", "no", "va", "zen", "ter", "sol", "ky", "ro", "sa", "ji", "ko", "ha"]
+COMMON = ["hydrating", "facial", "moisturizing", "gentle", "daily", "oil free", "for sensitive skin",
+          "brightening", "soothing", "repair", "with hyaluronic acid", "niacinamide", "vitamin c",
+          "ceramide", "non comedogenic", "fragrance free", "lightweight", "deep", "foaming", "cream",
+          "water", "gel", "clarifying", "calming", "firming", "retinol", "peptide", "barrier", "rich",
+          "matte", "dewy", "anti aging", "acne", "pore", "cica", "green tea", "snail", "rice", "aloe", "honey"]
+TYPES = ["cleanser", "moisturizer", "lotion", "serum", "toner", "sunscreen", "essence", "gel",
+         "mask", "eye cream", "ampoule", "exfoliant"]
+VARIANTS = ["am", "pm", "spf 30", "spf 50", "2", "5", "10"]
+
+
+def word(rng: random.Random, syllables: int) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(syllables))
+
+
+def catalog(count: int, rng: random.Random):
+    """count unique names from ~2k brands with 20 product lines each"""
+    brands = sorted({word(rng, rng.randint(2, 3)) for _ in range(2500)})
+    lines = {brand: [word(rng, rng.randint(2, 4)) for _ in range(20)] for brand in brands}
+    names = set()
+    while len(names) < count:
+        brand = rng.choice(brands)
+        words = [brand, rng.choice(lines[brand])]
+        words += rng.sample(COMMON, rng.randint(1, 3))
+        words.append(rng.choice(TYPES))
+        if rng.random() < 0.2:
+            words.append(rng.choice(VARIANTS))
+        names.add(" ".join(words))
+    return sorted(names), brands
+
+
+def hit_query(name: str, rng: random.Random) -> str:
+    words = name.split()
+    if len(words) > 4 and rng.random() < 0.5:
+        del words[rng.randrange(2, len(words) - 1)]
+    else:
+        word = rng.randrange(len(words))
+        if len(words[word]) > 4:
+            position = rng.randrange(1, len(words[word]) - 1)
+            words[word] = words[word][:position] + words[word][position + 1:]
+    return " ".join(words)
+
+
+def measure(index: TrigramIndex, queries, threshold: float):
+    timings, hits = [], 0
+    for query in queries:
+        started = time.perf_counter()
+        match = index.search(query, threshold)
+        timings.append((time.perf_counter() - started) * 1000)
+        hits += match is not None
+    timings.sort()
+    return {
+        "p50": statistics.median(timings),
+        "p99": timings[int(len(timings) * 0.99) - 1],
+        "max": timings[-1],
+        "hit_rate": hits / len(queries)
+    }
+
+
+def run(products: int, queries: int, threshold: float):
+    rng = random.Random(7)
+    names, brands = catalog(products, rng)
+
+    started = time.perf_counter()
+    index = TrigramIndex()
+    for name in names:
+        index.add(name, [name])
+    print(f"🔧 Indexed {len(index):,} products in {time.perf_counter() - started:.1f}s")
+
+    kinds = {
+        "hits (cold)": [hit_query(rng.choice(names), rng) for _ in range(queries)],
+        "hits": [hit_query(rng.choice(names), rng) for _ in range(queries)],
+        "brand misses": [f"{rng.choice(brands)} {' '.join(rng.sample(COMMON, 3))} {rng.choice(TYPES)} xq" for _ in range(queries)],
+        "common-word misses": [" ".join(rng.sample(COMMON, 4)) for _ in range(queries)],
+    }
+
+    print(f"📊 Lookup latency at threshold {threshold} (ms)")
+    print("=" * 62)
+    print(f"{'queries':<22}{'p50':>9}{'p99':>9}{'max':>9}{'hit rate':>13}")
+    for kind, batch in kinds.items():
+        result = measure(index, batch, threshold)
+        print(f"{kind:<22}{result['p50']:>9.3f}{result['p99']:>9.3f}{result['max']:>9.3f}{result['hit_rate']:>12.0%}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--products", type=int, default=100000, help="catalog size")
+    parser.add_argument("--queries", type=int, default=2000, help="queries per kind")
+    parser.add_argument("--threshold", type=float, default=0.7, help="similarity threshold")
+    args = parser.parse_args()
+    run(args.products, args.queries, args.threshold)
@@ -0,0 +1,120 @@
+"""
+Benchmark Script: JSON Extraction
+
+Compare the tolerant JSON extractor with the ad-hoc parsers the LLM phases
+used before it (fence stripping, non-greedy regex, clean_response) on clean
+and malformed model output. "scanner" is the repairing pass on its own,
+without the decoder fast path. Reports whether each parser recovers the
+expected value and the time per call.
+
+Usage: python benchmarks/bench_json_extractor.py [--number N]
+"""
+
+import argparse
+import json
+import re
+import sys
+import timeit
+from pathlib import Path
+
+# Add the project root to path
+sys.path.append(str(Path(__file__).parent.parent))
+
+from app.core.json_extractor import JSONExtractor, extract_json
+
+
+PRODUCTS = [{"name": f"Product {i} Gentle Cleanser", "price": f"₱{100 + i * 37:,}.00"} for i in range(5)]
+FUTURE = [
+    {"category": "serum", "products": PRODUCTS[:2]},
+    {"category": "toner", "products": PRODUCTS[2:4]}
+]
+LARGE = [{"name": f"Product {i}", "price": f"₱{100 + i:,}.00"} for i in range(200)]
+
+CASES = {
+    "clean array": (json.dumps(PRODUCTS, ensure_ascii=False), PRODUCTS),
+    "fenced array": ("```json\n" + json.dumps(PRODUCTS, indent=2, ensure_ascii=False) + "\n```", PRODUCTS),
+    "prose + array": ("Here are my picks:\n" + json.dumps(PRODUCTS, ensure_ascii=False) + "\nEnjoy!", PRODUCTS),
+    "trailing comma": (json.dumps(PRODUCTS, ensure_ascii=False)[:-1] + ",]", PRODUCTS),
+    "smart quotes": (json.dumps(PRODUCTS, ensure_ascii=False).replace('"name"', "“name”"), PRODUCTS),
+    "nested (future)": ("```json\n" + json.dumps(FUTURE, ensure_ascii=False) + "\n```", FUTURE),
+    "prose + nested": ("Recommendations: " + json.dumps(FUTURE, ensure_ascii=False), FUTURE),
+    "truncated": (json.dumps(PRODUCTS, ensure_ascii=False)[:-20], PRODUCTS[:4]),
+    "large clean": (json.dumps(LARGE, ensure_ascii=False), LARGE),
+    "large truncated": (json.dumps(LARGE, ensure_ascii=False)[:-10], LARGE[:-1]),
+}
+
+
+def legacy_products(raw: str):
+    """Phase 3 get_product_recommendations parser before the extractor"""
+    if raw.startswith("```"):
+        lines = raw.split('\n')
+        json_start = 1 if lines[0].startswith("```") else 0
+        json_end = len(lines)
+        for i in range(len(lines) - 1, -1, -1):
+            if lines[i].strip() == "```":
+                json_end = i
+                break
+        raw = '\n'.join(lines[json_start:json_end]).strip()
+
+    raw = raw.replace("```json", "").replace("```", "").strip()
+
+    if not (raw.startswith('[') and raw.endswith(']')):
+        json_match = re.search(r'\[.*?\]', raw, re.DOTALL)
+        if json_match:
+            raw = json_match.group()
+
+    return json.loads(raw)
+
+
+def legacy_clean_response(raw: str):
+    """Phase 2 clean_response + greedy regex, applied to arrays"""
+    text = raw.replace("`", "").replace("“", '"').replace("”", '"').replace("’", "'").strip()
+    text = re.sub(r'^\s*```[a-zA-Z]*', '', text, flags=re.MULTILINE)
+    text = re.sub(r'```\s*$', '', text, flags=re.MULTILINE)
+    text = re.sub(r'^\s*json', '', text)
+    return json.loads(re.search(r"\[.*\]", text, re.DOTALL).group())
+
+
+PARSERS = {
+    "json.loads": json.loads,
+    "legacy phase 3": legacy_products,
+    "legacy phase 2": legacy_clean_response,
+    "extractor": lambda raw: extract_json(raw, "["),
+    "scanner": lambda raw: _scan(raw),
+}
+
+
+def _scan(raw: str):
+    """The extractor's repairing scanner alone, without the decoder fast path"""
+    extractor = JSONExtractor("[")
+    extractor.feed(raw)
+    return extractor.close()
+
+
+def run(number: int):
+    print("📊 JSON extraction benchmark")
+    print("=" * 93)
+    print(f"{'case':<18}" + "".join(f"{name:>15}" for name in PARSERS))
+    for case, (text, expected) in CASES.items():
+        cells = []
+        for parser in PARSERS.values():
+            try:
+                ok = parser(text) == expected
+            except Exception:
+                ok = False
+            seconds = timeit.timeit(lambda: _attempt(parser, text), number=number) / number
+            cells.append(f"{'✓' if ok else '✗'} {seconds * 1e6:9.1f}µs")
+        print(f"{case:<18}" + "".join(f"{cell:>15}" for cell in cells))
+
+
+def _attempt(parser, text):
+    try:
+        parser(text)
+    except Exception:
+        pass
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--number", type=int, default=2000, help="calls per parser and case")
+    run(parser.parse_args().number)
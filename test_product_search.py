@@ -12,6 +12,7 @@ from pathlib import Path
 sys.path.append(str(Path(__file__).parent))
 
 from app.core.database import Database
+from app.core.http_client import HTTPClient
 from app.services.product_search_service import product_search_service
 
 
@@ -72,7 +73,8 @@ async def test_product_search():
     except Exception as e:
         print(f"❌ Error getting user products: {e}")
     
-    # Close database connection
+    # Close HTTP and database connections
+    await HTTPClient.disconnect()
     Database.disconnect()
     print("\n🎉 Test completed!")
 
@@ -0,0 +1,78 @@
+from app.services.allergen_index import AllergenIndex, ingredient_tokens, normalize_allergies, token_conflicts
+
+
+def index_with(products):
+    index = AllergenIndex()
+    for key, ingredients in products.items():
+        index.add(key, ingredient_tokens({"ingredients": ingredients}))
+    return index
+
+
+def conflicts(index, key, allergies):
+    return index.conflicts(key, index.allergy_bitsets(allergies))
+
+
+def test_ingredient_tokens_split_and_unwrap_parentheticals():
+    tokens = ingredient_tokens({"ingredients": "Ingredients: Water, Butyrospermum Parkii (Shea) Butter, Parfum (Fragrance)"})
+
+    assert tokens == ["butyrospermum parkii butter", "fragrance", "parfum", "shea", "water"]
+
+
+def test_normalize_allergies_expands_only_group_names():
+    assert normalize_allergies(["Fragrances", "nuts", "Essential Oils"]) == (["fragrance", "nut", "essential_oil"], [])
+    assert normalize_allergies(["coconut oil", "none", ""]) == ([], ["coconut oil"])
+    assert normalize_allergies(["lavender"]) == ([], ["lavender"])
+
+
+def test_alcohol_group_does_not_match_phenoxyethanol():
+    index = index_with({
+        "serum": "Water, Glycerin, Phenoxyethanol",
+        "toner": "Water, Alcohol Denat., Ethanol",
+    })
+
+    assert conflicts(index, "serum", ["alcohol"]) == []
+    assert conflicts(index, "toner", ["alcohol"]) == ["alcohol"]
+
+
+def test_nut_group_does_not_match_coconut_oil():
+    index = index_with({
+        "balm": "Cocos Nucifera (Coconut) Oil, Coconut Oil",
+        "cream": "Water, Prunus Amygdalus Dulcis (Sweet Almond) Oil",
+    })
+
+    assert conflicts(index, "balm", ["tree nuts"]) == []
+    assert conflicts(index, "cream", ["tree nuts"]) == ["nut"]
+
+
+def test_affix_aliases_match_ingredient_families():
+    index = index_with({"lotion": "Water, Methylparaben, Cyclopentasiloxane, Soybean Oil"})
+
+    assert conflicts(index, "lotion", ["parabens", "silicones", "soy"]) == ["paraben", "silicone", "soy"]
+
+
+def test_plain_terms_match_whole_words():
+    index = index_with({
+        "balm": "Coconut Oil, Beeswax",
+        "serum": "Water, Coconut Alkanes",
+    })
+
+    assert conflicts(index, "balm", ["coconut oil"]) == ["coconut oil"]
+    assert conflicts(index, "serum", ["coconut oil"]) == []
+    assert conflicts(index, "serum", ["coconut"]) == ["coconut"]
+
+
+def test_reindexing_updates_group_bits():
+    index = index_with({"serum": "Water, Parfum"})
+    assert conflicts(index, "serum", ["fragrance"]) == ["fragrance"]
+
+    index.add("serum", ingredient_tokens({"ingredients": "Water, Glycerin"}))
+
+    assert conflicts(index, "serum", ["fragrance"]) == []
+    assert index.has_ingredients("serum")
+    assert conflicts(index, "unknown", ["fragrance"]) == []
+
+
+def test_token_conflicts_for_products_outside_the_index():
+    tokens = ingredient_tokens({"ingredients": "Water, Phenoxyethanol, Linalool"})
+
+    assert token_conflicts(tokens, ["alcohol", "essential oils", "linalool"]) == ["essential_oil", "linalool"]
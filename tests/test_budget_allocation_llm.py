@@ -0,0 +1,35 @@
+import asyncio
+
+from app.models.skincare.form_schemas import FormData
+from app.models.skincare.recommendation_schemas import BudgetAllocation
+from app.services.product_recommendation_service import Phase3Service
+
+
+FORM = FormData(
+    skin_type=["dry"],
+    skin_conditions=["Dullness"],
+    budget="₱1500",
+    allergies=[],
+    product_experiences=[],
+    goals=["hydration"]
+)
+
+
+def llm_allocation(monkeypatch, **values):
+    service = Phase3Service()
+
+    async def generate_json(prompt, schema):
+        return BudgetAllocation(**values)
+
+    monkeypatch.setattr(service, "llm", type("FakeLLM", (), {"generate_json": staticmethod(generate_json)})())
+    return asyncio.run(service._get_llm_budget_allocation(FORM, ["facial_wash", "moisturizer", "sunscreen"]))
+
+
+def test_zero_and_null_categories_outside_the_allowed_set_are_ignored(monkeypatch):
+    allocation = llm_allocation(monkeypatch, facial_wash=30, moisturizer=40, sunscreen=30, serum=0, toner=None)
+
+    assert allocation == {"facial_wash": 30, "moisturizer": 40, "sunscreen": 30}
+
+
+def test_positive_allocation_outside_the_allowed_set_is_rejected(monkeypatch):
+    assert llm_allocation(monkeypatch, facial_wash=30, moisturizer=40, serum=30) is None
@@ -0,0 +1,37 @@
+from app.services.budget_allocator import BASE_WEIGHTS, allocate_budget, category_weights, to_percentages
+
+
+def test_category_weights_apply_skin_type_and_concern_multipliers():
+    weights = category_weights(["moisturizer", "treatment", "exfoliant"], ["sensitive"], ["Acne breakouts"])
+
+    assert weights["moisturizer"] == BASE_WEIGHTS["moisturizer"] * 1.1
+    assert weights["treatment"] == BASE_WEIGHTS["treatment"] * 0.8 * 1.4
+    assert weights["exfoliant"] == BASE_WEIGHTS["exfoliant"] * 0.5
+
+
+def test_unknown_categories_get_a_default_weight():
+    assert category_weights(["lip_balm"], [], []) == {"lip_balm": 5.0}
+
+
+def test_to_percentages_sums_to_100_with_largest_remainders():
+    assert to_percentages({"a": 1, "b": 1, "c": 1}) == {"a": 34, "b": 33, "c": 33}
+    assert sum(to_percentages({"a": 2.7, "b": 13.1, "c": 0.4, "d": 7.9}).values()) == 100
+
+
+def test_to_percentages_of_nothing_is_empty():
+    assert to_percentages({}) == {}
+    assert to_percentages({"a": 0.0}) == {}
+
+
+def test_allocate_budget_keeps_category_order():
+    allocation = allocate_budget(["serum", "eye_cream", "sunscreen", "toner"], ["dry"], ["fine lines", "dark circles"])
+
+    assert list(allocation) == ["serum", "eye_cream", "sunscreen", "toner"]
+    assert allocation == {"serum": 28, "eye_cream": 21, "sunscreen": 40, "toner": 11}
+
+
+def test_allocate_budget_is_deterministic():
+    args = (["facial_wash", "moisturizer", "sunscreen"], ["oily", "acne-prone"], ["pores", "acne"])
+
+    assert allocate_budget(*args) == allocate_budget(*args)
+    assert sum(allocate_budget(*args).values()) == 100
@@ -0,0 +1,24 @@
+from bson import ObjectId
+
+from app.services.catalog_index import CatalogIndexes
+
+
+def test_product_key_of_cached_and_crud_documents():
+    assert CatalogIndexes.product_key({"_id": "cerave foaming cleanser"}) == "cerave foaming cleanser"
+    assert CatalogIndexes.product_key({"_id": ObjectId(), "key": "cerave foaming cleanser"}) == "cerave foaming cleanser"
+    # Lookups match the key field as stored, so a non-canonical one can't be resolved
+    assert CatalogIndexes.product_key({"_id": ObjectId(), "key": "CeraVe Foaming Cleanser"}) is None
+    assert CatalogIndexes.product_key({"key": ""}) is None
+
+
+def test_crud_products_are_indexed_and_removed_by_key():
+    indexes = CatalogIndexes()
+    indexes.add_product({"key": "cerave foaming cleanser", "title": "CeraVe Foaming Cleanser", "reviews": 12})
+
+    assert indexes.fuzzy.search("cerave foaming cleanser", 0.7)[0] == "cerave foaming cleanser"
+    assert indexes.suggest.suggest("foam")[0]["key"] == "cerave foaming cleanser"
+
+    indexes.remove_product("cerave foaming cleanser")
+
+    assert indexes.fuzzy.search("cerave foaming cleanser", 0.7) is None
+    assert indexes.suggest.suggest("foam") == []
@@ -0,0 +1,41 @@
+from app.services.catalog_recommender import CatalogRecommender
+
+
+PRODUCTS = [
+    {"_id": "gentle-cleanser", "query": "Gentle Foaming Cleanser", "title": "Gentle Foaming Cleanser",
+     "extracted_price": 450.0, "rating": 4.7, "reviews": 900,
+     "classification": {"category": "facial_wash", "skin_types": ["oily", "sensitive"]}},
+    {"_id": "rose-cleanser", "query": "Rose Cleanser", "title": "Rose Cleanser with Fragrance",
+     "extracted_price": 300.0, "rating": 4.9, "reviews": 1200,
+     "classification": {"category": "facial_wash", "skin_types": ["oily"]}},
+    {"_id": "luxury-cleanser", "query": "Luxury Cleanser", "title": "Luxury Cleanser",
+     "extracted_price": 5000.0, "rating": 5.0, "reviews": 50,
+     "classification": {"category": "facial_wash", "skin_types": ["oily"]}},
+    {"_id": "barrier-cream", "query": "Barrier Cream", "title": "Barrier Repair Moisturizer",
+     "extracted_price": 800.0, "rating": 4.5, "reviews": 300,
+     "classification": {"category": "moisturizer", "skin_types": ["dry"]}},
+    {"_id": "unpriced", "title": "Mystery Cleanser", "classification": {"category": "facial_wash"}},
+]
+
+
+def test_build_keeps_priced_classified_products():
+    recommender = CatalogRecommender()
+    recommender.build(PRODUCTS, {"gentle-cleanser": 3})
+
+    assert len(recommender) == 4
+    assert recommender.stats()["per_category"]["facial_wash"] == 3
+    assert recommender.popularity.max() == 1.0
+
+
+def test_recommend_filters_category_budget_and_allergies():
+    recommender = CatalogRecommender()
+    recommender.build(PRODUCTS, {})
+
+    picks = recommender.recommend("facial_wash", 1000, ["oily"], [], k=5)
+    assert [pick["name"] for pick in picks] == ["Gentle Foaming Cleanser", "Rose Cleanser"]
+    assert picks[0]["price"] == "₱450.00"
+
+    picks = recommender.recommend("facial_wash", 1000, ["oily"], ["fragrance"], k=5)
+    assert [pick["name"] for pick in picks] == ["Gentle Foaming Cleanser"]
+
+    assert recommender.recommend("toner", 1000, ["oily"], []) == []
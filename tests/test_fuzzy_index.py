@@ -0,0 +1,99 @@
+from app.services.fuzzy_index import TrigramIndex, distinguishing_tokens
+
+
+def build(*names):
+    index = TrigramIndex()
+    for name in names:
+        index.add(name, [name])
+    return index
+
+
+def test_finds_name_with_a_typo():
+    index = build("cerave hydrating facial cleanser", "cetaphil gentle skin cleanser")
+
+    key, score = index.search("cerave hydratng facial cleanser", 0.7)
+
+    assert key == "cerave hydrating facial cleanser"
+    assert 0.7 <= score < 1
+
+
+def test_exact_name_scores_one():
+    index = build("the ordinary niacinamide 10 zinc 1")
+
+    assert index.search("the ordinary niacinamide 10 zinc 1", 0.7) == ("the ordinary niacinamide 10 zinc 1", 1.0)
+
+
+def test_below_threshold_is_a_miss():
+    index = build("cerave hydrating facial cleanser")
+
+    assert index.search("la roche posay toleriane moisturizer", 0.7) is None
+
+
+def test_am_and_pm_variants_do_not_match():
+    index = build("cerave pm facial moisturizing lotion")
+
+    assert index.search("cerave am facial moisturizing lotion", 0.7) is None
+
+
+def test_picks_the_matching_variant():
+    index = build("cerave pm facial moisturizing lotion", "cerave am facial moisturizing lotion")
+
+    key, _ = index.search("cerave am facial moisturizing lotion", 0.7)
+
+    assert key == "cerave am facial moisturizing lotion"
+
+
+def test_conflicting_strengths_do_not_match():
+    index = build("the ordinary retinol 1 in squalane")
+
+    assert index.search("the ordinary retinol 0.5 in squalane", 0.7) is None
+
+
+def test_query_without_variant_token_still_matches():
+    index = build("cerave pm facial moisturizing lotion")
+
+    key, _ = index.search("cerave facial moisturizing lotion", 0.7)
+
+    assert key == "cerave pm facial moisturizing lotion"
+
+
+def test_distinguishing_tokens():
+    assert distinguishing_tokens("anessa spf 50 sunscreen am") == {"50", "am"}
+    assert distinguishing_tokens("foundation n20 fair 30ml") == {"n20", "fair", "30ml"}
+    assert distinguishing_tokens("cleansing gel for oily skin") == frozenset()
+
+
+def test_short_words_do_not_veto_a_match():
+    index = build("cerave foaming facial cleanser for normal to oily skin")
+
+    key, _ = index.search("cerave foaming facial cleanser gel normal to oily skin", 0.7)
+
+    assert key == "cerave foaming facial cleanser for normal to oily skin"
+
+
+def test_conflicting_shades_do_not_match():
+    index = build("estee lauder double wear foundation fair")
+
+    assert index.search("estee lauder double wear foundation tan", 0.7) is None
+
+
+def test_remove_and_reindex():
+    index = build("cerave hydrating facial cleanser")
+
+    index.remove("cerave hydrating facial cleanser")
+    assert index.search("cerave hydrating facial cleanser", 0.7) is None
+    assert len(index) == 0
+
+    index.add("cerave-cleanser", ["cerave hydrating facial cleanser", "cerave hydrating cleanser"])
+    assert index.search("cerave hydrating cleanser", 0.7) == ("cerave-cleanser", 1.0)
+    assert len(index) == 1
+
+
+def test_search_after_add_sees_new_documents():
+    index = build("cerave hydrating facial cleanser")
+    index.search("cerave hydrating facial cleanser", 0.7)
+
+    index.add("cerave foaming facial cleanser", ["cerave foaming facial cleanser"])
+
+    key, _ = index.search("cerave foaming facial cleanser", 0.7)
+    assert key == "cerave foaming facial cleanser"
@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+from app.core.json_extractor import JSONExtractor, extract_json
+from app.core.llm_client import LLMResponseError, parse_json
+from app.models.skincare.recommendation_schemas import FusedRecommendationResponse, Product
+
+
+PRODUCTS = [{"name": f"Product {i}", "price": f"₱{100 * (i + 1)}.00"} for i in range(3)]
+FUSED = {
+    "allocation": {"facial_wash": 40, "moisturizer": 60},
+    "products": {"facial_wash": PRODUCTS[:2], "moisturizer": PRODUCTS[2:]},
+    "future_recommendations": [
+        {"category": "serum", "products": PRODUCTS[:1]},
+        {"category": "toner", "products": PRODUCTS[1:]},
+    ],
+}
+
+
+def test_clean_fenced_and_prose_wrapped_output():
+    text = json.dumps(PRODUCTS, ensure_ascii=False)
+
+    assert extract_json(text) == PRODUCTS
+    assert extract_json(f"```json\n{text}\n```") == PRODUCTS
+    assert extract_json(f"Here are my picks: {text} Enjoy!", "[") == PRODUCTS
+
+
+def test_repairs_are_reported():
+    repairs = []
+    text = '[{"name": “Serum”, "price": "₱1.00",}, {name: "Toner", "price": None},]'
+
+    assert extract_json(text, "[", repairs) == [{"name": "Serum", "price": "₱1.00"}, {"name": "Toner", "price": None}]
+    assert set(repairs) == {"smart quotes", "trailing comma", "unquoted key", "python literal"}
+
+
+def test_truncated_array_keeps_complete_items():
+    text = json.dumps(PRODUCTS, ensure_ascii=False)[:-20]
+
+    assert extract_json(text, "[") == PRODUCTS[:2]
+
+
+def test_truncated_object_keeps_containers_completed_before_the_cut():
+    text = json.dumps(FUSED, ensure_ascii=False)
+    cut = text.index('"Product 2"', text.index("toner"))
+
+    value = extract_json(text[:cut], "{")
+
+    assert value["allocation"] == FUSED["allocation"]
+    assert value["products"] == FUSED["products"]
+    assert value["future_recommendations"] == [
+        {"category": "serum", "products": PRODUCTS[:1]},
+        {"category": "toner", "products": PRODUCTS[1:2]},
+    ]
+
+
+def test_truncated_object_drops_only_the_unfinished_record():
+    text = '{"products": {"serum": [{"name": "A", "price": "₱1.00"}, {"name": "B", "pri'
+
+    assert extract_json(text, "{") == {"products": {"serum": [{"name": "A", "price": "₱1.00"}]}}
+
+
+def test_incremental_feed_reports_root_items():
+    extractor = JSONExtractor("[")
+    text = json.dumps(PRODUCTS)
+
+    completed = extractor.feed(text[:40]) + extractor.feed(text[40:])
+
+    assert completed == PRODUCTS
+    assert extractor.close() == PRODUCTS and extractor.complete
+
+
+def test_no_json_raises():
+    with pytest.raises(ValueError):
+        extract_json("I could not find any products.")
+
+
+def test_parse_json_repairs_truncated_fused_response():
+    text = "```json\n" + json.dumps(FUSED, ensure_ascii=False)[:-30]
+
+    response = parse_json(text, FusedRecommendationResponse)
+
+    assert response.allocation.facial_wash == 40
+    assert [product.name for product in response.products.facial_wash] == ["Product 0", "Product 1"]
+    assert [future.category for future in response.future_recommendations] == ["serum", "toner"]
+
+
+def test_parse_json_rejects_schema_mismatch():
+    with pytest.raises(LLMResponseError):
+        parse_json('[{"name": "Serum"}]', list[Product])
@@ -0,0 +1,43 @@
+from app.services.product_classifier import classify_category, classify_products, price_tiers
+
+
+def test_price_tiers_split_each_category_into_terciles():
+    prices = [100, 200, 300, 400, 500, 600, 700, 800, 900]
+
+    tiers, bounds = price_tiers(["serum"] * 9, prices)
+
+    assert tiers == ["cheap"] * 3 + ["mid-range"] * 3 + ["expensive"] * 3
+    assert bounds == {"serum": [366.67, 633.33]}
+
+
+def test_price_tiers_are_computed_per_category():
+    tiers, bounds = price_tiers(
+        ["serum", "serum", "serum", "toner", "toner", "toner"],
+        [1000, 2000, 3000, 100, 200, 300]
+    )
+
+    assert tiers == ["cheap", "mid-range", "expensive"] * 2
+    assert set(bounds) == {"serum", "toner"}
+
+
+def test_price_tiers_skip_unpriced_and_unclassified_products():
+    tiers, _ = price_tiers(["serum", "serum", None, "serum"], [500, None, 300, 0])
+
+    assert tiers[1:] == [None, None, None]
+
+
+def test_classify_category_from_title_keywords():
+    assert classify_category("CeraVe Hydrating Facial Cleanser") == "facial_wash"
+    assert classify_category("Mystery Item") is None
+
+
+def test_classify_products_tags_category_and_tier():
+    products = [
+        {"title": f"Brand {i} Hydrating Serum", "extracted_price": price}
+        for i, price in enumerate([300, 600, 900])
+    ]
+
+    classifications = classify_products(products)
+
+    assert [c["category"] for c in classifications] == ["serum"] * 3
+    assert [c["price_tier"] for c in classifications] == ["cheap", "mid-range", "expensive"]
@@ -0,0 +1,51 @@
+import asyncio
+
+from app.services.allergen_index import AllergenIndex, ingredient_tokens
+from app.services.catalog_index import catalog_indexes
+from app.services.product_enrichment_service import ProductEnrichmentService
+from app.services.product_search_service import product_search_service
+
+
+def test_allergen_conflicts_are_dropped_and_unknowns_marked(monkeypatch):
+    allergens = AllergenIndex()
+    allergens.add("rose toner", ingredient_tokens({"ingredients": "Water, Parfum"}))
+    allergens.add("plain toner", ingredient_tokens({"ingredients": "Water, Glycerin"}))
+    monkeypatch.setattr(catalog_indexes, "allergens", allergens)
+
+    service = ProductEnrichmentService()
+    entries = [("toner", {"name": name}) for name in ("rose", "plain", "new", "fetched", "missing")]
+    results = [
+        ({"_id": "rose toner", "title": "Rose Toner"}, None),
+        ({"_id": "plain toner"}, None),
+        ({"_id": "new toner"}, None),
+        ({"_id": "fetched toner", "ingredient_tokens": ["water", "linalool"]}, None),
+        (None, "Product details not found"),
+    ]
+
+    kept_entries, kept_results, checks = service._drop_allergen_conflicts(entries, results, ["Fragrance", "linalool"])
+
+    assert [entry[1]["name"] for entry in kept_entries] == ["plain", "new", "missing"]
+    assert checks == ["passed", "ingredients_unknown", None]
+    assert kept_results[-1] == (None, "Product details not found")
+
+
+def test_missing_ingredients_are_fetched_before_filtering(monkeypatch):
+    monkeypatch.setattr(catalog_indexes, "allergens", AllergenIndex())
+    fetched = []
+
+    async def fetch_product_details(product):
+        fetched.append(product["_id"])
+        return {**product, "ingredient_tokens": ["water", "parfum"]}
+
+    monkeypatch.setattr(product_search_service, "fetch_product_details", fetch_product_details)
+    service = ProductEnrichmentService()
+    results = [
+        ({"_id": "lazy", "product_api_url": "https://serpapi.com/search.json?product_id=1"}, None),
+        ({"_id": "no api url"}, None),
+        ({"_id": "known", "ingredient_tokens": ["water"]}, None),
+    ]
+
+    results = asyncio.run(service._fetch_missing_ingredients(asyncio.Semaphore(2), results))
+
+    assert fetched == ["lazy"]
+    assert results[0][0]["ingredient_tokens"] == ["water", "parfum"]
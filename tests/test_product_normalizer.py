@@ -0,0 +1,30 @@
+from app.services.product_normalizer import canonical_product_key, clean_search_query, fold_unicode
+
+
+def test_fold_unicode_strips_accents_and_casefolds():
+    assert fold_unicode("Crème ÉCLAT Straße") == "creme eclat strasse"
+
+
+def test_spelling_variants_share_one_key():
+    variants = [
+        "CeraVe Foaming Facial Cleanser (For Normal to Oily Skin) 236ml",
+        "Cera Ve Foaming Facial Cleanser, 8 fl. oz",
+        "CERAVE foaming facial cleanser - pack of 2",
+    ]
+
+    assert {canonical_product_key(name) for name in variants} == {"cerave foaming facial cleanser"}
+
+
+def test_brand_aliases_are_mapped():
+    assert canonical_product_key("LRP Toleriane") == "la roche posay toleriane"
+    assert canonical_product_key("La Roche-Posay Toleriane") == "la roche posay toleriane"
+    assert canonical_product_key("Paula's Choice 2% BHA Liquid Exfoliant") == "paulas choice 2 bha liquid exfoliant"
+
+
+def test_sizes_are_removed_but_strengths_and_spf_are_kept():
+    assert canonical_product_key("La Roche-Posay Anthelios SPF 50 1.7 fl oz") == "la roche posay anthelios spf 50"
+    assert canonical_product_key("The Ordinary Niacinamide 10% + Zinc 1% 30ml") == "the ordinary niacinamide 10 zinc 1"
+
+
+def test_clean_search_query_drops_notes_and_keeps_sizes():
+    assert clean_search_query("CeraVe Cleanser (patch test only) 236ml  use sparingly") == "CeraVe Cleanser 236ml"
@@ -0,0 +1,67 @@
+import asyncio
+
+from app.services.product_cache import product_l1_cache
+from app.services.product_search_service import product_search_service
+
+
+class FakeCursor:
+    def __init__(self, documents):
+        self._documents = iter(documents)
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self._documents)
+        except StopIteration:
+            raise StopAsyncIteration
+
+
+def matches(document, query):
+    if "$or" in query:
+        return any(matches(document, clause) for clause in query["$or"])
+    for field, condition in query.items():
+        if isinstance(condition, dict):
+            if document.get(field) not in condition["$in"]:
+                return False
+        elif document.get(field) != condition:
+            return False
+    return True
+
+
+class FakeCollection:
+    def __init__(self, documents):
+        self.documents = documents
+
+    async def find_one(self, query):
+        return next((document for document in self.documents if matches(document, query)), None)
+
+    def find(self, query):
+        return FakeCursor([document for document in self.documents if matches(document, query)])
+
+
+def use_collection(monkeypatch, documents):
+    collection = FakeCollection(documents)
+    monkeypatch.setattr(product_search_service, "_get_database", lambda: {product_search_service.products_cache_collection: collection})
+    product_l1_cache.invalidate()
+
+
+CRUD_DOCUMENT = {"_id": object(), "key": "cerave foaming cleanser", "title": "CeraVe Foaming Cleanser"}
+CACHED_DOCUMENT = {"_id": "cerave hydrating cleanser", "key": "cerave hydrating cleanser", "title": "CeraVe Hydrating Cleanser"}
+
+
+def test_exact_lookup_falls_back_to_the_key_field(monkeypatch):
+    use_collection(monkeypatch, [CRUD_DOCUMENT, CACHED_DOCUMENT])
+
+    assert asyncio.run(product_search_service.search_product_in_cache("CeraVe Foaming Cleanser")) is CRUD_DOCUMENT
+    assert asyncio.run(product_search_service.search_product_in_cache("CeraVe Hydrating Cleanser")) is CACHED_DOCUMENT
+
+
+def test_bulk_lookup_finds_documents_by_id_or_key(monkeypatch):
+    shadowed = {"_id": object(), "key": "cerave hydrating cleanser", "title": "Old CRUD copy"}
+    use_collection(monkeypatch, [CRUD_DOCUMENT, shadowed, CACHED_DOCUMENT])
+
+    hits = asyncio.run(product_search_service.find_many_in_cache(["CeraVe Foaming Cleanser", "CeraVe Hydrating Cleanser"]))
+
+    assert hits == {"cerave foaming cleanser": CRUD_DOCUMENT, "cerave hydrating cleanser": CACHED_DOCUMENT}
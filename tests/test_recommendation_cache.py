@@ -0,0 +1,44 @@
+import numpy as np
+
+from app.models.skincare.form_schemas import FormData
+from app.services.profile_index import ProfileIndex, profile_vector
+from app.services.recommendation_cache import canonical_profile, profile_fingerprint
+
+
+FORM = FormData(
+    skin_type=["oily", "sensitive"],
+    skin_conditions=["Acne", "redness"],
+    budget="$50",
+    allergies=["Fragrance"],
+    product_experiences=[],
+    goals=["clear skin"]
+)
+
+
+def test_fingerprint_ignores_order_and_case():
+    reordered = FORM.model_copy(update={"skin_type": ["sensitive", "oily"], "skin_conditions": ["Redness", "acne"]})
+
+    assert profile_fingerprint(canonical_profile(FORM, 2800, None, "rules", "fanout")) == \
+        profile_fingerprint(canonical_profile(reordered, 2800, None, "rules", "fanout"))
+
+
+def test_fingerprint_depends_on_prompt_mode():
+    fanout = canonical_profile(FORM, 2800, None, "rules", "fanout")
+    fused = canonical_profile(FORM, 2800, None, "rules", "fused")
+
+    assert profile_fingerprint(fanout) != profile_fingerprint(fused)
+
+
+def test_similar_profiles_only_match_the_same_modes():
+    profile = canonical_profile(FORM, 2800, None, "rules", "fanout")
+    vector = profile_vector(profile, 2800)
+    index = ProfileIndex()
+    index.add("cached", vector, budget_tier=1, allocation_mode="rules", prompt_mode="fanout", allergies=["fragrance"], expires_at=2e9)
+
+    def nearest(prompt_mode):
+        return index.nearest(vector, budget_tier=1, allocation_mode="rules", prompt_mode=prompt_mode,
+                             allergies=["fragrance"], threshold=0.9, now=1e9)
+
+    assert nearest("fanout")[0] == "cached"
+    assert nearest("fused") is None
+    assert np.isclose(nearest("fanout")[1], 1.0)
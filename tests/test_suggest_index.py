@@ -0,0 +1,108 @@
+import heapq
+import random
+
+from app.services.suggest_index import PrefixIndex, normalize_prefix
+
+
+PRODUCTS = [
+    ("cerave-cleanser", "CeraVe Hydrating Facial Cleanser", 120),
+    ("cerave-lotion", "CeraVe PM Facial Moisturizing Lotion", 300),
+    ("cetaphil-cleanser", "Cetaphil Gentle Skin Cleanser", 80),
+    ("cosrx-snail", "COSRX Advanced Snail 96 Mucin Power Essence", 500),
+    ("ordinary-niacinamide", "The Ordinary Niacinamide 10% + Zinc 1%", 900),
+]
+
+
+def keys(results):
+    return [result["key"] for result in results]
+
+
+def brute_force(index, prefix, limit):
+    prefix = normalize_prefix(prefix)
+    matching = [key for key, suffixes in index._suffixes.items() if any(s.startswith(prefix) for s in suffixes)]
+    return heapq.nlargest(limit, matching, key=index._rank)
+
+
+def test_matches_any_word_start_ranked_by_reviews():
+    index = PrefixIndex()
+    index.add_many(PRODUCTS)
+
+    assert keys(index.suggest("cleans")) == ["cerave-cleanser", "cetaphil-cleanser"]
+    assert keys(index.suggest("ce")) == ["cerave-lotion", "cerave-cleanser", "cetaphil-cleanser"]
+    assert keys(index.suggest("Niacinamide 10")) == ["ordinary-niacinamide"]
+    assert index.suggest("xyz") == []
+
+
+def test_recommendations_outrank_reviews():
+    index = PrefixIndex()
+    index.add_many(PRODUCTS)
+    index.suggest("c")
+
+    index.record_recommendation("cetaphil-cleanser")
+
+    results = index.suggest("c")
+    assert keys(results)[0] == "cetaphil-cleanser"
+    assert results[0]["recommendations"] == 1
+
+
+def test_ranked_lists_follow_updates():
+    index = PrefixIndex()
+    index.TOP_K = 2
+    index.add_many(PRODUCTS)
+    prefixes = ["c", "ce", "cer", "cleanser", "facial", "s", "snail", "m"]
+
+    index.set_recommendations({"cetaphil-cleanser": 3, "cerave-lotion": 1})
+    index.record_recommendation("cerave-cleanser")
+    index.add("new-serum", "CeraVe Skin Renewing Serum", 1000)
+    index.remove("cerave-lotion")
+    index.add("cosrx-snail", "COSRX Snail Mucin Cleanser", 0)
+    index.set_recommendations({"cetaphil-cleanser": 1})
+
+    for prefix in prefixes:
+        for limit in (1, 2):
+            assert keys(index.suggest(prefix, limit)) == brute_force(index, prefix, limit), prefix
+
+
+def test_large_batches_precompute_short_and_heavy_prefixes():
+    index = PrefixIndex()
+    index.INSORT_BATCH_LIMIT = 4
+    index.HEAVY_PREFIX_ENTRIES = 1
+    index.add_many(PRODUCTS)
+
+    assert {"c", "ce", "cer", "cera", "cerav", "cleanser"} <= set(index._ranked)
+    for prefix in ["c", "ce", "cerav", "cleanser", "the o"]:
+        assert keys(index.suggest(prefix, 10)) == brute_force(index, prefix, 10)
+
+
+def test_limit_above_top_k_ranks_the_range():
+    index = PrefixIndex()
+    index.TOP_K = 1
+    index.add_many(PRODUCTS)
+
+    assert keys(index.suggest("c", 3)) == ["cosrx-snail", "cerave-lotion", "cerave-cleanser"]
+
+
+def test_writes_refill_full_lists_from_extensions(monkeypatch):
+    rng = random.Random(3)
+    words = ["cera", "cerave", "cleanser", "clear", "cream", "serum", "snail", "soothing", "sun", "spf", "toner", "tonic"]
+    products = [(f"p{i}", " ".join(rng.sample(words, 3)), rng.randint(0, 500)) for i in range(300)]
+    index = PrefixIndex()
+    index.TOP_K = 5
+    index.INSORT_BATCH_LIMIT = 16
+    index.HEAVY_PREFIX_ENTRIES = 20
+    index.add_many(products)
+
+    def rank_range(prefix, limit):
+        raise AssertionError(f"ranked the whole range of {prefix!r} on a write")
+
+    monkeypatch.setattr(index, "_rank_range", rank_range)
+    for key, title, reviews in rng.sample(products, 40):
+        index.add(key, title, reviews // 2)  # fewer reviews: re-indexed and demoted
+    for key, _, _ in rng.sample(products, 20):
+        index.remove(key)
+    index.set_recommendations({key: rng.randint(0, 3) for key, _, _ in rng.sample(products, 30)})
+    index.set_recommendations({})
+    monkeypatch.undo()
+
+    for prefix in ["c", "ce", "cer", "cera", "cerave", "cl", "s", "sun", "t", "toner c"]:
+        assert keys(index.suggest(prefix, 5)) == brute_force(index, prefix, 5), prefix